@@ -1,4 +1,4 @@
-from anonymizer.anonymization.config import AnonymizerConfig  # noqa: F401
+from anonymizer.anonymization.config import AnonymizerConfig, ConsistencyKey  # noqa: F401
 from anonymizer.anonymization.anonymizer import Anonymizer  # noqa: F401
-from anonymizer.anonymization.pii import Pii, AnonymizedPii  # noqa: F401
+from anonymizer.anonymization.pii import Pii, AnonymizedPii, PiiRecord, AnonymizedPiiRecord  # noqa: F401
 from anonymizer.utils.dateutil.parser import ParserError  # noqa: F401
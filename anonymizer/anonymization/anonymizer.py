@@ -1,15 +1,69 @@
-from typing import Union, List, Iterator
+import multiprocessing
+import os
+import zlib
+from collections import defaultdict
+from typing import Union, List, Iterator, Sequence, Optional, AsyncIterable, AsyncIterator, Iterable, Tuple
 
-from ..mechanisms import mechanism_config_types, mechanism_types, is_config
-from anonymizer.anonymization.config import AnonymizerConfig
-from anonymizer.anonymization.pii import Pii, AnonymizedPii
+import numpy as np
 
+from ..mechanisms import mechanism_types
+from ..state import read_snapshot, write_snapshot
+from anonymizer.anonymization.config import AnonymizerConfig, ConsistencyKey
+from anonymizer.anonymization.pii import Pii, AnonymizedPii, PiiRecord, AnonymizedPiiRecord
+from anonymizer.anonymization.plan import DispatchPlan
+from anonymizer.utils.instrumentation import TagStats, timed
 
-def _to_mechanism(mechanism_or_config: Union[mechanism_config_types, mechanism_types]) -> mechanism_types:
-    if is_config(mechanism_or_config):
-        return mechanism_or_config.config
-    else:
-        return mechanism_or_config
+
+def _anonymize_shard(anonymizer, shard):
+    reservations, tags, texts, ids = shard
+    mechanisms = anonymizer._mechanisms()
+    for mechanism, reservation in zip(mechanisms, reservations):
+        mechanism._start_shard(reservation)
+    if anonymizer._tag_stats is not None:
+        anonymizer._tag_stats = defaultdict(TagStats)
+    anonymized = anonymizer.anonymize_batch(tags, texts, ids, as_records=True)
+    states = [mechanism._shard_state() for mechanism in mechanisms]
+    for mechanism in mechanisms:
+        mechanism._finish_shard()
+    return anonymized, states, [mechanism.instrumentation for mechanism in mechanisms], anonymizer._tag_stats
+
+
+def _serve_shards(anonymizer, connection):
+    """
+    The main loop of a worker process of a `WorkerPool`: anonymizes the shards received from the connection
+    until it receives None, and sends back each result or the exception raised.
+    """
+    # Forked workers inherit numpy's random state and would otherwise all draw the same noise.
+    np.random.seed()
+    while True:
+        shard = connection.recv()
+        if shard is None:
+            return
+        try:
+            connection.send((_anonymize_shard(anonymizer, shard), None))
+        except Exception as e:
+            connection.send((None, e))
+
+
+def _shard_of(mechanism_idx, text, num_shards):
+    # The built-in `hash` of strings is salted per process, so use a stable hash instead.
+    return zlib.crc32(f"{mechanism_idx}:{text}".encode()) % num_shards
+
+
+def _shard_size(mechanism, texts, ids):
+    """
+    Returns how many values `mechanism` may have to create for a shard with the given texts and ids:
+    one per distinct text or id without an anonymization if the mechanism is stateful, otherwise one per occurrence.
+    """
+    if not mechanism.stateful:
+        return len(texts) + len(ids)
+    texts, ids = list(dict.fromkeys(texts)), list(dict.fromkeys(ids))
+    return (
+        len(texts)
+        - len(mechanism.anonymizations.get_many(texts))
+        + len(ids)
+        - len(mechanism.anonymizations_by_id.get_many(ids))
+    )
 
 
 class Anonymizer:
@@ -19,12 +73,55 @@ class Anonymizer:
     and returns a list or individual `AnonymizedPii`s.
     """
 
-    def __init__(self, config: AnonymizerConfig):
+    def __init__(self, config: AnonymizerConfig, instrumented: bool = False):
         """
         Create an Anonymizer from an `AnonymizerConfig`.
+        The configuration is compiled into a `DispatchPlan` once.
+        If `instrumented` is set, the anonymizer and all its mechanisms are instrumented (see `instrument`).
         """
-        self.default_mechanism = None if config.default_mechanism is None else _to_mechanism(config.default_mechanism)
-        self.mechanisms_by_tag = {tag: _to_mechanism(c) for tag, c in config.mechanisms_by_tag.items()}
+        self.plan = config.compile()
+        self.default_mechanism = self.plan.default_mechanism
+        self.mechanisms_by_tag = self.plan.mechanisms_by_tag
+        self.consistency_key = config.consistency_key
+        self._tag_stats = None
+        if instrumented:
+            self.instrument()
+
+    def instrument(self):
+        """
+        Enables the instrumentation of the anonymizer and all its mechanisms.
+        Per tag, the anonymizer counts the Piis and records the latencies of `anonymize_individual`
+        and of the partitions of `anonymize_batch`. The mechanisms record their own counters and latencies
+        (see `StatefulMechanism.stats`). Piis anonymized by worker processes of `anonymize_parallel` are included.
+        """
+        for mechanism in self._mechanisms():
+            mechanism.instrument()
+        if self._tag_stats is None:
+            self._tag_stats = defaultdict(TagStats)
+        # The compiled plan refers to the uninstrumented callables, so it is rebuilt.
+        self.plan = DispatchPlan(dict(self.mechanisms_by_tag), self.default_mechanism)
+
+    def stats(self) -> Optional[dict]:
+        """
+        Returns a snapshot of the instrumentation, or None if the anonymizer is not instrumented:
+        the stats of each tag seen so far (`tags`), of the mechanism of each tag (`mechanisms`)
+        and of the `default_mechanism`. Latencies are given in nanoseconds.
+
+        >>> from anonymizer.mechanisms.suppression import Suppression
+        >>> anonymizer = Anonymizer(AnonymizerConfig(mechanisms_by_tag={'name': Suppression()}), instrumented=True)
+        >>> [anonymizer.anonymize_individual(Pii(tag=tag, text='Alice')).text for tag in ('name', 'name', 'date')]
+        ['XXXXX', 'XXXXX', 'Alice']
+        >>> stats = anonymizer.stats()
+        >>> stats['tags']['name']['calls'], stats['tags']['date']['unmodified'], stats['mechanisms']['name']['calls']
+        (2, 1, 2)
+        """
+        if self._tag_stats is None:
+            return None
+        return {
+            "tags": {tag: tag_stats.snapshot() for tag, tag_stats in self._tag_stats.items()},
+            "mechanisms": {tag: mechanism.stats() for tag, mechanism in self.mechanisms_by_tag.items()},
+            "default_mechanism": None if self.default_mechanism is None else self.default_mechanism.stats(),
+        }
 
     def anonymize(self, piis: Union[Pii, List[Pii]]) -> Union[AnonymizedPii, Iterator[AnonymizedPii]]:
         """
@@ -35,25 +132,447 @@ class Anonymizer:
 
         return map(lambda pii: self.anonymize_individual(pii), piis)
 
+    def anonymize_batch(
+        self, tags: Sequence[str], texts: Sequence[str], ids: Optional[Sequence[str]] = None, as_records: bool = False
+    ) -> Union[List[AnonymizedPii], List[AnonymizedPiiRecord]]:
+        """
+        Anonymizes a batch of Piis given as parallel sequences of tags, texts and (optional) ids.
+
+        The batch is partitioned by tag once, each partition is passed to its mechanism in a single call
+        and the results are scattered back, so the returned list follows the order of the input.
+        Tags without a mechanism fall back to the default mechanism or are returned unmodified,
+        just like in `anonymize_individual`.
+        If a mechanism is deterministic (see `StatefulMechanism.deterministic`), it is invoked only once
+        per distinct text of a partition and the result is shared between all occurrences.
+        If the anonymizer is configured with `ConsistencyKey.id`, the ids are passed to the mechanisms,
+        so stateful mechanisms anonymize all texts with the same id consistently.
+
+        If `as_records` is set, lightweight `AnonymizedPiiRecord`s are returned, which skip the validation of `AnonymizedPii`.
+
+        >>> from anonymizer.mechanisms.suppression import Suppression
+        >>> anonymizer = Anonymizer(AnonymizerConfig(mechanisms_by_tag={'name': Suppression()}))
+        >>> [pii.text for pii in anonymizer.anonymize_batch(['name', 'date', 'name'], ['Alice', 'today', 'Bob'])]
+        ['XXXXX', 'today', 'XXX']
+        """
+        if ids is None:
+            ids = [None] * len(texts)
+        if not len(tags) == len(texts) == len(ids):
+            raise ValueError("tags, texts and ids must have the same length")
+
+        # Partition the batch by tag.
+        positions_by_tag = defaultdict(list)
+        for position, tag in enumerate(tags):
+            positions_by_tag[tag].append(position)
+
+        # Anonymize each partition at once and scatter the replacements back into input order.
+        replacements = [None] * len(texts)
+        all_tag_stats = self._tag_stats
+        for tag, positions in positions_by_tag.items():
+            mechanism = self.plan.mechanism_for(tag)
+            if all_tag_stats is not None:
+                tag_stats = all_tag_stats[tag]
+                tag_stats.calls += len(positions)
+                if mechanism is None:
+                    tag_stats.unmodified += len(positions)
+            if mechanism is None:
+                continue
+            values = [texts[position] for position in positions]
+            partition_ids = None
+            if self.consistency_key == ConsistencyKey.id and any(ids[position] is not None for position in positions):
+                partition_ids = [ids[position] for position in positions]
+            if all_tag_stats is None:
+                anonymized_values = self._anonymize_partition(mechanism, values, partition_ids)
+            else:
+                anonymized_values = timed(tag_stats.batch, self._anonymize_partition, mechanism, values, partition_ids)
+            for position, replacement in zip(positions, anonymized_values):
+                replacements[position] = replacement
+
+        if as_records:
+            # Like the validation of `AnonymizedPii`, records convert non-string replacements (e.g., noisy numbers).
+            return [
+                (
+                    AnonymizedPiiRecord(tag, text, id_, False)
+                    if replacement is None
+                    else AnonymizedPiiRecord(tag, str(replacement), id_, True)
+                )
+                for tag, text, id_, replacement in zip(tags, texts, ids, replacements)
+            ]
+        return [
+            AnonymizedPii(tag, text if replacement is None else replacement, id_, replacement is not None)
+            for tag, text, id_, replacement in zip(tags, texts, ids, replacements)
+        ]
+
+    @staticmethod
+    def _anonymize_partition(mechanism: mechanism_types, values: List[str], ids: Optional[List[str]]) -> List[str]:
+        """
+        Anonymizes the values of a partition with the given mechanism, optionally keyed by their ids.
+        Deterministic mechanisms are invoked only once per distinct value and id.
+        """
+        keys = values if ids is None else list(zip(values, ids))
+        unique_keys = list(dict.fromkeys(keys)) if mechanism.deterministic else keys
+        if len(unique_keys) == len(keys):
+            return mechanism.anonymize_many(values, ids)
+
+        if ids is None:
+            anonymized = mechanism.anonymize_many(unique_keys)
+        else:
+            anonymized = mechanism.anonymize_many([value for value, _ in unique_keys], [id_ for _, id_ in unique_keys])
+        anonymized_by_key = dict(zip(unique_keys, anonymized))
+        return [anonymized_by_key[key] for key in keys]
+
+    def anonymize_document(self, text: str, spans: Sequence[Tuple[int, int, str]]) -> Tuple[str, List[Tuple[int, int, str]]]:
+        """
+        Anonymizes the Piis of a document given as spans `(start, end, tag)` of character offsets into the text.
+
+        All spans are anonymized in a single batch and the anonymized document is built in one linear pass.
+        Returns the anonymized document and the spans shifted to the positions of the replacements,
+        in the order of the input. Spans must not overlap.
+
+        >>> from anonymizer.mechanisms.suppression import Suppression
+        >>> anonymizer = Anonymizer(AnonymizerConfig(mechanisms_by_tag={'name': Suppression(custom_length=3)}))
+        >>> anonymizer.anonymize_document('Alice met Bob.', [(10, 13, 'name'), (0, 5, 'name')])
+        ('XXX met XXX.', [(8, 11, 'name'), (0, 3, 'name')])
+        """
+        order = sorted(range(len(spans)), key=lambda idx: spans[idx][0])
+
+        previous_end = 0
+        for idx in order:
+            start, end, _ = spans[idx]
+            if start < previous_end or end < start or end > len(text):
+                raise ValueError(f"Invalid or overlapping span: {tuple(spans[idx])}")
+            previous_end = end
+
+        records = self.anonymize_batch(
+            [spans[idx][2] for idx in order], [text[spans[idx][0] : spans[idx][1]] for idx in order], as_records=True
+        )
+
+        pieces = []
+        shifted_spans = [None] * len(spans)
+        position = 0
+        shift = 0
+        for idx, record in zip(order, records):
+            start, end, tag = spans[idx]
+            replacement = str(record.text)
+            pieces.append(text[position:start])
+            pieces.append(replacement)
+            shifted_spans[idx] = (start + shift, start + shift + len(replacement), tag)
+            shift += len(replacement) - (end - start)
+            position = end
+        pieces.append(text[position:])
+
+        return "".join(pieces), shifted_spans
+
+    async def anonymize_stream(
+        self, piis: AsyncIterable[Union[Pii, PiiRecord, Iterable[Pii]]], batch_size: int = 1024, as_records: bool = False
+    ) -> AsyncIterator[Union[AnonymizedPii, AnonymizedPiiRecord]]:
+        """
+        Anonymizes an asynchronous stream of Piis or chunks (iterables) of Piis.
+        Besides `Pii`s, the stream may contain `PiiRecord`s.
+        If `as_records` is set, `AnonymizedPiiRecord`s are yielded instead of `AnonymizedPii`s.
+
+        The Piis are collected into batches of at most `batch_size`, which are anonymized using `anonymize_batch`
+        directly on the event loop, i.e., without handing each Pii over to an executor.
+        The batch size bounds both the memory in flight and the time the event loop is blocked.
+        Since the input is only consumed while results are requested, a slow consumer slows down the producer.
+
+        >>> import asyncio
+        >>> from anonymizer.mechanisms.suppression import Suppression
+        >>> async def source():
+        ...     yield Pii('name', 'Alice')
+        ...     yield [Pii('name', 'Bob'), Pii('date', 'today')]
+        >>> async def run(anonymizer):
+        ...     return [pii.text async for pii in anonymizer.anonymize_stream(source(), batch_size=2)]
+        >>> asyncio.run(run(Anonymizer(AnonymizerConfig(mechanisms_by_tag={'name': Suppression()}))))
+        ['XXXXX', 'XXX', 'today']
+        """
+        if batch_size < 1:
+            raise ValueError("The batch size must be positive")
+
+        batch = []
+        async for item in piis:
+            if isinstance(item, (Pii, PiiRecord)):
+                batch.append(item)
+            else:
+                batch.extend(item)
+
+            while len(batch) >= batch_size:
+                for anonymized_pii in self._anonymize_piis(batch[:batch_size], as_records):
+                    yield anonymized_pii
+                del batch[:batch_size]
+
+        for anonymized_pii in self._anonymize_piis(batch, as_records):
+            yield anonymized_pii
+
+    def _anonymize_piis(self, piis: List[Union[Pii, PiiRecord]], as_records: bool = False):
+        return self.anonymize_batch(
+            [pii.tag for pii in piis], [pii.text for pii in piis], [pii.id for pii in piis], as_records=as_records
+        )
+
+    def anonymize_parallel(
+        self, piis: Sequence[Union[Pii, PiiRecord]], workers: Optional[int] = None, as_records: bool = False
+    ) -> Union[List[AnonymizedPii], List[AnonymizedPiiRecord]]:
+        """
+        Anonymizes a list of Piis or `PiiRecord`s using a pool of `workers` processes (by default, one per CPU).
+        If `as_records` is set, `AnonymizedPiiRecord`s are returned instead of `AnonymizedPii`s.
+        The results are returned in the order of the input.
+
+        The pool is started for this call only (see `worker_pool` to anonymize several batches with the same pool).
+        """
+        piis = list(piis)
+        workers = workers or os.cpu_count() or 1
+        if workers < 1:
+            raise ValueError("The number of workers must be positive")
+        if workers == 1:
+            return self._anonymize_piis(piis, as_records)
+
+        with self.worker_pool(workers) as pool:
+            return pool.anonymize_batch(
+                [pii.tag for pii in piis], [pii.text for pii in piis], [pii.id for pii in piis], as_records=as_records
+            )
+
+    def worker_pool(self, workers: Optional[int] = None) -> "WorkerPool":
+        """
+        Starts a `WorkerPool` of `workers` processes (by default, one per CPU), which anonymize batches in parallel
+        on behalf of this anonymizer. The pool should be used as a context manager, so its processes are stopped.
+
+        While the pool is open, this anonymizer should only be used through it:
+        the workers do not see anonymizations created by the anonymizer itself in the meantime.
+        """
+        workers = workers or os.cpu_count() or 1
+        if workers < 1:
+            raise ValueError("The number of workers must be positive")
+        return WorkerPool(self, workers)
+
+    def save_state(self, path: str):
+        """
+        Saves the state of all mechanisms, i.e., their anonymizations and counters, to a binary snapshot at `path`.
+
+        The snapshot only contains a hash of each input value.
+        Outputs are stored as compact references where possible (e.g., the counter value of a pseudonym),
+        otherwise as strings.
+        """
+        entries = []
+        for mechanism in self._mechanisms():
+            entries.append(
+                {
+                    "type": type(mechanism).__name__,
+                    "scalars": mechanism._state_scalars(),
+                    "stores": {name: store.export_hashed() for name, store in mechanism._state_stores().items()},
+                    "codec": mechanism._state_codec(),
+                }
+            )
+        write_snapshot(path, entries)
+
+    def load_state(self, path: str):
+        """
+        Resumes from a snapshot written by `save_state` of an anonymizer with the same configuration.
+        The current state of all mechanisms is replaced.
+
+        Loading is lazy: the snapshot is memory-mapped and only the parts needed to look up input values are read.
+        New anonymizations are kept on top of the snapshot in the state backend configured for each mechanism
+        (e.g., a bounded cache or a `state_backend`). The snapshot must not be modified while in use.
+
+        >>> import os, tempfile
+        >>> from anonymizer.anonymization.config import AnonymizerConfig
+        >>> config = AnonymizerConfig(mechanisms_by_tag={
+        ...     'name': {'mechanism': 'pseudonymization', 'config': {'formatString': 'Person {}', 'stateful': True}}
+        ... })
+        >>> anonymizer = Anonymizer(config)
+        >>> anonymizer.anonymize_individual(Pii(tag='name', text='Alice')).text
+        'Person 1'
+        >>> path = os.path.join(tempfile.mkdtemp(), 'state.bin')
+        >>> anonymizer.save_state(path)
+        >>> restarted = Anonymizer(config)
+        >>> restarted.load_state(path)
+        >>> [restarted.anonymize_individual(Pii(tag='name', text=name)).text for name in ('Bob', 'Alice')]
+        ['Person 2', 'Person 1']
+        """
+        mechanisms = self._mechanisms()
+        snapshot = read_snapshot(path)
+        if [type(mechanism).__name__ for mechanism in mechanisms] != [mechanism_type for mechanism_type, _, _ in snapshot]:
+            raise ValueError("The snapshot does not match the mechanisms of this anonymizer")
+
+        for mechanism, (_, scalars, stores) in zip(mechanisms, snapshot):
+            mechanism._load_state(scalars, stores)
+        # The compiled plan refers to the previous anonymizations, so it is rebuilt.
+        self.plan = DispatchPlan(dict(self.mechanisms_by_tag), self.default_mechanism)
+
+    def _mechanisms(self) -> List[mechanism_types]:
+        """
+        Returns all distinct mechanisms of this anonymizer in a stable order.
+        """
+        mechanisms = [*self.mechanisms_by_tag.values(), self.default_mechanism]
+        return list({id(mechanism): mechanism for mechanism in mechanisms if mechanism is not None}.values())
+
     def anonymize_individual(self, pii: Pii) -> AnonymizedPii:
         """
         Anonymizes a single Pii.
 
-        First, it looks up whether there is an anonymization mechanism defined for the Pii's tag.
-        If so, it uses that mechanism for anonymization.
+        If there is an anonymization mechanism defined for the Pii's tag, it uses that mechanism for anonymization.
         Otherwise, it falls back to the default mechanism.
+        Both cases are resolved by a single lookup in the compiled `DispatchPlan`.
 
         If there is no mechanism defined for this tag and the default mechanism is `None`, it is returned unmodified.
         This will be indicated by the `modified` flag of the `AnonymizedPii`.
         """
-        # See whether a mechanism is defined.
-        if pii.tag in self.mechanisms_by_tag:
-            replacement = self.mechanisms_by_tag[pii.tag].anonymize(pii.text)
-            return AnonymizedPii.from_pii(pii, replacement)
+        if self._tag_stats is not None:
+            return self.__anonymize_individual_instrumented(pii)
+        if self.consistency_key == ConsistencyKey.id and pii.id is not None:
+            return AnonymizedPii.from_pii(pii, self.__replacement_by_id(pii))
+        return AnonymizedPii.from_pii(pii, self.plan(pii.tag, pii.text))
+
+    def __anonymize_individual_instrumented(self, pii: Pii) -> AnonymizedPii:
+        tag_stats = self._tag_stats[pii.tag]
+        if self.consistency_key == ConsistencyKey.id and pii.id is not None:
+            replacement = timed(tag_stats.individual, self.__replacement_by_id, pii)
+        else:
+            replacement = timed(tag_stats.individual, self.plan, pii.tag, pii.text)
+        tag_stats.calls += 1
+        if replacement is None:
+            tag_stats.unmodified += 1
+        return AnonymizedPii.from_pii(pii, replacement)
+
+    def __replacement_by_id(self, pii: Pii) -> Optional[str]:
+        """
+        Returns the replacement of a Pii anonymized consistently per id, or `None` if there is no mechanism for its tag.
+        """
+        mechanism = self.plan.mechanism_for(pii.tag)
+        if mechanism is None:
+            return None
+        return self._anonymize_partition(mechanism, [pii.text], [pii.id])[0]
+
+
+class WorkerPool:
+    """
+    A pool of worker processes, which anonymize batches of Piis in parallel on behalf of an `Anonymizer`.
+    Use `Anonymizer.worker_pool` to start one.
+
+    >>> from anonymizer.anonymization.config import AnonymizerConfig
+    >>> from anonymizer.mechanisms.pseudonymization import Pseudonymization
+    >>> anonymizer = Anonymizer(AnonymizerConfig(mechanisms_by_tag={
+    ...     'name': Pseudonymization(format_string='Person {}', stateful=True)
+    ... }))
+    >>> with anonymizer.worker_pool(2) as pool:
+    ...     first = pool.anonymize_batch(['name', 'name'], ['Alice', 'Bob'], as_records=True)
+    ...     second = pool.anonymize_batch(['name', 'date'], ['Alice', 'today'], as_records=True)
+    >>> [record.text for record in first + second] == [first[0].text, first[1].text, first[0].text, 'today']
+    True
+
+    The Piis of a batch are sharded by a stable hash of their text (or their id, if configured with `ConsistencyKey.id`)
+    and the mechanism their tag resolves to. Each shard is always anonymized by the same worker,
+    so all occurrences of an input value are anonymized by the same worker,
+    which owns a disjoint slice of each stateful mechanism's anonymizations.
+    After every batch, these slices are merged back into the anonymizer, so subsequent calls remain consistent.
+    Pseudonymization reserves a separate block of counter values for each shard,
+    sized by the number of distinct input values the worker has to create pseudonyms for:
+    pseudonyms stay unique, but counter values may be skipped if a worker does not use its whole block.
+    """
+
+    def __init__(self, anonymizer: Anonymizer, workers: int):
+        self.anonymizer = anonymizer
+        self.workers = workers
+        # Forking allows to hand over mechanisms that cannot be pickled, e.g., those using lambdas.
+        context = multiprocessing.get_context("fork" if "fork" in multiprocessing.get_all_start_methods() else None)
+        self._connections = []
+        self._processes = []
+        for _ in range(workers):
+            connection, worker_connection = context.Pipe()
+            process = context.Process(target=_serve_shards, args=(anonymizer, worker_connection), daemon=True)
+            process.start()
+            worker_connection.close()
+            self._connections.append(connection)
+            self._processes.append(process)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        """Stops all worker processes."""
+        for connection in self._connections:
+            try:
+                connection.send(None)
+            except OSError:
+                pass
+            connection.close()
+        for process in self._processes:
+            process.join()
+        self._connections, self._processes = [], []
+
+    def anonymize_batch(
+        self, tags: Sequence[str], texts: Sequence[str], ids: Optional[Sequence[str]] = None, as_records: bool = False
+    ) -> Union[List[AnonymizedPii], List[AnonymizedPiiRecord]]:
+        """
+        Anonymizes a batch of Piis given as parallel sequences of tags, texts and (optional) ids
+        just like `Anonymizer.anonymize_batch`, but in parallel. The results are returned in the order of the input.
+        If a worker fails, its exception is raised and the pool is closed.
+        """
+        if not self._connections:
+            raise ValueError("The worker pool is closed")
+        if ids is None:
+            ids = [None] * len(texts)
+        if not len(tags) == len(texts) == len(ids):
+            raise ValueError("tags, texts and ids must have the same length")
+
+        # Shard the Piis and collect the input values of each mechanism every shard contains.
+        anonymizer = self.anonymizer
+        workers = self.workers
+        by_id = anonymizer.consistency_key == ConsistencyKey.id
+        mechanisms = anonymizer._mechanisms()
+        mechanism_indices = {id(mechanism): idx for idx, mechanism in enumerate(mechanisms)}
+        positions_by_shard = [[] for _ in range(workers)]
+        inputs_by_shard = [[([], []) for _ in mechanisms] for _ in range(workers)]
+        for position, (tag, text, id_) in enumerate(zip(tags, texts, ids)):
+            mechanism = anonymizer.plan.mechanism_for(tag)
+            if mechanism is None:
+                shard = position % workers
+            else:
+                mechanism_idx = mechanism_indices[id(mechanism)]
+                key_is_id = by_id and id_ is not None
+                shard = _shard_of(mechanism_idx, id_ if key_is_id else text, workers)
+                shard_texts, shard_ids = inputs_by_shard[shard][mechanism_idx]
+                if key_is_id:
+                    shard_ids.append(id_)
+                else:
+                    shard_texts.append(text)
+            positions_by_shard[shard].append(position)
+
+        for connection, positions, inputs in zip(self._connections, positions_by_shard, inputs_by_shard):
+            reservations = [
+                mechanism._reserve_shard(_shard_size(mechanism, *texts_and_ids))
+                for mechanism, texts_and_ids in zip(mechanisms, inputs)
+            ]
+            connection.send(
+                (
+                    reservations,
+                    [tags[position] for position in positions],
+                    [texts[position] for position in positions],
+                    [ids[position] for position in positions],
+                )
+            )
 
-        # Otherwise try default.
-        if self.default_mechanism is not None:
-            replacement = self.default_mechanism.anonymize(pii.text)
-            return AnonymizedPii.from_pii(pii, replacement)
+        # Merge the workers' states and scatter the results back into input order.
+        results = [connection.recv() for connection in self._connections]
+        anonymized_piis = [None] * len(texts)
+        for positions, (result, error) in zip(positions_by_shard, results):
+            if error is not None:
+                continue
+            anonymized, states, mechanism_stats, tag_stats = result
+            for mechanism, state, stats in zip(mechanisms, states, mechanism_stats):
+                mechanism._merge_shard_state(state)
+                if stats is not None:
+                    mechanism.instrumentation.merge(stats)
+            if tag_stats is not None:
+                for tag, stats in tag_stats.items():
+                    anonymizer._tag_stats[tag].merge(stats)
+            for position, record in zip(positions, anonymized):
+                anonymized_piis[position] = record if as_records else record.to_pii()
 
-        return AnonymizedPii.from_pii(pii)
+        errors = [error for _, error in results if error is not None]
+        if errors:
+            # The state of the failed workers is unknown, so the pool cannot be used any further.
+            self.close()
+            raise errors[0]
+        return anonymized_piis
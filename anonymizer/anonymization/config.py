@@ -1,12 +1,33 @@
+from enum import Enum
 from typing import Dict, Optional, Union
 
-from ..mechanisms import mechanism_config_types, mechanism_types
+from ..mechanisms import mechanism_config_types, mechanism_types, is_config
 from ..utils.pydantic_base_model import CamelBaseModel
+from .plan import DispatchPlan
+
+
+def _to_mechanism(mechanism_or_config: Union[mechanism_config_types, mechanism_types]) -> mechanism_types:
+    if is_config(mechanism_or_config):
+        return mechanism_or_config.config
+    else:
+        return mechanism_or_config
+
+
+class ConsistencyKey(str, Enum):
+    """
+    Determines what stateful mechanisms anonymize consistently:
+    equal texts (`text`), or Piis of the same entity, i.e., with the same `Pii.id` (`id`).
+    In the latter case, Piis without an id are still anonymized consistently by their text.
+    """
+
+    text = "text"
+    id = "id"
 
 
 class AnonymizerConfig(CamelBaseModel):
     default_mechanism: Optional[Union[mechanism_config_types, mechanism_types]] = None
     mechanisms_by_tag: Dict[str, Union[mechanism_config_types, mechanism_types]]
+    consistency_key: ConsistencyKey = ConsistencyKey.text
 
     class Config:
         @staticmethod
@@ -20,3 +41,11 @@ class AnonymizerConfig(CamelBaseModel):
                 for v in schema["properties"]["mechanismsByTag"]["additionalProperties"]["anyOf"]
                 if v["$ref"].endswith("Parameters")
             ]
+
+    def compile(self) -> DispatchPlan:
+        """
+        Resolves the mechanisms of this configuration into a `DispatchPlan`,
+        which maps each tag directly to a callable anonymizing its texts.
+        """
+        default_mechanism = None if self.default_mechanism is None else _to_mechanism(self.default_mechanism)
+        return DispatchPlan({tag: _to_mechanism(c) for tag, c in self.mechanisms_by_tag.items()}, default_mechanism)
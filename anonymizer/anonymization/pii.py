@@ -2,6 +2,8 @@
 The Pii class is the interface to other components of OpenRedact.
 """
 
+from typing import NamedTuple, Optional
+
 from pydantic.dataclasses import dataclass
 
 
@@ -24,3 +26,34 @@ class AnonymizedPii(Pii):
         return AnonymizedPii(
             tag=pii.tag, text=pii.text if replacement is None else replacement, id=pii.id, modified=replacement is not None
         )
+
+
+class PiiRecord(NamedTuple):
+    """
+    A lightweight counterpart of `Pii` without validation, which can be passed to the batch APIs of the `Anonymizer`.
+    """
+
+    tag: str
+    text: str
+    id: Optional[str] = None
+
+
+class AnonymizedPiiRecord(NamedTuple):
+    """
+    A lightweight counterpart of `AnonymizedPii` without validation.
+    The batch APIs of the `Anonymizer` return these records if called with `as_records=True`.
+
+    >>> AnonymizedPiiRecord('name', 'XXXXX', '1', True).to_pii()
+    AnonymizedPii(tag='name', text='XXXXX', id='1', modified=True)
+    """
+
+    tag: str
+    text: str
+    id: Optional[str] = None
+    modified: bool = False
+
+    def to_pii(self) -> AnonymizedPii:
+        """
+        Creates the equivalent, validated `AnonymizedPii`.
+        """
+        return AnonymizedPii(tag=self.tag, text=self.text, id=self.id, modified=self.modified)
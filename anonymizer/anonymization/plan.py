@@ -0,0 +1,61 @@
+from types import MappingProxyType
+from typing import Callable, Dict, Optional
+
+from ..mechanisms import mechanism_types
+
+
+def _unmodified(_):
+    return None
+
+
+class DispatchPlan:
+    """
+    A dispatch plan maps each tag directly to a prebuilt callable that anonymizes texts with this tag.
+    The callables already include the stateful lookup, the en-/decoding and the fallback to the default mechanism.
+    For tags without any mechanism, they return `None` to indicate that the text is not modified.
+
+    Plans are usually created using `AnonymizerConfig.compile()`.
+    A plan is immutable and can be shared across threads;
+    stateful mechanisms used from several threads need to be created with `thread_safe=True`.
+
+    >>> from anonymizer.mechanisms.suppression import Suppression
+    >>> plan = DispatchPlan({'name': Suppression()})
+    >>> plan('name', 'Alice'), plan('date', 'today')
+    ('XXXXX', None)
+    """
+
+    def __init__(self, mechanisms_by_tag: Dict[str, mechanism_types], default_mechanism: Optional[mechanism_types] = None):
+        self.mechanisms_by_tag = MappingProxyType(dict(mechanisms_by_tag))
+        self.default_mechanism = default_mechanism
+
+        # Compile each mechanism only once, even if it is shared between tags.
+        compiled = {}
+        for mechanism in (*self.mechanisms_by_tag.values(), default_mechanism):
+            if mechanism is not None and id(mechanism) not in compiled:
+                compiled[id(mechanism)] = mechanism.compile()
+
+        self._default = _unmodified if default_mechanism is None else compiled[id(default_mechanism)]
+        self._anonymizers_by_tag = {tag: compiled[id(mechanism)] for tag, mechanism in self.mechanisms_by_tag.items()}
+
+    def __call__(self, tag: str, text: str) -> Optional[str]:
+        """
+        Anonymizes the text of a Pii with the given tag.
+        Returns `None` if no mechanism is defined for the tag.
+        """
+        return self._anonymizers_by_tag.get(tag, self._default)(text)
+
+    def __reduce__(self):
+        # The compiled callables are closures and cannot be pickled, so they are rebuilt instead.
+        return DispatchPlan, (dict(self.mechanisms_by_tag), self.default_mechanism)
+
+    def resolve(self, tag: str) -> Callable[[str], Optional[str]]:
+        """
+        Returns the callable that anonymizes texts with the given tag.
+        """
+        return self._anonymizers_by_tag.get(tag, self._default)
+
+    def mechanism_for(self, tag: str) -> Optional[mechanism_types]:
+        """
+        Returns the mechanism used for the given tag, or `None` if there is none.
+        """
+        return self.mechanisms_by_tag.get(tag, self.default_mechanism)
@@ -0,0 +1,99 @@
+"""
+The command-line interface anonymizes newline-delimited JSON (JSONL) records of Piis.
+
+Each input line is a JSON object with the keys `tag`, `text` and, optionally, `id`.
+Each output line is the JSON object of the corresponding `AnonymizedPii`.
+The input is processed in batches, so the memory usage is independent of the input size:
+
+    python -m anonymizer config.json --input piis.jsonl --output anonymized.jsonl --workers 8
+"""
+
+import argparse
+import json
+import sys
+from contextlib import ExitStack
+from itertools import islice
+
+from anonymizer.anonymization.anonymizer import Anonymizer
+from anonymizer.anonymization.config import AnonymizerConfig
+
+BUFFER_SIZE = 1 << 20
+
+
+def _parse_args(argv):
+    parser = argparse.ArgumentParser(prog="anonymizer", description="Anonymizes newline-delimited JSON records of Piis.")
+    parser.add_argument("config", help="path to a JSON file containing an AnonymizerConfig")
+    parser.add_argument("-i", "--input", default="-", help="path to the JSONL input (default: stdin)")
+    parser.add_argument("-o", "--output", default="-", help="path to the JSONL output (default: stdout)")
+    parser.add_argument("-w", "--workers", type=int, default=1, help="number of worker processes (default: 1)")
+    parser.add_argument(
+        "-b", "--batch-size", type=int, default=10000, help="number of records anonymized at once (default: 10000)"
+    )
+    args = parser.parse_args(argv)
+    if args.workers < 1:
+        parser.error("--workers must be positive")
+    if args.batch_size < 1:
+        parser.error("--batch-size must be positive")
+    return args
+
+
+def _open(path, mode, std):
+    if path == "-":
+        return open(std.fileno(), mode, encoding="utf-8", buffering=BUFFER_SIZE, closefd=False)
+    return open(path, mode, encoding="utf-8", buffering=BUFFER_SIZE)
+
+
+def _read_batches(input_file, batch_size):
+    """
+    Yields lists of `(line number, line)` tuples, reading at most `batch_size` lines at once and skipping blank lines.
+    """
+    lines = enumerate(input_file, start=1)
+    while True:
+        batch = list(islice(lines, batch_size))
+        if not batch:
+            return
+        yield [(line_number, line) for line_number, line in batch if line.strip()]
+
+
+def _parse_batch(batch):
+    """
+    Parses a batch of JSON lines into parallel lists of tags, texts and ids.
+    """
+    tags, texts, ids = [], [], []
+    for line_number, line in batch:
+        try:
+            record = json.loads(line)
+            tags.append(record["tag"])
+            texts.append(record["text"])
+            ids.append(record.get("id"))
+        except (ValueError, KeyError, TypeError, AttributeError) as e:
+            raise ValueError(f"Invalid Pii in line {line_number}: {e!r}") from e
+    return tags, texts, ids
+
+
+def main(argv=None):
+    """
+    Runs the command-line interface and returns its exit code.
+    """
+    args = _parse_args(argv)
+    anonymizer = Anonymizer(AnonymizerConfig.parse_file(args.config))
+
+    with ExitStack() as stack:
+        input_file = stack.enter_context(_open(args.input, "r", sys.stdin))
+        output_file = stack.enter_context(_open(args.output, "w", sys.stdout))
+        anonymize_batch = anonymizer.anonymize_batch
+        if args.workers > 1:
+            # The worker processes are started once and anonymize all batches.
+            anonymize_batch = stack.enter_context(anonymizer.worker_pool(args.workers)).anonymize_batch
+        for batch in _read_batches(input_file, args.batch_size):
+            try:
+                anonymized = anonymize_batch(*_parse_batch(batch), as_records=True)
+            except ValueError as e:
+                print(f"anonymizer: {e}", file=sys.stderr)
+                return 1
+
+            output_file.writelines(
+                json.dumps(dict(tag=pii.tag, text=pii.text, id=pii.id, modified=pii.modified), ensure_ascii=False) + "\n"
+                for pii in anonymized
+            )
+    return 0
@@ -1,8 +1,10 @@
 import abc
+from functools import partial
 from typing import Optional, Union
 
 from anonymizer.encoders import EncoderType, Encoder
 from anonymizer.mechanisms.stateful_mechanism import StatefulMechanism
+from anonymizer.utils.instrumentation import timed
 
 
 class EncodingMechanism(StatefulMechanism, abc.ABC):
@@ -30,8 +32,64 @@ class EncodingMechanism(StatefulMechanism, abc.ABC):
         Anonymizes the given input parameter and applies en-/decoding.
         """
         if self.encoder:
+            if self.instrumentation is not None:
+                return self.__anonymize_instrumented(input_value)
             value, ctx = self.encoder.encode(input_value)
             anonymized_value = super().anonymize(value)
             return self.encoder.decode(anonymized_value, ctx)
         else:
             return super().anonymize(input_value)
+
+    def __anonymize_instrumented(self, input_value):
+        encode, decode = self.__coders()
+        value, ctx = encode(input_value)
+        return decode(super().anonymize(value), ctx)
+
+    def __coders(self):
+        """
+        Returns the `encode` and `decode` functions of the encoder, which are timed and counted if instrumented.
+        """
+        stats = self.instrumentation
+        if stats is None:
+            return self.encoder.encode, self.encoder.decode
+        return partial(self.__code, stats.encode, self.encoder.encode), partial(self.__code, stats.decode, self.encoder.decode)
+
+    def __code(self, histogram, func, *args):
+        try:
+            return timed(histogram, func, *args)
+        except Exception:
+            self.instrumentation.encoder_failures += 1
+            raise
+
+    def compile(self):
+        """
+        Returns a callable that anonymizes a single input value just like `anonymize`,
+        with the en-/decoding steps resolved upfront.
+        Instrumented mechanisms return `anonymize` itself.
+        """
+        if self.instrumentation is not None:
+            return self.anonymize
+
+        anonymize = super().compile()
+        if not self.encoder:
+            return anonymize
+
+        encode, decode = self.encoder.encode, self.encoder.decode
+
+        def anonymize_encoded(input_value):
+            value, ctx = encode(input_value)
+            return decode(anonymize(value), ctx)
+
+        return anonymize_encoded
+
+    def anonymize_many(self, input_values, ids=None):
+        """
+        Anonymizes the given list of input values and applies en-/decoding.
+        """
+        if self.encoder:
+            encode, decode = self.__coders()
+            encoded = [encode(input_value) for input_value in input_values]
+            anonymized_values = super().anonymize_many([value for value, _ in encoded], ids)
+            return [decode(value, ctx) for value, (_, ctx) in zip(anonymized_values, encoded)]
+        else:
+            return super().anonymize_many(input_values, ids)
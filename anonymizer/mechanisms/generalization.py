@@ -29,11 +29,19 @@ class Generalization(StatefulMechanism):
 
     class Config:
         @staticmethod
-        def schema_extra(schema):
+        def schema_extra(schema, model):
+            StatefulMechanism.Config.schema_extra(schema, model)
             # manually add the replacement property which is ignored by pydantic because it accepts callables
             schema["properties"]["replacement"] = {"title": "Replacement", "type": "string"}
             schema["required"] = ["replacement"]
 
+    @property
+    def pure(self):
+        """
+        Generalization is pure for constant replacements. Replacement functions may depend on randomness.
+        """
+        return not callable(self.replacement)
+
     def apply(self, input_value):
         """
         Anonymizes the given input parameter by generalizing it.
@@ -43,6 +51,15 @@ class Generalization(StatefulMechanism):
         else:
             return self.replacement
 
+    def apply_many(self, input_values):
+        """
+        Anonymizes the given list of input values by generalizing them.
+        """
+        if callable(self.replacement):
+            return [self.replacement(input_value) for input_value in input_values]
+        else:
+            return [self.replacement] * len(input_values)
+
 
 class GeneralizationParameters(CamelBaseModel):
     mechanism: constr(regex="^generalization$") = "generalization"
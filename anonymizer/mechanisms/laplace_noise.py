@@ -18,19 +18,58 @@ class LaplaceNoise(EncodingMechanism):
 
     >>> mechanism = LaplaceNoise(epsilon=10000000000)
     >>> assert abs(mechanism.anonymize(1.5) - 1.5) < 0.1  # with high probability
+
+    If a `deterministic_key` is set, the noise for a value is derived from the keyed hash of the value.
+    Otherwise, it is drawn from numpy's global generator, unless a `random_source` is set.
     """
 
+    _supports_deterministic_key = True
+    _supports_random_source = True
+    _default_random_source = None
+
     epsilon: PositiveFloat
     sensitivity: PositiveFloat = 1.0
 
+    def __noise(self, input_values):
+        """
+        Draws the noise for each input value.
+        If a `deterministic_key` is set or a `random_source` is given, the CDF of the laplace distribution is inverted
+        for a uniform number derived from the keyed hash of the input value or drawn from `rng`, respectively.
+        """
+        if self.deterministic_key is None and self.rng is None:
+            return np.random.laplace(scale=self.sensitivity / self.epsilon, size=len(input_values))
+        if self.deterministic_key is not None:
+            uniforms = np.array([self._keyed_uniform(input_value) for input_value in input_values])
+        else:
+            # The inverse CDF diverges at 0, which `rng` may return.
+            uniforms = np.maximum(self.rng.random(len(input_values)), np.finfo(float).tiny)
+        shifted = uniforms - 0.5
+        return -self.sensitivity / self.epsilon * np.sign(shifted) * np.log(1 - 2 * np.abs(shifted))
+
+    def _state_reference(self, output):
+        """
+        Noisy values are stored by the bits of their float representation.
+        """
+        return int(np.float64(output).view(np.int64))
+
+    def _state_output(self, reference):
+        return float(np.int64(reference).view(np.float64))
+
     def apply(self, input_value):
         """
         Anonymizes the given input parameter.
         If the input_value is not a number, it raises a ValueError.
         """
         input_value = float(input_value)
-        noise = np.random.laplace(scale=self.sensitivity / self.epsilon)
-        return input_value + noise
+        return input_value + float(self.__noise([input_value])[0])
+
+    def apply_many(self, input_values):
+        """
+        Anonymizes the given list of input values, drawing the noise for all of them at once.
+        If any input value is not a number, it raises a ValueError.
+        """
+        input_values = np.array(input_values, dtype=float)
+        return (input_values + self.__noise(input_values.tolist())).tolist()
 
 
 class LaplaceNoiseParameters(CamelBaseModel):
@@ -1,6 +1,9 @@
-from pydantic import constr
+from typing import Any
+
+from pydantic import constr, Field, PositiveInt
 
 from .stateful_mechanism import StatefulMechanism
+from ..utils.block_counter import BlockCounter
 from ..utils.pydantic_base_model import CamelBaseModel
 
 
@@ -14,19 +17,97 @@ class Pseudonymization(StatefulMechanism):
     >>> mechanism = Pseudonymization(format_string='Person {}')
     >>> mechanism.anonymize('test')
     'Person 1'
+
+    If `thread_safe` is set, each thread reserves blocks of `counter_block_size` consecutive counter values at once.
+    Pseudonyms then remain unique across threads, but are not handed out in global order
+    and `counter` is the first value not reserved by any thread.
+    The same holds if the `state_backend` provides a counter, from which the blocks are then reserved:
+    a counter shared between processes (`anonymizer.state.RemoteBackend`) or persisted (`anonymizer.state.SqliteBackend`),
+    so that pseudonyms remain unique across restarts.
     """
 
+    _runtime_fields = StatefulMechanism._runtime_fields | {"block_counter"}
+
     format_string: constr(regex="^[^{}]*{}[^{}]*$")
     counter: int = 1
+    counter_block_size: PositiveInt = 64
+    block_counter: Any = Field(default=None, const=True)
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        if self.thread_safe or self.anonymizations.has_counter:
+            self.__create_block_counter()
+
+    def __create_block_counter(self):
+        anonymizations = self.anonymizations
+        reserve = (lambda n: anonymizations.reserve(n, self.counter)) if anonymizations.has_counter else None
+        # The callback is invoked while holding the counter's lock, so `counter` never decreases.
+        self.block_counter = BlockCounter(
+            self.counter,
+            self.counter_block_size,
+            on_reserve=lambda reserved: setattr(self, "counter", reserved),
+            reserve=reserve,
+        )
+
+    def __take_counters(self, n):
+        """
+        Reserves `n` consecutive counter values and returns them as a range.
+        """
+        if self.block_counter is not None:
+            return self.block_counter.take(n)
+        start = self.counter
+        self.counter += n
+        return range(start, self.counter)
 
     def apply(self, _):
         """
         Anonymizes the given input parameter by pseudonymizing it.
         """
+        if self.block_counter is not None:
+            return self.format_string.format(self.block_counter.next())
         res = self.format_string.format(self.counter)
         self.counter += 1
         return res
 
+    def apply_many(self, input_values):
+        """
+        Anonymizes the given list of input values by pseudonymizing them with one consecutive range of counter values.
+        """
+        return [self.format_string.format(counter) for counter in self.__take_counters(len(input_values))]
+
+    def _state_reference(self, output):
+        """
+        Pseudonyms are stored by their counter value.
+        """
+        prefix_len, suffix_len = map(len, self.format_string.split("{}"))
+        return int(output[prefix_len : len(output) - suffix_len])
+
+    def _state_output(self, reference):
+        return self.format_string.format(reference)
+
+    def _state_scalars(self):
+        return {"counter": self.counter}
+
+    def _load_state(self, scalars, stores):
+        super()._load_state(scalars, stores)
+        self.counter = scalars["counter"]
+        if self.block_counter is not None:
+            self.__create_block_counter()
+
+    def _reserve_shard(self, size):
+        """
+        Reserves a consecutive block of `size` counter values for a shard, so that workers never hand out the same pseudonym.
+        """
+        return self.__take_counters(size).start
+
+    def _start_shard(self, reservation):
+        super()._start_shard(reservation)
+        # Unless the anonymizations are shared, the shard's values are taken from its reservation only.
+        self.counter = reservation
+        self.block_counter = None
+        if self.thread_safe or self.anonymizations.has_counter:
+            self.__create_block_counter()
+
 
 class PseudonymizationParameters(CamelBaseModel):
     mechanism: constr(regex="^pseudonymization$") = "pseudonymization"
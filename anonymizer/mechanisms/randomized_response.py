@@ -17,6 +17,17 @@ class RandomizedResponseMode(str, Enum):
     dp = "dp"
 
 
+def _normalize(value, ignore_case, normalize_whitespace):
+    """
+    Normalizes a value for matching it against the values of a randomized response mechanism.
+    """
+    if normalize_whitespace:
+        value = " ".join(value.split())
+    if ignore_case:
+        value = value.casefold()
+    return value
+
+
 class RandomizedResponse(StatefulMechanism):
     """
     The randomized response mechanisms anonymizes input by replacing it with a certain probability
@@ -52,8 +63,23 @@ class RandomizedResponse(StatefulMechanism):
     'No'
     >>> mechanism.anonymize('Foobar')
     '<UNKNOWN>'
+
+    If a `deterministic_key` is set, the output for a value is sampled using randomness derived from its keyed hash.
+
+    Input values are matched against `values` using a hash map, so the cost of a lookup does not depend on
+    the number of values. If `ignore_case` is set, inputs are matched regardless of their case.
+    If `normalize_whitespace` is set, leading and trailing whitespace is ignored and inner whitespace is collapsed.
+    Values must remain distinguishable after normalization.
+
+    >>> mechanism = RandomizedResponse(values=['Yes', 'No'], probability_distribution=[[1, 0], [0, 1]], ignore_case=True)
+    >>> mechanism.anonymize('yes'), mechanism.anonymize('NO')
+    ('Yes', 'No')
     """
 
+    _supports_deterministic_key = True
+    _supports_random_source = True
+    _runtime_fields = StatefulMechanism._runtime_fields | {"cum_distr", "index_by_value"}
+
     values: List[str]
     mode: RandomizedResponseMode = RandomizedResponseMode.custom
     # RandomizedResponseMode.{custom, coin}:
@@ -61,7 +87,10 @@ class RandomizedResponse(StatefulMechanism):
     epsilon: Optional[float] = None  # Only used for RandomizedResponseMode.dp
     coin_p: Optional[float] = None  # Only used for RandomizedResponseMode.coin
     default_value: Optional[str] = None
+    ignore_case: bool = False
+    normalize_whitespace: bool = False
     cum_distr: Any = Field(default=None, const=True)
+    index_by_value: Any = Field(default=None, const=True)
 
     @validator("probability_distribution", always=True)
     def distribution_size_matches(cls, v, values, **kwargs):
@@ -104,19 +133,32 @@ class RandomizedResponse(StatefulMechanism):
         if mode == RandomizedResponseMode.coin:
             if v is None:
                 raise ValueError("Coin mode requires coin_p value")
+            if not 0 <= v <= 1:
+                raise ValueError("coin_p must be between 0 and 1")
             return v
         else:
             return None
 
+    @validator("normalize_whitespace", always=True)
+    def values_distinguishable(cls, v, values, **kwargs):
+        if "values" in values and (v or values.get("ignore_case")):
+            value_by_key = {}
+            for value in values["values"]:
+                other = value_by_key.setdefault(_normalize(value, values.get("ignore_case"), v), value)
+                if other != value:
+                    raise ValueError(f"The values {other!r} and {value!r} cannot be distinguished after normalization")
+        return v
+
     class Config:
-        # Make sure conditional requirements are adequately reflected.
-        schema_extra = {
-            "anyOf": [
+        @staticmethod
+        def schema_extra(schema, model):
+            StatefulMechanism.Config.schema_extra(schema, model)
+            # Make sure conditional requirements are adequately reflected.
+            schema["anyOf"] = [
                 {"properties": {"mode": {"const": "custom"}}, "required": ["probabilityDistribution"]},
                 {"properties": {"mode": {"const": "dp"}}, "required": ["epsilon"]},
                 {"properties": {"mode": {"const": "coin"}}, "required": ["coinP"]},
             ]
-        }
 
     def __init__(self, **kwargs):
         """
@@ -140,6 +182,11 @@ class RandomizedResponse(StatefulMechanism):
         # `distribution` cannot be None at this point if the model was validated.
         self.cum_distr = distribution.to_cumulative()
 
+        # Map each (normalized) value to the index of its first occurrence.
+        self.index_by_value = {}
+        for idx, value in enumerate(self.values):
+            self.index_by_value.setdefault(self.__key(value), idx)
+
     @classmethod
     def __with_dp(cls, t, epsilon):
         """
@@ -148,7 +195,16 @@ class RandomizedResponse(StatefulMechanism):
         Let `t = len(values)`.
         This results in a probability of `e^epsilon / (t - 1 + e^epsilon)` for revealing the true value,
         and a probability of `1 / (t - 1 + e^epsilon)` for each other value.
+
+        For a non-negative epsilon, this is a randomized response toss over the uniform distribution,
+        which reports the true value with a probability of `(e^epsilon - 1) / (t - 1 + e^epsilon)`.
+        It is represented without building the `t x t` matrix.
         """
+        if epsilon >= 0:
+            # Divided by e^epsilon, so that large epsilons do not overflow.
+            p = -math.expm1(-epsilon) / ((t - 1) * math.exp(-epsilon) + 1)
+            return DiscreteDistribution.uniform_distribution(t).with_rr_toss(p)
+
         e_eps = math.exp(epsilon)
         denominator = t - 1 + e_eps
         p_ii = e_eps / denominator
@@ -184,19 +240,83 @@ class RandomizedResponse(StatefulMechanism):
         d_rr = d.with_rr_toss(coin_p)
         return d_rr
 
+    def __key(self, value):
+        """
+        Returns the key of a value in `index_by_value`.
+        """
+        if self.ignore_case or self.normalize_whitespace:
+            return _normalize(value, self.ignore_case, self.normalize_whitespace)
+        return value
+
+    def value_indices(self, input_values):
+        """
+        Resolves a list of input values to an array of their indices in `values` in a single pass.
+        Unknown input values are resolved to -1.
+
+        >>> mechanism = RandomizedResponse(values=['Yes', 'No'], probability_distribution=[1, 0], normalize_whitespace=True)
+        >>> mechanism.value_indices(['No', ' Yes ', 'Maybe']).tolist()
+        [1, 0, -1]
+        """
+        get = self.index_by_value.get
+        if self.ignore_case or self.normalize_whitespace:
+            keys = (self.__key(input_value) for input_value in input_values)
+        else:
+            keys = input_values
+        return np.fromiter((get(key, -1) for key in keys), dtype=np.intp, count=len(input_values))
+
     def apply(self, input_value):
         """
         Anonymizes the given input parameter.
         If the input_value is unknown to the distribution and no `default_value` is set, it raises a ValueError.
         """
-        try:
-            input_idx = self.values.index(input_value)
-        except ValueError as e:
+        input_idx = self.index_by_value.get(self.__key(input_value))
+        if input_idx is None:
             if self.default_value is not None:
                 return self.default_value
-            raise e
-        output_idx = self.cum_distr.sample_element(input_idx)
-        return self.values[output_idx]
+            raise ValueError(f"{input_value!r} is not in values")
+        return self.values[self.__sample(input_idx, input_value)]
+
+    def __sample(self, input_idx, input_value):
+        if self.deterministic_key is not None:
+            return self.cum_distr.sample_element(input_idx, rng=self._keyed_random(input_value))
+        return self.cum_distr.sample_element(input_idx, rng=self.rng)
+
+    def _state_reference(self, output):
+        """
+        Outputs are stored by their index in `values`, the `default_value` by `len(values)`.
+        """
+        idx = self.index_by_value.get(self.__key(output))
+        # The `default_value` may match a value after normalization.
+        if idx is None or self.values[idx] != output:
+            return len(self.values)
+        return idx
+
+    def _state_output(self, reference):
+        return self.values[reference] if reference < len(self.values) else self.default_value
+
+    def apply_many(self, input_values):
+        """
+        Anonymizes the given list of input values, which are resolved to their indices using `value_indices`.
+        Unless a `deterministic_key` is set, the outputs of all input values are sampled at once.
+        If an input_value is unknown to the distribution and no `default_value` is set, it raises a ValueError.
+        """
+        input_idxs = self.value_indices(input_values)
+        known = input_idxs >= 0
+        if not known.all() and self.default_value is None:
+            raise ValueError(f"{input_values[int(np.argmin(known))]!r} is not in values")
+
+        if self.deterministic_key is not None:
+            output_idxs = [
+                self.__sample(input_idx, input_value) if input_idx >= 0 else -1
+                for input_value, input_idx in zip(input_values, input_idxs.tolist())
+            ]
+        else:
+            output_idxs = np.full(len(input_values), -1, dtype=np.intp)
+            output_idxs[known] = self.cum_distr.sample_elements(input_idxs[known], rng=self.rng)
+            output_idxs = output_idxs.tolist()
+
+        values = self.values
+        return [self.default_value if output_idx < 0 else values[output_idx] for output_idx in output_idxs]
 
 
 class RandomizedResponseParameters(CamelBaseModel):
@@ -1,8 +1,21 @@
 import abc
-from typing import Dict
+from typing import Any, Dict, Optional
 
-from pydantic import Field
+from pydantic import Field, PositiveInt, PositiveFloat, SecretStr, validator
 
+from anonymizer.state import (
+    StateBackend,
+    BoundedCache,
+    CompactBackend,
+    DenseIdBackend,
+    EvictionPolicy,
+    InMemoryBackend,
+    OverlayBackend,
+    LockedBackend,
+)
+from anonymizer.utils.instrumentation import MechanismStats, timed
+from anonymizer.utils.keyed_random import keyed_random, keyed_uniform
+from anonymizer.utils.randomness import RandomSource, create_rng
 from anonymizer.utils.pydantic_base_model import CamelBaseModel
 
 
@@ -16,15 +29,309 @@ class StatefulMechanism(CamelBaseModel, abc.ABC):
     >>> from anonymizer.mechanisms.suppression import Suppression
     >>> mechanism = Suppression(custom_length=lambda _: randint(1, 9), stateful=True)
     >>> assert mechanism.anonymize('foobar') == mechanism.anonymize('foobar')
+
+    By default, the stored anonymizations grow without bounds.
+    The optional parameters `max_state_entries` and `max_state_bytes` bound the number of stored anonymizations
+    and their approximate size in bytes. Once a bound is exceeded, anonymizations are evicted according to
+    `state_eviction`, which is either `lru` (default) or `clock`.
+    The optional parameter `state_ttl` lets anonymizations expire after the given number of seconds.
+    Evicted or expired inputs may be anonymized differently when they reoccur.
+    The bounds apply separately to the anonymizations by text and by entity id (see `anonymize_many`).
+
+    >>> mechanism = Suppression(custom_length=lambda _: randint(1, 9), stateful=True, max_state_entries=1000)
+    >>> assert mechanism.anonymize('foobar') == mechanism.anonymize('foobar')
+
+    Alternatively, the anonymizations can be kept in any other `StateBackend` passed as `state_backend`,
+    e.g., an `anonymizer.state.SqliteBackend` to persist them across restarts.
+    For very large mappings, `compact_state` keeps them in an `anonymizer.state.CompactBackend`,
+    which only stores a hash of each input and a compact reference to its output (e.g., the pseudonym counter).
+
+    Mechanisms are not thread-safe by default. If `thread_safe` is set, the same input is guaranteed to be
+    anonymized equally even if it is passed to the mechanism from several threads at the same time.
+    The anonymizations are guarded by striped locks (see `anonymizer.state.LockedBackend`),
+    so threads anonymizing different inputs rarely wait for each other.
+
+    Randomized mechanisms that support it can be made deterministic without any state by setting `deterministic_key`.
+    They then derive all randomness for an input from a keyed hash (BLAKE2b) of the input and the secret key.
+    Hence, the same input is anonymized equally in every process that uses the same key, without sharing any state.
+    The key is included in the JSON of the mechanism (see `json`), so that a serialized mechanism can be restored.
+
+    >>> from anonymizer.mechanisms.laplace_noise import LaplaceNoise
+    >>> def create_mechanism():
+    ...     return LaplaceNoise(epsilon=0.1, deterministic_key='secret')
+    >>> assert create_mechanism().anonymize(1.5) == create_mechanism().anonymize(1.5)
+
+    Otherwise, randomized mechanisms draw their randomness from the `random_source` (see `RandomSource`),
+    which is available as `rng`. By default, a CSPRNG reads the operating system's entropy source in large blocks
+    (laplace noise uses numpy's global generator by default).
+    `system` reads it on every draw, while `pcg64` and `philox` are fast generators,
+    which can be seeded with `random_seed` for reproducible runs.
+
+    >>> def create_mechanism():
+    ...     return LaplaceNoise(epsilon=0.1, random_source='pcg64', random_seed=42)
+    >>> assert create_mechanism().anonymize(1.5) == create_mechanism().anonymize(1.5)
+
+    If `instrumented` is set, the mechanism counts the values it anonymizes, the hits and misses of its state
+    and the failures of its encoder, and records the time spent in `apply`, `encode` and `decode` (see `stats`).
+    Without it, the instrumentation costs nothing but a single check per call.
     """
 
+    # Whether the mechanism derives its randomness from `deterministic_key`.
+    _supports_deterministic_key = False
+    # Whether the mechanism draws its randomness from `rng`.
+    _supports_random_source = False
+    # The source of `rng` if no `random_source` is set. If None, `rng` is only created for a given `random_source`.
+    _default_random_source = RandomSource.buffered
+    # The fields holding the state of the mechanism at runtime, which are not part of its configuration.
+    _runtime_fields = frozenset({"anonymizations", "anonymizations_by_id", "instrumentation", "rng"})
+
     stateful: bool = False
-    anonymizations: Dict[str, str] = Field(default_factory=dict, const=True)
+    thread_safe: bool = False
+    max_state_entries: Optional[PositiveInt] = None
+    max_state_bytes: Optional[PositiveInt] = None
+    state_eviction: EvictionPolicy = EvictionPolicy.lru
+    state_ttl: Optional[PositiveFloat] = None
+    state_backend: Optional[StateBackend] = None
+    compact_state: bool = False
+    deterministic_key: Optional[SecretStr] = None
+    random_source: Optional[RandomSource] = None
+    random_seed: Optional[int] = None
+    instrumented: bool = False
+    anonymizations: Dict[str, str] = Field(default_factory=InMemoryBackend, const=True)
+    anonymizations_by_id: Dict[str, str] = Field(default_factory=DenseIdBackend, const=True)
+    instrumentation: Any = Field(default=None, const=True)
+    rng: Any = Field(default=None, const=True)
+
+    class Config:
+        @staticmethod
+        def schema_extra(schema, model):
+            # The state of the mechanism is not part of its configuration.
+            for name in model._runtime_fields:
+                schema["properties"].pop(model.__fields__[name].alias, None)
+
+    @validator("state_backend")
+    def state_backend_not_bounded(cls, v, values, **kwargs):
+        if v is not None and any(
+            values.get(bound) is not None for bound in ("max_state_entries", "max_state_bytes", "state_ttl")
+        ):
+            raise ValueError("Bounds of the state cannot be combined with a custom state backend")
+        return v
+
+    @validator("compact_state")
+    def compact_state_not_bounded(cls, v, values, **kwargs):
+        if v and any(
+            values.get(option) is not None for option in ("max_state_entries", "max_state_bytes", "state_ttl", "state_backend")
+        ):
+            raise ValueError("A compact state cannot be combined with bounds or a custom state backend")
+        return v
+
+    @validator("deterministic_key")
+    def deterministic_key_supported(cls, v, **kwargs):
+        if v is not None and not cls._supports_deterministic_key:
+            raise ValueError(f"{cls.__name__} does not support a deterministic key")
+        if v is not None and v.get_secret_value() == str(v):
+            raise ValueError("The deterministic key is the placeholder of a hidden secret, not the secret itself")
+        return v
+
+    @validator("random_source")
+    def random_source_supported(cls, v, **kwargs):
+        if v is not None and not cls._supports_random_source:
+            raise ValueError(f"{cls.__name__} does not support a random source")
+        return v
+
+    @validator("random_seed")
+    def random_source_seedable(cls, v, values, **kwargs):
+        if v is not None and values.get("random_source") not in (RandomSource.pcg64, RandomSource.philox):
+            raise ValueError("A random seed requires the random source pcg64 or philox")
+        return v
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+
+        random_source = self.random_source or self._default_random_source
+        if self._supports_random_source and random_source is not None:
+            self.rng = create_rng(random_source, self.random_seed)
+
+        for name in self._state_stores():
+            store = self._create_store(name)
+            setattr(self, name, LockedBackend(store) if self.thread_safe else store)
+
+        if self.instrumented:
+            self.instrumentation = MechanismStats()
+
+    def dict(self, *, exclude=None, **kwargs):
+        """
+        Returns the configuration of the mechanism as a dict. Its state (e.g., `anonymizations`) is never included.
+        """
+        return super().dict(exclude=self.__exclude_runtime_fields(exclude), **kwargs)
+
+    def json(self, *, exclude=None, **kwargs):
+        """
+        Returns the configuration of the mechanism as JSON. Its state (e.g., `anonymizations`) is never included.
+
+        >>> from anonymizer.mechanisms.pseudonymization import Pseudonymization
+        >>> Pseudonymization(format_string='Person {}', stateful=True).json(by_alias=True, exclude_defaults=True)
+        '{"stateful": true, "formatString": "Person {}"}'
+        """
+        return super().json(exclude=self.__exclude_runtime_fields(exclude), **kwargs)
+
+    def __exclude_runtime_fields(self, exclude):
+        if exclude is None:
+            return set(self._runtime_fields)
+        if isinstance(exclude, dict):
+            return {**exclude, **{name: ... for name in self._runtime_fields}}
+        return set(exclude) | self._runtime_fields
 
     @abc.abstractmethod
     def apply(self, input_value):
         """The actual anonymization method of any child class."""
 
+    def _state_reference(self, output):
+        """
+        Maps an output of `apply` to an integer reference, which compact state backends store instead of the output.
+        Child classes whose outputs have such a compact representation override this together with `_state_output`.
+        """
+        raise NotImplementedError
+
+    def _state_output(self, reference):
+        """Maps a reference returned by `_state_reference` back to the output."""
+        raise NotImplementedError
+
+    def _create_store(self, name):
+        """
+        Creates the backend for the store `name` of `_state_stores` as configured,
+        e.g., a `BoundedCache` if the state is bounded. A given `state_backend` is used as is for `anonymizations`,
+        while the anonymizations by entity id are kept in a sibling of it (see `StateBackend.create_sibling`).
+        """
+        by_id = name == "anonymizations_by_id"
+        if self.state_backend is not None:
+            store = self.state_backend.create_sibling("by_id") if by_id else self.state_backend
+        elif self.max_state_entries is not None or self.max_state_bytes is not None or self.state_ttl is not None:
+            store = BoundedCache(
+                max_entries=self.max_state_entries,
+                max_bytes=self.max_state_bytes,
+                eviction=self.state_eviction,
+                ttl=self.state_ttl,
+            )
+        elif by_id:
+            # Dense ids are stored compactly anyway.
+            store = DenseIdBackend()
+        elif self.compact_state:
+            store = CompactBackend()
+        else:
+            store = InMemoryBackend()
+
+        if isinstance(store, (CompactBackend, DenseIdBackend)) and store.codec is None:
+            store.codec = self._state_codec()
+        return store
+
+    def _state_codec(self):
+        """
+        Returns the pair `(self._state_reference, self._state_output)` if the mechanism provides references,
+        otherwise None.
+        """
+        if type(self)._state_reference is StatefulMechanism._state_reference:
+            return None
+        return self._state_reference, self._state_output
+
+    @property
+    def pure(self):
+        """
+        Whether `apply` is a pure function of its input, i.e., it neither depends on randomness nor on any state.
+        Child classes override this if they can guarantee it.
+        """
+        return False
+
+    @property
+    def deterministic(self):
+        """
+        Whether repeated occurrences of the same input are guaranteed to be anonymized equally,
+        which holds for stateful and pure mechanisms as well as mechanisms with a `deterministic_key`.
+        """
+        return self.stateful or self.pure or self.deterministic_key is not None
+
+    def _keyed_random(self, input_value):
+        """
+        Returns a random number generator seeded from the keyed hash of the input value.
+        Must only be called if `deterministic_key` is set.
+        """
+        return keyed_random(self.deterministic_key.get_secret_value(), input_value)
+
+    def _keyed_uniform(self, input_value):
+        """
+        Returns a float from the open interval (0, 1) derived from the keyed hash of the input value.
+        Must only be called if `deterministic_key` is set.
+        """
+        return keyed_uniform(self.deterministic_key.get_secret_value(), input_value)
+
+    def instrument(self):
+        """
+        Enables the instrumentation of the mechanism, if not already enabled.
+        Callables returned by `compile` before are not instrumented.
+        """
+        self.instrumented = True
+        if self.instrumentation is None:
+            self.instrumentation = MechanismStats()
+
+    def stats(self):
+        """
+        Returns a snapshot of the instrumentation as a dict, or None if the mechanism is not instrumented.
+        Latencies are given in nanoseconds (see `anonymizer.utils.instrumentation.LatencyHistogram`).
+
+        >>> from anonymizer.mechanisms.pseudonymization import Pseudonymization
+        >>> mechanism = Pseudonymization(format_string='Person {}', stateful=True, instrumented=True)
+        >>> mechanism.anonymize_many(['Alice', 'Bob', 'Alice'])
+        ['Person 1', 'Person 2', 'Person 1']
+        >>> stats = mechanism.stats()
+        >>> stats['calls'], stats['hits'], stats['misses'], stats['apply']['count']
+        (3, 1, 2, 1)
+        """
+        if self.instrumentation is None:
+            return None
+        return self.instrumentation.snapshot()
+
+    def compile(self):
+        """
+        Returns a callable that anonymizes a single input value just like `anonymize`,
+        but with the check whether the mechanism is stateful resolved upfront.
+        Changes to the `stateful` flag after compilation are not reflected by the callable.
+        Pure mechanisms without state are compiled using `_compile_pure`, which may memoize outputs.
+        Instrumented mechanisms return `anonymize` itself.
+
+        >>> from anonymizer.mechanisms.pseudonymization import Pseudonymization
+        >>> anonymize = Pseudonymization(format_string='Person {}', stateful=True).compile()
+        >>> anonymize('Alice'), anonymize('Bob'), anonymize('Alice')
+        ('Person 1', 'Person 2', 'Person 1')
+        """
+        if self.instrumentation is not None:
+            return self.anonymize
+
+        apply = self.apply
+        if not self.stateful:
+            return self._compile_pure() if self.pure else apply
+
+        get_or_create = self.anonymizations.get_or_create
+
+        def anonymize(input_value):
+            return get_or_create(input_value, apply)
+
+        return anonymize
+
+    def _compile_pure(self):
+        """
+        Returns a callable equivalent to `apply`, which `compile` uses if the mechanism is pure and not stateful.
+        Since the outputs only depend on the input, child classes may override this to share outputs between inputs
+        instead of creating them on every call.
+        """
+        return self.apply
+
+    def apply_many(self, input_values):
+        """
+        Applies the actual anonymization to a list of input values.
+        Child classes should override this with a batched implementation where possible.
+        """
+        return [self.apply(input_value) for input_value in input_values]
+
     def anonymize(self, input_value):
         """
         Anonymizes the given input parameter by checking whether it has already been anonymized before.
@@ -32,9 +339,173 @@ class StatefulMechanism(CamelBaseModel, abc.ABC):
         If there exists an anonymization, this anonymization is used.
         Otherwise, the inner mechanism is called to provide a new, anonymized output.
         """
+        if self.instrumentation is not None:
+            return self.__anonymize_instrumented(input_value)
         if self.stateful:
-            if input_value not in self.anonymizations:
-                self.anonymizations[input_value] = self.apply(input_value)
-            return self.anonymizations[input_value]
+            return self.anonymizations.get_or_create(input_value, self.apply)
         else:
             return self.apply(input_value)
+
+    def __anonymize_instrumented(self, input_value):
+        stats = self.instrumentation
+        stats.calls += 1
+        if not self.stateful:
+            return timed(stats.apply, self.apply, input_value)
+
+        created = False
+
+        def create(value):
+            nonlocal created
+            created = True
+            return timed(stats.apply, self.apply, value)
+
+        anonymized_value = self.anonymizations.get_or_create(input_value, create)
+        if created:
+            stats.misses += 1
+        else:
+            stats.hits += 1
+        return anonymized_value
+
+    def anonymize_many(self, input_values, ids=None):
+        """
+        Anonymizes a list of input values and returns the anonymized values in the same order.
+
+        If activated, previous anonymizations are reused and all distinct input values without an anonymization
+        are passed to `apply_many` in a single call.
+
+        >>> from anonymizer.mechanisms.pseudonymization import Pseudonymization
+        >>> mechanism = Pseudonymization(format_string='Person {}', stateful=True)
+        >>> mechanism.anonymize_many(['Alice', 'Bob', 'Alice'])
+        ['Person 1', 'Person 2', 'Person 1']
+
+        Optionally, `ids` provides an entity id (or None) per input value.
+        Input values with an id are anonymized consistently per id instead of per text,
+        i.e., all input values of an entity are replaced by the anonymization of its first input value.
+        These anonymizations are kept separately in `anonymizations_by_id`, a `DenseIdBackend` by default.
+        It is bounded like `anonymizations`, and kept next to a given `state_backend` (e.g., in another sqlite table).
+
+        >>> mechanism.anonymize_many(['Dr. Smith', 'Smith', 'Smith', 'Bob'], ids=['7', '7', None, None])
+        ['Person 3', 'Person 3', 'Person 4', 'Person 2']
+        """
+        stats = self.instrumentation
+        if stats is None:
+            return self.__anonymize_many(input_values, ids, self.apply_many)
+
+        misses = stats.misses
+        anonymized_values = self.__anonymize_many(input_values, ids, self.__apply_many_instrumented)
+        stats.calls += len(input_values)
+        if self.stateful:
+            stats.hits += len(input_values) - (stats.misses - misses)
+        return anonymized_values
+
+    def __apply_many_instrumented(self, input_values):
+        stats = self.instrumentation
+        if self.stateful:
+            stats.misses += len(input_values)
+        return timed(stats.apply, self.apply_many, input_values)
+
+    def __anonymize_many(self, input_values, ids, apply_many):
+        if not self.stateful:
+            return apply_many(input_values)
+        if ids is None:
+            anonymized = self.anonymizations.get_or_create_many(input_values, apply_many)
+            return [anonymized[input_value] for input_value in input_values]
+
+        value_by_id = {}
+        for input_value, id_ in zip(input_values, ids):
+            if id_ is not None:
+                value_by_id.setdefault(id_, input_value)
+        anonymized_by_id = self.anonymizations_by_id.get_or_create_many(
+            value_by_id, lambda missing: apply_many([value_by_id[id_] for id_ in missing])
+        )
+        anonymized = self.anonymizations.get_or_create_many(
+            [input_value for input_value, id_ in zip(input_values, ids) if id_ is None], apply_many
+        )
+        return [
+            anonymized[input_value] if id_ is None else anonymized_by_id[id_] for input_value, id_ in zip(input_values, ids)
+        ]
+
+    def _state_scalars(self):
+        """
+        Returns the state of the mechanism besides its anonymizations as a JSON-serializable dict,
+        which is saved in snapshots and passed to `_load_state`.
+        """
+        return {}
+
+    def _state_stores(self):
+        """
+        Returns the backends holding the anonymizations of the mechanism by their field name.
+        """
+        return {"anonymizations": self.anonymizations, "anonymizations_by_id": self.anonymizations_by_id}
+
+    def _load_state(self, scalars, stores):
+        """
+        Resumes from a snapshot with the given scalars and stores, which map the names of `_state_stores`
+        to read-only `SnapshotBackend`s. New anonymizations are recorded on top of the snapshot
+        in a backend created by `_create_store`, so they are bounded or persisted as configured.
+        """
+        for name, store in stores.items():
+            store.codec = self._state_codec()
+            store = OverlayBackend(store, layer=self._create_store(name))
+            setattr(self, name, LockedBackend(store) if self.thread_safe else store)
+
+    def _reserve_shard(self, size):
+        """
+        Reserves everything a copy of this mechanism in a worker process needs to anonymize
+        up to `size` values of a shard independently of the other shards.
+        The reservation is passed to `_start_shard` in the worker.
+        """
+        return None
+
+    def _start_shard(self, reservation):
+        """
+        Prepares a copy of this mechanism in a worker process to anonymize a shard.
+        New anonymizations are recorded in a separate layer on top of the existing ones,
+        unless they are kept in a backend shared between processes, which the worker then uses directly.
+        """
+        if self.instrumentation is not None:
+            # Only the instrumentation of the shard is sent back and merged into this mechanism.
+            self.instrumentation = MechanismStats()
+        if not self.anonymizations.shared:
+            self.anonymizations = OverlayBackend(self.anonymizations)
+        if not self.anonymizations_by_id.shared:
+            self.anonymizations_by_id = OverlayBackend(self.anonymizations_by_id)
+
+    def _shard_state(self):
+        """
+        Returns the anonymizations added to a copy of this mechanism in a worker process since `_start_shard`.
+        """
+        return tuple(
+            [] if store.shared else list(store.layer.items()) for store in (self.anonymizations, self.anonymizations_by_id)
+        )
+
+    def _finish_shard(self):
+        """
+        Keeps the anonymizations added to a copy of this mechanism in a worker process since `_start_shard`,
+        so that the worker anonymizes its next shard on top of them.
+        They are kept in memory only (see `_ShardCache`), since the mechanism in the parent process persists them.
+        """
+        for name in ("anonymizations", "anonymizations_by_id"):
+            store = getattr(self, name)
+            if store.shared:
+                continue
+            if isinstance(store.base, _ShardCache):
+                store.base.layer.set_many(store.layer.items())
+                setattr(self, name, store.base)
+            else:
+                setattr(self, name, _ShardCache(store.base, layer=store.layer))
+
+    def _merge_shard_state(self, state):
+        """
+        Merges the state returned by `_shard_state` in a worker process into this mechanism.
+        """
+        anonymizations, anonymizations_by_id = state
+        self.anonymizations.set_many(anonymizations)
+        self.anonymizations_by_id.set_many(anonymizations_by_id)
+
+
+class _ShardCache(OverlayBackend):
+    """
+    The anonymizations a worker process created for its previous shards, on top of those it started with.
+    Unlike the store below it (e.g., an `anonymizer.state.SqliteBackend`), it is never written to by the worker.
+    """
@@ -5,6 +5,9 @@ from pydantic.types import constr
 from .stateful_mechanism import StatefulMechanism
 from ..utils.pydantic_base_model import CamelBaseModel
 
+# Compiled suppressions memoize their outputs for inputs up to this length.
+_MAX_MEMOIZED_LENGTH = 1024
+
 
 class Suppression(StatefulMechanism):
     """
@@ -31,18 +34,34 @@ class Suppression(StatefulMechanism):
     >>> mechanism = Suppression(custom_length=lambda x: x + 1)
     >>> mechanism.anonymize('foobar')
     'XXXXXXX'
+
+    If a `deterministic_key` is set, the function is passed a random number generator
+    derived from the input as a second parameter, which it must use as its only source of randomness.
+
+    >>> mechanism = Suppression(custom_length=lambda x, rng: rng.randint(1, x), deterministic_key='secret')
+    >>> assert mechanism.anonymize('foobar') == mechanism.anonymize('foobar')
     """
 
+    _supports_deterministic_key = True
+
     suppression_char: str = "X"
     custom_length: Union[int, Callable[[int], int], None] = None
 
     class Config:
         @staticmethod
-        def schema_extra(schema):
+        def schema_extra(schema, model):
+            StatefulMechanism.Config.schema_extra(schema, model)
             # manually add the customLength property which is ignored by pydantic because it accepts callables
             schema["properties"]["customLength"] = {"title": "CustomLength", "type": "integer"}
 
-    def __length(self, input_len):
+    @property
+    def pure(self):
+        """
+        Suppression is pure unless the output length is determined by a (potentially random) function.
+        """
+        return not callable(self.custom_length)
+
+    def __length(self, input_len, input_value=None):
         """
         Determines the length of the suppressed output based on a potentially defined custom length
         and the input length.
@@ -50,6 +69,8 @@ class Suppression(StatefulMechanism):
         if isinstance(self.custom_length, int) and self.custom_length >= 0:
             return self.custom_length
         elif callable(self.custom_length):
+            if self.deterministic_key is not None:
+                return self.custom_length(input_len, self._keyed_random(input_value))
             return self.custom_length(input_len)
         else:
             return input_len
@@ -58,9 +79,63 @@ class Suppression(StatefulMechanism):
         """
         Anonymizes the given input parameter by suppressing it.
         """
-        output_len = self.__length(len(input_value))
+        output_len = self.__length(len(input_value), input_value)
         return self.suppression_char * output_len
 
+    def _compile_pure(self):
+        """
+        Returns a callable that suppresses inputs without allocating a new output on every call:
+        for a fixed `custom_length`, all inputs share the same output, otherwise outputs are memoized by length.
+
+        >>> suppress = Suppression().compile()
+        >>> suppress('Alice'), suppress('Alice') is suppress('Bobby')
+        ('XXXXX', True)
+        """
+        if isinstance(self.custom_length, int) and self.custom_length >= 0:
+            suppression = self.suppression_char * self.custom_length
+
+            def suppress_constant(_):
+                return suppression
+
+            return suppress_constant
+
+        suppression_char = self.suppression_char
+        suppressions = {}
+
+        def suppress(input_value):
+            input_len = len(input_value)
+            suppression = suppressions.get(input_len)
+            if suppression is None:
+                suppression = suppression_char * input_len
+                if input_len <= _MAX_MEMOIZED_LENGTH:
+                    suppressions[input_len] = suppression
+            return suppression
+
+        return suppress
+
+    def _state_reference(self, output):
+        """
+        Suppressions are stored by their length.
+        """
+        return len(output) // (len(self.suppression_char) or 1)
+
+    def _state_output(self, reference):
+        return self.suppression_char * reference
+
+    def apply_many(self, input_values):
+        """
+        Anonymizes the given list of input values by suppressing them.
+        Unless the output length is randomized, each distinct input length is only suppressed once.
+        """
+        if callable(self.custom_length):
+            return [self.apply(input_value) for input_value in input_values]
+
+        suppressions = {}
+        for input_len in map(len, input_values):
+            if input_len not in suppressions:
+                suppressions[input_len] = self.suppression_char * self.__length(input_len)
+        return [suppressions[len(input_value)] for input_value in input_values]
+
 
 class SuppressionParameters(CamelBaseModel):
     mechanism: constr(regex="^suppression$") = "suppression"
@@ -0,0 +1,10 @@
+from ._base import StateBackend  # noqa: F401
+from .bounded import BoundedCache, EvictionPolicy  # noqa: F401
+from .compact import CompactBackend  # noqa: F401
+from .dense import DenseIdBackend  # noqa: F401
+from .locked import LockedBackend  # noqa: F401
+from .memory import InMemoryBackend  # noqa: F401
+from .overlay import OverlayBackend  # noqa: F401
+from .remote import RemoteBackend  # noqa: F401
+from .snapshot import SnapshotBackend, read_snapshot, write_snapshot  # noqa: F401
+from .sqlite import SqliteBackend  # noqa: F401
@@ -0,0 +1,114 @@
+import abc
+from collections.abc import MutableMapping
+
+from ._hashing import hash_keys, sort_hashes
+
+
+class StateBackend(MutableMapping, abc.ABC):
+    """
+    A state backend stores the anonymizations of a stateful mechanism, i.e., maps input values to their anonymization.
+
+    Any backend is a mutable mapping. In addition, backends can provide batched lookups and writes
+    via `get_many` and `set_many`, which stateful mechanisms use to anonymize batches of values.
+    Stateful mechanisms access their backend via `get_or_create` and `get_or_create_many`,
+    which backends can override to make the check-then-set atomic.
+    Backends that buffer writes persist them on `flush` and release their resources on `close`.
+    """
+
+    # The number of bits of the key hashes returned by `export_hashed`.
+    key_bits = 128
+    # Whether the backend is shared with other processes, which then anonymize consistently by themselves.
+    shared = False
+    # Whether the backend provides a counter that outlives the mechanism (see `reserve`),
+    # e.g., because it is shared with other processes or persisted.
+    has_counter = False
+
+    def get_or_create(self, key, create):
+        """
+        Returns the value of `key`. If there is none, it is created by calling `create(key)` and stored.
+        """
+        try:
+            return self[key]
+        except KeyError:
+            value = self[key] = create(key)
+            return value
+
+    def get_or_create_many(self, keys, create_many):
+        """
+        Returns a dict with the values of all distinct `keys`.
+        All missing values are created by a single call to `create_many(missing_keys)`, which returns a list, and stored.
+        The returned dict contains all values, even if the backend evicts some of them immediately.
+        """
+        keys = list(dict.fromkeys(keys))
+        found = self.get_many(keys)
+        missing = [key for key in keys if key not in found]
+        if missing:
+            created = list(zip(missing, create_many(missing)))
+            found.update(created)
+            self.set_many(created)
+        return found
+
+    def get_many(self, keys):
+        """
+        Looks up several keys at once and returns a dict containing all keys that were found.
+        """
+        found = {}
+        for key in keys:
+            try:
+                found[key] = self[key]
+            except KeyError:
+                pass
+        return found
+
+    def set_many(self, items):
+        """
+        Stores several `(key, value)` pairs at once.
+        """
+        for key, value in items:
+            self[key] = value
+
+    def export_hashed(self):
+        """
+        Returns the `key_bits`-bit hashes of all keys as an array sorted lexicographically by row,
+        and a list of the corresponding values. Snapshots store the anonymizations in this form.
+        """
+        keys = list(self)
+        found = self.get_many(keys)
+        keys = [key for key in keys if key in found]
+        return sort_hashes(hash_keys(keys, self.key_bits), [found[key] for key in keys])
+
+    def create_sibling(self, name):
+        """
+        Creates an empty backend of the same kind, which keeps a separate mapping called `name` next to this one,
+        e.g., in another table of the same database. Stateful mechanisms keep their anonymizations by entity id in it.
+        """
+        raise TypeError(f"{type(self).__name__} cannot keep a separate mapping next to its own")
+
+    def flush(self):
+        """Persists all buffered writes."""
+
+    def close(self):
+        """Flushes and releases all resources of the backend."""
+        self.flush()
+
+    @classmethod
+    def __get_validators__(cls):
+        # one or more validators may be yielded which will be called in the
+        # order to validate the input, each validator will receive as an input
+        # the value returned from the previous validator
+        yield cls.validate
+
+    @classmethod
+    def __modify_schema__(cls, field_schema):
+        # __modify_schema__ should mutate the dict it receives in place,
+        # the returned value will be ignored
+        field_schema.update(
+            title="StateBackend",
+            type="object",
+        )
+
+    @classmethod
+    def validate(cls, v):
+        if not isinstance(v, StateBackend):
+            raise TypeError("StateBackend required")
+        return v
@@ -0,0 +1,48 @@
+import hashlib
+
+import numpy as np
+
+
+def digest(key, key_bits):
+    """
+    Returns the `key_bits`-bit BLAKE2b digest of a key.
+    Strings are hashed by their UTF-8 encoding, other keys by their prefixed representation.
+    """
+    data = key.encode() if isinstance(key, str) else b"\0" + repr(key).encode()
+    return hashlib.blake2b(data, digest_size=key_bits // 8).digest()
+
+
+def hash_words(key, key_bits):
+    """
+    Returns the hash of a single key as a list of 64-bit words. The first word is never 0.
+    """
+    key_digest = digest(key, key_bits)
+    words = [int.from_bytes(key_digest[i : i + 8], "little") for i in range(0, len(key_digest), 8)]
+    words[0] = words[0] or 1
+    return words
+
+
+def hash_keys(keys, key_bits):
+    """
+    Returns the hashes of all keys as an array of shape `(len(keys), key_bits // 64)`,
+    with the same words as `hash_words`.
+    """
+    digests = b"".join(digest(key, key_bits) for key in keys)
+    hashes = np.frombuffer(digests, dtype="<u8").reshape(len(keys), key_bits // 64).astype(np.uint64)
+    hashes[hashes[:, 0] == 0, 0] = 1
+    return hashes
+
+
+def sort_hashes(hashes, values):
+    """
+    Sorts hashes and their values lexicographically by the hash words.
+    Of several equal hashes, only the first one is kept.
+    """
+    if not len(hashes):
+        return hashes, []
+    # A stable sort keeps the first of several equal hashes in front.
+    order = np.lexsort(hashes.T[::-1])
+    hashes = hashes[order]
+    first = np.ones(len(hashes), dtype=bool)
+    first[1:] = (hashes[1:] != hashes[:-1]).any(axis=1)
+    return hashes[first], [values[i] for i in order[first].tolist()]
@@ -0,0 +1,130 @@
+import sys
+import time
+from collections import OrderedDict
+from enum import Enum
+
+from ._base import StateBackend
+
+# Rough per-entry overhead of the cache's bookkeeping in bytes, added to the sizes of key and value.
+_ENTRY_OVERHEAD = 120
+
+
+class EvictionPolicy(str, Enum):
+    """
+    The policy that determines which entry a `BoundedCache` evicts once it is full.
+    """
+
+    lru = "lru"  # Evicts the least recently used entry.
+    clock = "clock"  # Evicts the oldest entry that was not accessed since the clock hand last passed it.
+
+
+class BoundedCache(StateBackend):
+    """
+    A mapping that is bounded by a maximum number of entries and/or an approximate size in bytes.
+    Once a bound is exceeded, entries are evicted according to the `EvictionPolicy`.
+
+    CLOCK approximates LRU, but reads only set a reference bit instead of reordering the entries.
+
+    >>> cache = BoundedCache(max_entries=2)
+    >>> cache['a'], cache['b'] = 1, 2
+    >>> cache['a']
+    1
+    >>> cache['c'] = 3
+    >>> sorted(cache)
+    ['a', 'c']
+
+    Optionally, entries expire `ttl` seconds after they have been set.
+    Expired entries are never returned and are dropped lazily.
+    """
+
+    def __init__(self, max_entries=None, max_bytes=None, eviction=EvictionPolicy.lru, ttl=None, clock=time.monotonic):
+        if max_entries is not None and max_entries < 1:
+            raise ValueError("max_entries must be positive")
+        if max_bytes is not None and max_bytes < 1:
+            raise ValueError("max_bytes must be positive")
+        if ttl is not None and ttl <= 0:
+            raise ValueError("ttl must be positive")
+
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.eviction = EvictionPolicy(eviction)
+        self.ttl = ttl
+        self.size_bytes = 0
+        self._clock = clock
+        # Maps each key to a list of [value, expiry time, referenced bit, size in bytes].
+        self._entries = OrderedDict()
+
+    def _lookup(self, key):
+        entry = self._entries[key]
+        if self.ttl is not None and entry[1] <= self._clock():
+            self._remove(key)
+            raise KeyError(key)
+        return entry
+
+    def _remove(self, key):
+        self.size_bytes -= self._entries.pop(key)[3]
+
+    def __getitem__(self, key):
+        entry = self._lookup(key)
+        if self.eviction == EvictionPolicy.lru:
+            self._entries.move_to_end(key)
+        else:
+            entry[2] = True
+        return entry[0]
+
+    def __contains__(self, key):
+        # Checking for membership neither counts as access nor affects the eviction order.
+        try:
+            self._lookup(key)
+        except KeyError:
+            return False
+        return True
+
+    def __setitem__(self, key, value):
+        if key in self._entries:
+            self._remove(key)
+
+        size = sys.getsizeof(key) + sys.getsizeof(value) + _ENTRY_OVERHEAD
+        expiry = None if self.ttl is None else self._clock() + self.ttl
+        self._entries[key] = [value, expiry, False, size]
+        self.size_bytes += size
+        self._evict()
+
+    def __delitem__(self, key):
+        self._remove(key)
+
+    def __iter__(self):
+        now = self._clock()
+        return iter([key for key, entry in self._entries.items() if self.ttl is None or entry[1] > now])
+
+    def __len__(self):
+        """
+        Returns the number of entries, including expired ones that have not been dropped yet.
+        """
+        return len(self._entries)
+
+    def _is_full(self):
+        return (self.max_entries is not None and len(self._entries) > self.max_entries) or (
+            self.max_bytes is not None and self.size_bytes > self.max_bytes
+        )
+
+    def _evict(self):
+        """
+        Drops expired entries from the front of the cache and evicts entries until all bounds are met again.
+        """
+        if self.ttl is not None:
+            now = self._clock()
+            while self._entries:
+                key, entry = next(iter(self._entries.items()))
+                if entry[1] > now:
+                    break
+                self._remove(key)
+
+        while self._is_full():
+            key, entry = next(iter(self._entries.items()))
+            if self.eviction == EvictionPolicy.clock and entry[2]:
+                # Give referenced entries a second chance and advance the clock hand.
+                entry[2] = False
+                self._entries.move_to_end(key)
+            else:
+                self._remove(key)
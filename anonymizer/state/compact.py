@@ -0,0 +1,216 @@
+import numpy as np
+
+from ._base import StateBackend
+from ._hashing import hash_keys, hash_words, sort_hashes
+
+
+class CompactBackend(StateBackend):
+    """
+    A memory-efficient state backend for very large mappings.
+
+    Instead of the input values, it only stores a `key_bits`-bit hash (BLAKE2b) of each input value
+    in a numpy-backed open-addressing table with linear probing.
+    Instead of the output values, it stores a 64-bit reference per entry, from which the output is regenerated.
+    The references are defined by the `codec`, a pair of functions `(encode, decode)` between outputs and integers,
+    which stateful mechanisms with a compact representation of their outputs provide via `_state_codec`.
+    Without a codec, the outputs are kept in a list and referenced by their position.
+
+    Two input values with the same hash share one anonymization.
+    With 128-bit hashes this is practically impossible, with 64-bit hashes it becomes likely at billions of entries.
+    As the input values themselves are not stored, the backend cannot be iterated.
+
+    >>> backend = CompactBackend(codec=(lambda output: int(output[7:]), lambda ref: f'Person {ref}'))
+    >>> backend['Alice'] = 'Person 1'
+    >>> backend['Alice'], 'Bob' in backend, len(backend)
+    ('Person 1', False, 1)
+    """
+
+    def __init__(self, key_bits=128, capacity=1024, max_load=0.75, codec=None):
+        if key_bits not in (64, 128):
+            raise ValueError("key_bits must be 64 or 128")
+        if not 0 < max_load < 1:
+            raise ValueError("max_load must be between 0 and 1")
+
+        self.key_bits = key_bits
+        self.max_load = max_load
+        self.codec = codec
+        self._values = []
+        self._size = 0
+        self._allocate(1 << max(capacity - 1, 1).bit_length())
+
+    def _allocate(self, capacity):
+        # A slot is empty iff the first word of its hash is 0, which `_hash_many` never produces.
+        self._keys = np.zeros((capacity, self.key_bits // 64), dtype=np.uint64)
+        self._refs = np.zeros(capacity, dtype=np.int64)
+        self._mask = capacity - 1
+
+    @property
+    def capacity(self):
+        return len(self._refs)
+
+    @property
+    def nbytes(self):
+        """The number of bytes occupied by the table, excluding outputs kept without a codec."""
+        return self._keys.nbytes + self._refs.nbytes
+
+    def _encode(self, value):
+        if self.codec is not None:
+            return self.codec[0](value)
+        self._values.append(value)
+        return len(self._values) - 1
+
+    def _decode(self, ref):
+        if self.codec is not None:
+            return self.codec[1](ref)
+        return self._values[ref]
+
+    def _hash(self, key):
+        return hash_words(key, self.key_bits)
+
+    def _hash_many(self, keys):
+        return hash_keys(keys, self.key_bits)
+
+    def _find(self, words):
+        """
+        Looks up a single hash given as a list of words, like `_probe`, but without the overhead of numpy operations.
+        """
+        slot = words[0] & self._mask
+        while True:
+            candidate = self._keys[slot].tolist()
+            if candidate == words:
+                return slot, True
+            if candidate[0] == 0:
+                return slot, False
+            slot = (slot + 1) & self._mask
+
+    def _probe(self, hashes):
+        """
+        Looks up all hashes at once. Returns the slot of each hash and whether it was found there.
+        The slot of a hash that was not found is the empty slot it would be inserted into.
+        """
+        slots = (hashes[:, 0] & np.uint64(self._mask)).astype(np.intp)
+        found = np.zeros(len(hashes), dtype=bool)
+        pending = np.arange(len(hashes))
+        while len(pending):
+            candidates = self._keys[slots[pending]]
+            hit = (candidates == hashes[pending]).all(axis=1)
+            found[pending[hit]] = True
+            pending = pending[~hit & (candidates[:, 0] != 0)]
+            slots[pending] = (slots[pending] + 1) & self._mask
+        return slots, found
+
+    def _insert(self, hashes, refs):
+        """
+        Inserts distinct hashes that are not in the table yet, all at once.
+        Hashes competing for the same free slot are placed in order and the others move on to the next slot.
+        """
+        self._reserve(self._size + len(hashes))
+        slots = (hashes[:, 0] & np.uint64(self._mask)).astype(np.intp)
+        pending = np.arange(len(hashes))
+        while len(pending):
+            free = pending[self._keys[slots[pending], 0] == 0]
+            _, first = np.unique(slots[free], return_index=True)
+            placed = free[first]
+            self._keys[slots[placed]] = hashes[placed]
+            self._refs[slots[placed]] = refs[placed]
+            pending = np.setdiff1d(pending, placed, assume_unique=True)
+            slots[pending] = (slots[pending] + 1) & self._mask
+        self._size += len(hashes)
+
+    def _reserve(self, size):
+        capacity = self.capacity
+        while size > self.max_load * capacity:
+            capacity *= 2
+        if capacity == self.capacity:
+            return
+
+        occupied = self._keys[:, 0] != 0
+        hashes, refs = self._keys[occupied], self._refs[occupied]
+        self._allocate(capacity)
+        self._size = 0
+        self._insert(hashes, refs)
+
+    def __getitem__(self, key):
+        slot, found = self._find(self._hash(key))
+        if not found:
+            raise KeyError(key)
+        return self._decode(int(self._refs[slot]))
+
+    def __contains__(self, key):
+        return self._find(self._hash(key))[1]
+
+    def __setitem__(self, key, value):
+        words = self._hash(key)
+        slot, found = self._find(words)
+        if not found and self._size + 1 > self.max_load * self.capacity:
+            self._reserve(self._size + 1)
+            slot, _ = self._find(words)
+        if not found:
+            self._keys[slot] = words
+            self._size += 1
+        self._refs[slot] = self._encode(value)
+
+    def __delitem__(self, key):
+        slot, found = self._find(self._hash(key))
+        if not found:
+            raise KeyError(key)
+
+        # Backward shift deletion: move later entries of the probe sequence into the gap,
+        # unless their ideal slot lies cyclically between the gap and their current slot.
+        gap = current = slot
+        while True:
+            current = (current + 1) & self._mask
+            first_word = int(self._keys[current, 0])
+            if first_word == 0:
+                break
+            ideal = first_word & self._mask
+            if (current - ideal) & self._mask >= (current - gap) & self._mask:
+                self._keys[gap] = self._keys[current]
+                self._refs[gap] = self._refs[current]
+                gap = current
+        self._keys[gap] = 0
+        self._refs[gap] = 0
+        self._size -= 1
+
+    def export_hashed(self):
+        occupied = self._keys[:, 0] != 0
+        return sort_hashes(self._keys[occupied], [self._decode(ref) for ref in self._refs[occupied].tolist()])
+
+    def __iter__(self):
+        raise TypeError("CompactBackend only stores hashes of its keys, which cannot be iterated")
+
+    def __len__(self):
+        return self._size
+
+    def get_many(self, keys):
+        keys = list(keys)
+        if not keys:
+            return {}
+        slots, found = self._probe(self._hash_many(keys))
+        return {key: self._decode(int(self._refs[slot])) for key, slot, hit in zip(keys, slots, found) if hit}
+
+    def get_or_create_many(self, keys, create_many):
+        keys = list(dict.fromkeys(keys))
+        if not keys:
+            return {}
+        hashes = self._hash_many(keys)
+        slots, found = self._probe(hashes)
+        result = {key: self._decode(int(self._refs[slot])) for key, slot, hit in zip(keys, slots, found) if hit}
+
+        missing = np.flatnonzero(~found)
+        if len(missing):
+            missing_keys = [keys[i] for i in missing]
+            created = create_many(missing_keys)
+            result.update(zip(missing_keys, created))
+            self._insert(hashes[missing], np.array([self._encode(value) for value in created], dtype=np.int64))
+        return result
+
+    def set_many(self, items):
+        items = dict(items)
+        if not items:
+            return
+        hashes = self._hash_many(list(items))
+        refs = np.array([self._encode(value) for value in items.values()], dtype=np.int64)
+        slots, found = self._probe(hashes)
+        self._refs[slots[found]] = refs[found]
+        self._insert(hashes[~found], refs[~found])
@@ -0,0 +1,100 @@
+import numpy as np
+
+from ._base import StateBackend
+
+# Ids are stored in the arrays as long as they are at most this much larger than twice the number of stored ids.
+_MIN_DENSE_CAPACITY = 1024
+
+
+class DenseIdBackend(StateBackend):
+    """
+    A state backend for anonymizations keyed by entity ids, e.g., the ids assigned by an upstream entity linker.
+
+    Ids that are decimal numbers, such as `'42'`, are dense if they are numbered consecutively from 0 onward.
+    The values of such ids are stored in arrays indexed by the id, so they are looked up without hashing
+    and without any per-entry objects. Like `CompactBackend`, the values are stored as integer references
+    if a `codec` is given, and kept in a list otherwise.
+    All other ids, and numbers much larger than the number of stored ids, are kept in a dict.
+
+    >>> backend = DenseIdBackend(codec=(lambda output: int(output[7:]), lambda ref: f'Person {ref}'))
+    >>> backend.set_many([('0', 'Person 1'), ('1', 'Person 2'), ('alice', 'Person 3')])
+    >>> backend.get_many(['1', 'alice', '2'])
+    {'1': 'Person 2', 'alice': 'Person 3'}
+    """
+
+    def __init__(self, codec=None):
+        self.codec = codec
+        self._present = np.zeros(0, dtype=bool)
+        self._refs = np.zeros(0, dtype=np.int64)
+        self._values = []
+        self._dense_size = 0
+        self._sparse = {}
+
+    @property
+    def nbytes(self):
+        """The number of bytes occupied by the arrays, excluding values kept without a codec."""
+        return self._present.nbytes + self._refs.nbytes
+
+    @staticmethod
+    def _parse(key):
+        """
+        Returns the index of a key that is the canonical decimal representation of a non-negative integer, else None.
+        """
+        if isinstance(key, str) and key.isascii() and key.isdigit() and (len(key) == 1 or key[0] != "0"):
+            return int(key)
+        return None
+
+    def _grow(self, idx):
+        capacity = max(2 * len(self._present), 1 << idx.bit_length())
+        self._present = np.concatenate([self._present, np.zeros(capacity - len(self._present), dtype=bool)])
+        if self.codec is not None:
+            self._refs = np.concatenate([self._refs, np.zeros(capacity - len(self._refs), dtype=np.int64)])
+        else:
+            self._values.extend([None] * (capacity - len(self._values)))
+
+    def __getitem__(self, key):
+        idx = self._parse(key)
+        if idx is not None and idx < len(self._present) and self._present[idx]:
+            if self.codec is not None:
+                return self.codec[1](int(self._refs[idx]))
+            return self._values[idx]
+        return self._sparse[key]
+
+    def __contains__(self, key):
+        idx = self._parse(key)
+        if idx is not None and idx < len(self._present) and self._present[idx]:
+            return True
+        return key in self._sparse
+
+    def __setitem__(self, key, value):
+        idx = self._parse(key)
+        if idx is None or key in self._sparse or idx >= max(len(self._present), 2 * self._dense_size + _MIN_DENSE_CAPACITY):
+            self._sparse[key] = value
+            return
+
+        if idx >= len(self._present):
+            self._grow(idx)
+        if not self._present[idx]:
+            self._present[idx] = True
+            self._dense_size += 1
+        if self.codec is not None:
+            self._refs[idx] = self.codec[0](value)
+        else:
+            self._values[idx] = value
+
+    def __delitem__(self, key):
+        idx = self._parse(key)
+        if idx is not None and idx < len(self._present) and self._present[idx]:
+            self._present[idx] = False
+            self._dense_size -= 1
+            if self.codec is None:
+                self._values[idx] = None
+        else:
+            del self._sparse[key]
+
+    def __iter__(self):
+        yield from map(str, np.flatnonzero(self._present).tolist())
+        yield from self._sparse
+
+    def __len__(self):
+        return self._dense_size + len(self._sparse)
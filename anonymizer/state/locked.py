@@ -0,0 +1,134 @@
+import threading
+from contextlib import nullcontext
+
+from ._base import StateBackend
+
+
+class LockedBackend(StateBackend):
+    """
+    A thread-safe wrapper around another state backend.
+
+    `get_or_create` and `get_or_create_many` are atomic per key: values are created while holding one of `stripes`
+    locks selected by the hash of the key, so concurrent threads only wait for each other if their keys share a stripe.
+    Values that exist already are returned without taking a stripe lock.
+
+    Plain dict-based backends are safe for individual operations.
+    All other backends are additionally guarded by a lock around each of their (short) operations.
+
+    >>> from anonymizer.state.memory import InMemoryBackend
+    >>> backend = LockedBackend(InMemoryBackend())
+    >>> backend.get_or_create('Alice', lambda _: 'Person 1'), backend.get_or_create('Alice', lambda _: 'Person 2')
+    ('Person 1', 'Person 1')
+    """
+
+    def __init__(self, base, stripes=64):
+        if stripes < 1:
+            raise ValueError("stripes must be positive")
+        self.base = base
+        self._stripes = [threading.Lock() for _ in range(stripes)]
+        self._base_lock = nullcontext() if isinstance(base, dict) else threading.RLock()
+
+    def _stripe(self, key):
+        return hash(key) % len(self._stripes)
+
+    @property
+    def key_bits(self):
+        return self.base.key_bits
+
+    @property
+    def shared(self):
+        return self.base.shared
+
+    @property
+    def has_counter(self):
+        return self.base.has_counter
+
+    def reserve(self, n, start):
+        return self.base.reserve(n, start)
+
+    def __getitem__(self, key):
+        with self._base_lock:
+            return self.base[key]
+
+    def __contains__(self, key):
+        with self._base_lock:
+            return key in self.base
+
+    def __setitem__(self, key, value):
+        with self._base_lock:
+            self.base[key] = value
+
+    def __delitem__(self, key):
+        with self._base_lock:
+            del self.base[key]
+
+    def __iter__(self):
+        with self._base_lock:
+            return iter(list(self.base))
+
+    def __len__(self):
+        with self._base_lock:
+            return len(self.base)
+
+    def get_many(self, keys):
+        with self._base_lock:
+            return self.base.get_many(keys)
+
+    def set_many(self, items):
+        with self._base_lock:
+            self.base.set_many(items)
+
+    def export_hashed(self):
+        with self._base_lock:
+            return self.base.export_hashed()
+
+    def flush(self):
+        with self._base_lock:
+            self.base.flush()
+
+    def close(self):
+        with self._base_lock:
+            self.base.close()
+
+    def get_or_create(self, key, create):
+        if self.base.shared:
+            # Shared backends decide which value is kept themselves, so concurrent creation is safe.
+            return self.base.get_or_create(key, create)
+        try:
+            return self[key]
+        except KeyError:
+            pass
+
+        with self._stripes[self._stripe(key)]:
+            # Check again, another thread might have created the value in the meantime.
+            try:
+                return self[key]
+            except KeyError:
+                value = create(key)
+                self[key] = value
+                return value
+
+    def get_or_create_many(self, keys, create_many):
+        if self.base.shared:
+            return self.base.get_or_create_many(keys, create_many)
+        keys = list(dict.fromkeys(keys))
+        found = self.get_many(keys)
+        missing = [key for key in keys if key not in found]
+        if not missing:
+            return found
+
+        # Acquire the stripes in a fixed order to prevent deadlocks between concurrent batches.
+        stripes = sorted({self._stripe(key) for key in missing})
+        for stripe in stripes:
+            self._stripes[stripe].acquire()
+        try:
+            found.update(self.get_many(missing))
+            missing = [key for key in missing if key not in found]
+            if missing:
+                created = list(zip(missing, create_many(missing)))
+                found.update(created)
+                self.set_many(created)
+        finally:
+            for stripe in reversed(stripes):
+                self._stripes[stripe].release()
+        return found
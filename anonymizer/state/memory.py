@@ -0,0 +1,21 @@
+from ._base import StateBackend
+
+
+class InMemoryBackend(dict, StateBackend):
+    """
+    The default state backend, which keeps all anonymizations in a plain dict.
+
+    >>> backend = InMemoryBackend()
+    >>> backend.set_many([('Alice', 'Person 1'), ('Bob', 'Person 2')])
+    >>> backend.get_many(['Alice', 'Carol'])
+    {'Alice': 'Person 1'}
+    """
+
+    def get_many(self, keys):
+        return {key: self[key] for key in keys if key in self}
+
+    def set_many(self, items):
+        self.update(items)
+
+    def create_sibling(self, name):
+        return InMemoryBackend()
@@ -0,0 +1,96 @@
+import numpy as np
+
+from ._base import StateBackend
+from ._hashing import sort_hashes
+from .memory import InMemoryBackend
+
+
+class OverlayBackend(StateBackend):
+    """
+    A state backend that reads from a base backend, but records all writes in a separate layer,
+    which is an `InMemoryBackend` unless another backend is given as `layer`.
+    Entries of the layer take precedence over those of the base.
+    The base backend is never modified. Deleting keys is only supported for keys in the layer.
+
+    >>> from anonymizer.state.memory import InMemoryBackend
+    >>> overlay = OverlayBackend(InMemoryBackend(Alice='Person 1'))
+    >>> overlay['Bob'] = 'Person 2'
+    >>> overlay['Alice'], overlay.layer
+    ('Person 1', {'Bob': 'Person 2'})
+    """
+
+    def __init__(self, base, layer=None):
+        self.base = base
+        self.layer = InMemoryBackend() if layer is None else layer
+
+    @property
+    def key_bits(self):
+        return self.base.key_bits
+
+    @property
+    def shared(self):
+        return self.layer.shared
+
+    @property
+    def has_counter(self):
+        return self.layer.has_counter
+
+    def reserve(self, n, start):
+        return self.layer.reserve(n, start)
+
+    def __getitem__(self, key):
+        try:
+            return self.layer[key]
+        except KeyError:
+            return self.base[key]
+
+    def __contains__(self, key):
+        return key in self.layer or key in self.base
+
+    def __setitem__(self, key, value):
+        self.layer[key] = value
+
+    def __delitem__(self, key):
+        del self.layer[key]
+
+    def __iter__(self):
+        yield from self.layer
+        yield from (key for key in self.base if key not in self.layer)
+
+    def __len__(self):
+        return len(self.layer) + sum(1 for key in self.base if key not in self.layer)
+
+    def get_or_create(self, key, create):
+        try:
+            return self[key]
+        except KeyError:
+            # The layer may create values atomically, e.g., if it is shared between processes.
+            return self.layer.get_or_create(key, create)
+
+    def get_or_create_many(self, keys, create_many):
+        keys = list(dict.fromkeys(keys))
+        found = self.get_many(keys)
+        missing = [key for key in keys if key not in found]
+        if missing:
+            found.update(self.layer.get_or_create_many(missing, create_many))
+        return found
+
+    def get_many(self, keys):
+        found = self.layer.get_many(keys)
+        found.update(self.base.get_many([key for key in keys if key not in found]))
+        return found
+
+    def set_many(self, items):
+        self.layer.set_many(items)
+
+    def export_hashed(self):
+        layer_hashes, layer_values = self.layer.export_hashed()
+        base_hashes, base_values = self.base.export_hashed()
+        # Entries of the layer come first, so they take precedence over those of the base.
+        return sort_hashes(np.concatenate([layer_hashes, base_hashes]), layer_values + base_values)
+
+    def flush(self):
+        self.layer.flush()
+
+    def close(self):
+        self.layer.close()
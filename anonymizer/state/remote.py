@@ -0,0 +1,156 @@
+import json
+import os
+import socket
+import threading
+
+from ._base import StateBackend
+from .bounded import BoundedCache
+
+
+class RemoteBackend(StateBackend):
+    """
+    A state backend that keeps all anonymizations in a `anonymizer.state.server.StateServer`,
+    so that several processes anonymize the same input equally.
+
+    `get_or_create_many` takes two round-trips per batch: one to look up all keys that are not cached locally,
+    and one to propose the newly created values, of which the server keeps the first one per key.
+    Large batches are split into requests of `batch_size` keys, which are sent at once (pipelined).
+    All values returned by the server are kept in a local read-through cache of `cache_entries` entries.
+    Since values are never replaced once created, cached values never become stale,
+    unless they are explicitly overwritten or deleted.
+
+    The backend also provides a counter shared by all processes (see `reserve`),
+    which `Pseudonymization` uses to hand out unique pseudonyms.
+    Mechanisms using the same server must use different `namespace`s.
+    """
+
+    shared = True
+    has_counter = True
+
+    def __init__(self, path, namespace="default", cache_entries=100000, batch_size=10000):
+        if batch_size < 1:
+            raise ValueError("batch_size must be positive")
+        self.path = path
+        self.namespace = namespace
+        self.batch_size = batch_size
+        self._cache = BoundedCache(max_entries=cache_entries)
+        self._lock = threading.Lock()
+        self._connect()
+
+    def _connect(self):
+        self._pid = os.getpid()
+        self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._socket.connect(self.path)
+        self._reader = self._socket.makefile("rb")
+
+    def _request_many(self, requests):
+        """
+        Sends all requests at once and returns their responses in order.
+        """
+        with self._lock:
+            # Connections must not be shared across processes, so forked processes open their own.
+            if self._pid != os.getpid():
+                self._connect()
+            self._socket.sendall(
+                b"".join(json.dumps({"ns": self.namespace, **request}).encode() + b"\n" for request in requests)
+            )
+            responses = [json.loads(self._reader.readline() or b"null") for _ in requests]
+
+        for response in responses:
+            if response is None:
+                raise ConnectionError("The state server closed the connection")
+            if "error" in response:
+                raise ValueError(f"State server error: {response['error']}")
+        return responses
+
+    def _request(self, request):
+        return self._request_many([request])[0]
+
+    def _chunks(self, sequence):
+        return [sequence[i : i + self.batch_size] for i in range(0, len(sequence), self.batch_size)]
+
+    def __getitem__(self, key):
+        found = self.get_many([key])
+        if key not in found:
+            raise KeyError(key)
+        return found[key]
+
+    def __contains__(self, key):
+        return key in self.get_many([key])
+
+    def __setitem__(self, key, value):
+        self.set_many([(key, value)])
+
+    def __delitem__(self, key):
+        self._cache.pop(key, None)
+        if not self._request({"op": "delete", "keys": [key]})["deleted"]:
+            raise KeyError(key)
+
+    def __iter__(self):
+        return iter(self._request({"op": "keys"})["keys"])
+
+    def __len__(self):
+        return self._request({"op": "len"})["len"]
+
+    def get_many(self, keys):
+        found = {}
+        missing = []
+        for key in keys:
+            try:
+                found[key] = self._cache[key]
+            except KeyError:
+                missing.append(key)
+
+        chunks = self._chunks(missing)
+        for chunk, response in zip(chunks, self._request_many([{"op": "get", "keys": chunk} for chunk in chunks])):
+            selected = [(key, value) for key, value in zip(chunk, response["values"]) if value is not None]
+            self._cache.update(selected)
+            found.update(selected)
+        return found
+
+    def get_or_create(self, key, create):
+        return self.get_or_create_many([key], lambda missing: [create(key) for key in missing])[key]
+
+    def get_or_create_many(self, keys, create_many):
+        keys = list(dict.fromkeys(keys))
+        found = self.get_many(keys)
+        missing = [key for key in keys if key not in found]
+        if not missing:
+            return found
+
+        # Propose the created values. If another process was faster, its values are returned instead.
+        chunks = self._chunks(list(zip(missing, create_many(missing))))
+        for chunk, response in zip(chunks, self._request_many([{"op": "setdefault", "items": chunk} for chunk in chunks])):
+            stored = [(key, value) for (key, _), value in zip(chunk, response["values"])]
+            self._cache.update(stored)
+            found.update(stored)
+        return found
+
+    def set_many(self, items):
+        items = list(items)
+        self._request_many([{"op": "set", "items": chunk} for chunk in self._chunks(items)])
+        self._cache.update(items)
+
+    def create_sibling(self, name):
+        """
+        Creates a backend for the namespace `<namespace>/<name>` of the same server.
+        """
+        return RemoteBackend(
+            self.path, f"{self.namespace}/{name}", cache_entries=self._cache.max_entries, batch_size=self.batch_size
+        )
+
+    def reserve(self, n, start):
+        """
+        Reserves `n` consecutive values of the namespace's counter, which starts at `start`, and returns the first one.
+        """
+        return self._request({"op": "reserve", "n": n, "start": start})["start"]
+
+    def close(self):
+        self._reader.close()
+        self._socket.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
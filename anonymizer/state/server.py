@@ -0,0 +1,133 @@
+"""
+A small state server that shares the anonymizations of stateful mechanisms between processes on the same machine.
+Mechanisms connect to it via an `anonymizer.state.RemoteBackend`.
+
+The server listens on a unix socket and speaks a line-based protocol:
+each request and each response is a JSON object on a single line.
+Clients may send several requests before reading the responses (pipelining),
+which the server answers in order. Each request is executed atomically.
+The server stops answering pipelined requests while a client does not read its responses,
+and closes the connection after answering a request line longer than `max_line_size` with an error.
+
+Start a server with `python -m anonymizer.state.server /path/to/socket`.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+from collections import defaultdict
+
+# The maximum size of a single request line in bytes.
+MAX_LINE_SIZE = 1 << 28
+
+
+class StateServer:
+    """
+    An asyncio server holding several namespaces of anonymizations and counters in memory.
+
+    Requests contain an operation `op` and a namespace `ns`. Keys and values are passed as JSON values,
+    mappings as lists of `[key, value]` pairs:
+
+    - `get` with `keys` returns the `values` of the keys, `null` for missing ones.
+    - `setdefault` with `items` stores all values of keys without a value and returns the stored `values`.
+    - `set` with `items` stores all values.
+    - `delete` with `keys` deletes the keys and returns the number of `deleted` keys.
+    - `keys` returns all `keys`, `len` returns their number as `len`.
+    - `reserve` with `n` and `start` reserves `n` consecutive values of a counter, which starts at `start`,
+      and returns the first one as `start`.
+
+    Failed requests are answered with an `error`.
+    """
+
+    def __init__(self, path, max_line_size=MAX_LINE_SIZE):
+        self.path = path
+        self.max_line_size = max_line_size
+        self._namespaces = defaultdict(dict)
+        self._counters = {}
+        self._server = None
+
+    async def start(self):
+        """Starts listening on the unix socket at `path`, replacing a stale socket file."""
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+        self._server = await asyncio.start_unix_server(self._handle, path=self.path, limit=self.max_line_size)
+
+    async def serve_forever(self):
+        if self._server is None:
+            await self.start()
+        async with self._server:
+            await self._server.serve_forever()
+
+    def close(self):
+        if self._server is not None:
+            self._server.close()
+
+    async def _handle(self, reader, writer):
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except (asyncio.LimitOverrunError, ValueError):
+                    # The rest of the line cannot be told apart from the next request, so the connection is closed.
+                    writer.write(
+                        json.dumps({"error": f"Request line longer than {self.max_line_size} bytes"}).encode() + b"\n"
+                    )
+                    await writer.drain()
+                    break
+                if not line:
+                    break
+                try:
+                    response = self.execute(json.loads(line))
+                except Exception as e:
+                    response = {"error": f"{type(e).__name__}: {e}"}
+                writer.write(json.dumps(response).encode() + b"\n")
+                # Waits only while the transport buffers more than its high-water mark,
+                # i.e., when the client does not read its responses.
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    def execute(self, request):
+        """
+        Executes a single request and returns the response.
+        """
+        op = request["op"]
+        if op == "reserve":
+            start = self._counters.setdefault(request["ns"], request["start"])
+            self._counters[request["ns"]] = start + request["n"]
+            return {"start": start}
+
+        namespace = self._namespaces[request["ns"]]
+        if op == "get":
+            return {"values": [namespace.get(key) for key in request["keys"]]}
+        elif op == "setdefault":
+            return {"values": [namespace.setdefault(key, value) for key, value in request["items"]]}
+        elif op == "set":
+            namespace.update((key, value) for key, value in request["items"])
+            return {}
+        elif op == "delete":
+            return {"deleted": sum(namespace.pop(key, None) is not None for key in request["keys"])}
+        elif op == "keys":
+            return {"keys": list(namespace)}
+        elif op == "len":
+            return {"len": len(namespace)}
+        raise ValueError(f"Unknown operation {op!r}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m anonymizer.state.server", description=__doc__.strip().splitlines()[0])
+    parser.add_argument("path", help="The path of the unix socket to listen on.")
+    args = parser.parse_args(argv)
+
+    try:
+        asyncio.run(StateServer(args.path).serve_forever())
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
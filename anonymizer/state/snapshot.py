@@ -0,0 +1,195 @@
+import json
+import os
+import struct
+import tempfile
+
+import numpy as np
+
+from ._base import StateBackend
+from ._hashing import hash_keys, hash_words
+
+MAGIC = b"ANONSNAP"
+VERSION = 1
+# Arrays are aligned, so they can be viewed in place once the file is memory-mapped.
+_ALIGNMENT = 64
+
+
+class SnapshotBackend(StateBackend):
+    """
+    A read-only state backend on top of the arrays of a snapshot, see `write_snapshot` and `read_snapshot`.
+
+    `hashes` holds the hashes of all keys sorted lexicographically by row, which are looked up by binary search.
+    The outputs are either stored as integer references `refs` that are decoded by the `codec` of the mechanism
+    (see `CompactBackend`), or as UTF-8 strings concatenated in `blob` and delimited by `offsets`.
+    The arrays are usually memory-mapped, so only the pages touched by lookups are ever read from disk.
+    Like `CompactBackend`, the backend cannot be iterated as the keys themselves are not stored.
+    """
+
+    def __init__(self, hashes, refs=None, offsets=None, blob=None, codec=None):
+        if (refs is None) == (offsets is None or blob is None):
+            raise ValueError("Either refs or offsets and blob are required")
+        self.hashes = hashes
+        self.key_bits = hashes.shape[1] * 64
+        self.refs = refs
+        self.offsets = offsets
+        self.blob = blob
+        self.codec = codec
+
+    def _value(self, idx):
+        if self.refs is not None:
+            if self.codec is None:
+                raise ValueError("Decoding the stored references requires the codec of the mechanism")
+            return self.codec[1](int(self.refs[idx]))
+        start, end = self.offsets[idx : idx + 2].tolist()
+        return bytes(self.blob[start:end]).decode()
+
+    def _find(self, words):
+        # Rows with the same first word are adjacent, they are compared in full afterwards.
+        first_words = self.hashes[:, 0]
+        idx = int(np.searchsorted(first_words, np.uint64(words[0])))
+        while idx < len(first_words) and first_words[idx] == words[0]:
+            if self.hashes[idx].tolist() == words:
+                return idx
+            idx += 1
+        return None
+
+    def __getitem__(self, key):
+        idx = self._find(hash_words(key, self.key_bits))
+        if idx is None:
+            raise KeyError(key)
+        return self._value(idx)
+
+    def __contains__(self, key):
+        return self._find(hash_words(key, self.key_bits)) is not None
+
+    def __setitem__(self, key, value):
+        raise TypeError("SnapshotBackend is read-only")
+
+    def __delitem__(self, key):
+        raise TypeError("SnapshotBackend is read-only")
+
+    def __iter__(self):
+        raise TypeError("SnapshotBackend only stores hashes of its keys, which cannot be iterated")
+
+    def __len__(self):
+        return len(self.hashes)
+
+    def get_many(self, keys):
+        keys = list(keys)
+        if not keys or not len(self.hashes):
+            return {}
+        hashes = hash_keys(keys, self.key_bits)
+        candidates = np.minimum(np.searchsorted(self.hashes[:, 0], hashes[:, 0]), len(self.hashes) - 1)
+        hit = (self.hashes[candidates] == hashes).all(axis=1)
+        found = {key: self._value(idx) for key, idx, is_hit in zip(keys, candidates.tolist(), hit) if is_hit}
+        # Only keys sharing their first word with another entry might not be found at the first candidate.
+        ambiguous = ~hit & (self.hashes[candidates, 0] == hashes[:, 0])
+        for key in (key for key, is_ambiguous in zip(keys, ambiguous) if is_ambiguous):
+            if key in self:
+                found[key] = self[key]
+        return found
+
+    def export_hashed(self):
+        return self.hashes, [self._value(idx) for idx in range(len(self.hashes))]
+
+
+def write_snapshot(path, entries):
+    """
+    Writes the state of several mechanisms to a binary file at `path`.
+
+    Each entry is a dict with the `type` of the mechanism, a dict of JSON-serializable `scalars`
+    (e.g., the counter of a pseudonymization), and `stores`, which maps names to the exported anonymizations
+    of a backend as a pair of `hashes` and `values` (see `StateBackend.export_hashed`).
+    If the entry has a `codec`, the values are stored as its integer references, otherwise they must be strings.
+
+    The file starts with a magic number, followed by the length of a JSON header and the header itself.
+    The header describes each mechanism and the location of its arrays, which follow in aligned, raw form.
+
+    The snapshot is written to a temporary file next to `path`, which then replaces `path` atomically.
+    Hence, a snapshot at `path` that is memory-mapped by `read_snapshot` is never modified.
+    """
+    arrays = []
+    mechanisms = []
+    offset = 0
+
+    def add_array(array):
+        nonlocal offset
+        array = np.ascontiguousarray(array)
+        offset += -offset % _ALIGNMENT
+        arrays.append((offset, array))
+        description = {"offset": offset, "dtype": array.dtype.str, "shape": list(array.shape)}
+        offset += array.nbytes
+        return description
+
+    def add_store(hashes, values, codec):
+        if codec is not None:
+            stored = {"refs": add_array(np.array([codec[0](value) for value in values], dtype="<i8"))}
+        else:
+            if not all(isinstance(value, str) for value in values):
+                raise TypeError(f"The state of {entry['type']} can only be saved if all anonymizations are strings")
+            encoded = [value.encode() for value in values]
+            offsets = np.zeros(len(encoded) + 1, dtype="<i8")
+            np.cumsum([len(value) for value in encoded], out=offsets[1:])
+            stored = {"offsets": add_array(offsets), "blob": add_array(np.frombuffer(b"".join(encoded), dtype=np.uint8))}
+        stored["hashes"] = add_array(np.asarray(hashes, dtype="<u8"))
+        return stored
+
+    for entry in entries:
+        stores = {name: add_store(hashes, values, entry.get("codec")) for name, (hashes, values) in entry["stores"].items()}
+        mechanisms.append({"type": entry["type"], "scalars": entry["scalars"], "stores": stores})
+
+    header = json.dumps({"version": VERSION, "mechanisms": mechanisms}).encode()
+    data_start = len(MAGIC) + 8 + len(header)
+    data_start += -data_start % _ALIGNMENT
+    directory, name = os.path.split(os.path.abspath(path))
+    file = tempfile.NamedTemporaryFile(dir=directory, prefix=f".{name}.", suffix=".tmp", delete=False)
+    try:
+        with file:
+            file.write(MAGIC)
+            file.write(struct.pack("<Q", len(header)))
+            file.write(header)
+            for array_offset, array in arrays:
+                file.write(b"\0" * (data_start + array_offset - file.tell()))
+                file.write(array.tobytes())
+        os.replace(file.name, path)
+    except BaseException:
+        os.unlink(file.name)
+        raise
+
+
+def read_snapshot(path):
+    """
+    Reads a snapshot written by `write_snapshot` and returns a list of `(type, scalars, stores)` per mechanism,
+    where `stores` maps names to `SnapshotBackend`s.
+    Only the header is read, the arrays of the backends are memory-mapped.
+    Their codecs must be set before references can be decoded.
+    """
+    with open(path, "rb") as file:
+        if file.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} is not a state snapshot")
+        (header_len,) = struct.unpack("<Q", file.read(8))
+        header = json.loads(file.read(header_len))
+    if header["version"] != VERSION:
+        raise ValueError(f"Unsupported snapshot version {header['version']}")
+
+    data_start = len(MAGIC) + 8 + header_len
+    data_start += -data_start % _ALIGNMENT
+    data = np.memmap(path, mode="r") if data_start < os.path.getsize(path) else np.zeros(0, dtype=np.uint8)
+
+    def view(description):
+        dtype = np.dtype(description["dtype"])
+        start = data_start + description["offset"]
+        count = int(np.prod(description["shape"]))
+        return data[start : start + count * dtype.itemsize].view(dtype).reshape(description["shape"])
+
+    return [
+        (
+            mechanism["type"],
+            mechanism["scalars"],
+            {
+                name: SnapshotBackend(**{array: view(description) for array, description in arrays.items()})
+                for name, arrays in mechanism["stores"].items()
+            },
+        )
+        for mechanism in header["mechanisms"]
+    ]
@@ -0,0 +1,191 @@
+import os
+import re
+import sqlite3
+
+from ._base import StateBackend
+from .bounded import BoundedCache
+
+# sqlite limits the number of parameters per statement, so lookups of many keys are split into chunks.
+_MAX_PARAMETERS = 500
+# The table holding the counter of each anonymizations table (see `SqliteBackend.reserve`).
+_COUNTERS_TABLE = "anonymizer_counters"
+
+
+class SqliteBackend(StateBackend):
+    """
+    A state backend that persists all anonymizations in an sqlite database.
+    Hence, the mapping survives restarts and is not limited by the available memory.
+
+    Recently used anonymizations are kept in an in-memory front cache of `cache_entries` entries,
+    so repeated lookups do not hit the database.
+    Writes are buffered and written behind in batches of `write_batch_size` entries.
+    Call `flush` (or `close`) to make sure all anonymizations have been persisted.
+    The backend also persists a counter (see `reserve`), which `Pseudonymization` uses to hand out unique pseudonyms.
+    Forked processes (e.g., the workers of `Anonymizer.anonymize_parallel`) open their own connection,
+    so the backend can only be used by them if the database is a file, not `:memory:`.
+
+    >>> backend = SqliteBackend(':memory:')
+    >>> backend['Alice'] = 'Person 1'
+    >>> backend.flush()
+    >>> backend['Alice'], len(backend)
+    ('Person 1', 1)
+    """
+
+    has_counter = True
+
+    def __init__(self, path, table="anonymizations", cache_entries=100000, write_batch_size=1000):
+        if not re.fullmatch(r"[A-Za-z_][A-Za-z0-9_]*", table):
+            raise ValueError("Invalid table name")
+        if write_batch_size < 1:
+            raise ValueError("write_batch_size must be positive")
+
+        self.path = path
+        self.table = table
+        self.write_batch_size = write_batch_size
+        self._cache = BoundedCache(max_entries=cache_entries)
+        self._pending = {}
+        self._connect()
+
+    def _connect(self):
+        self._pid = os.getpid()
+        self._connection = sqlite3.connect(self.path, check_same_thread=False)
+        if self.path != ":memory:":
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute("PRAGMA synchronous=NORMAL")
+        # In-memory databases are private to their connection, so the tables are created for every connection.
+        self._connection.execute(f"CREATE TABLE IF NOT EXISTS {self.table} (key PRIMARY KEY, value) WITHOUT ROWID")
+        self._connection.execute(f"CREATE TABLE IF NOT EXISTS {_COUNTERS_TABLE} (name PRIMARY KEY, value) WITHOUT ROWID")
+        self._connection.commit()
+
+    @property
+    def connection(self):
+        # Connections must not be shared across processes, so forked processes open their own.
+        if self._pid != os.getpid():
+            if self.path in (":memory:", ""):
+                raise ValueError("A private sqlite database cannot be shared with forked processes, use a database file")
+            self._connect()
+        return self._connection
+
+    def _select(self, keys):
+        found = {}
+        for i in range(0, len(keys), _MAX_PARAMETERS):
+            chunk = keys[i : i + _MAX_PARAMETERS]
+            placeholders = ", ".join("?" * len(chunk))
+            found.update(self.connection.execute(f"SELECT key, value FROM {self.table} WHERE key IN ({placeholders})", chunk))
+        return found
+
+    def __getitem__(self, key):
+        try:
+            return self._cache[key]
+        except KeyError:
+            pass
+
+        try:
+            value = self._pending[key]
+        except KeyError:
+            row = self.connection.execute(f"SELECT value FROM {self.table} WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                raise KeyError(key)
+            value = row[0]
+        self._cache[key] = value
+        return value
+
+    def __contains__(self, key):
+        try:
+            self[key]
+        except KeyError:
+            return False
+        return True
+
+    def __setitem__(self, key, value):
+        self._cache[key] = value
+        self._pending[key] = value
+        if len(self._pending) >= self.write_batch_size:
+            self.flush()
+
+    def __delitem__(self, key):
+        if key not in self:
+            raise KeyError(key)
+        self._cache.pop(key, None)
+        self._pending.pop(key, None)
+        self.connection.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+        self.connection.commit()
+
+    def __iter__(self):
+        self.flush()
+        return (key for key, in self.connection.execute(f"SELECT key FROM {self.table}"))
+
+    def __len__(self):
+        self.flush()
+        return self.connection.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0]
+
+    def get_many(self, keys):
+        found = {}
+        missing = []
+        for key in keys:
+            try:
+                found[key] = self._cache[key]
+            except KeyError:
+                if key in self._pending:
+                    found[key] = self._pending[key]
+                else:
+                    missing.append(key)
+
+        if missing:
+            selected = self._select(missing)
+            self._cache.update(selected)
+            found.update(selected)
+        return found
+
+    def set_many(self, items):
+        items = list(items)
+        self._cache.update(items)
+        self._pending.update(items)
+        if len(self._pending) >= self.write_batch_size:
+            self.flush()
+
+    def flush(self):
+        if self._pending:
+            self.connection.executemany(
+                f"INSERT OR REPLACE INTO {self.table} (key, value) VALUES (?, ?)", self._pending.items()
+            )
+            self.connection.commit()
+            self._pending.clear()
+
+    def create_sibling(self, name):
+        """
+        Creates a backend for the table `<table>_<name>` of the same database.
+        """
+        return SqliteBackend(
+            self.path, f"{self.table}_{name}", cache_entries=self._cache.max_entries, write_batch_size=self.write_batch_size
+        )
+
+    def reserve(self, n, start):
+        """
+        Reserves `n` consecutive values of the table's counter, which starts at `start`, and returns the first one.
+        The counter is persisted immediately, so values are never handed out twice, even across restarts.
+        """
+        connection = self.connection
+        # An immediate transaction locks the database, so processes sharing the file reserve disjoint values.
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            row = connection.execute(f"SELECT value FROM {_COUNTERS_TABLE} WHERE name = ?", (self.table,)).fetchone()
+            first = start if row is None else row[0]
+            connection.execute(
+                f"INSERT OR REPLACE INTO {_COUNTERS_TABLE} (name, value) VALUES (?, ?)", (self.table, first + n)
+            )
+        except BaseException:
+            connection.rollback()
+            raise
+        connection.commit()
+        return first
+
+    def close(self):
+        self.flush()
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,58 @@
+import threading
+
+
+class BlockCounter:
+    """
+    A thread-safe counter that hands out consecutive blocks of `block_size` values to each thread.
+    Threads only synchronize when they reserve a new block, so values are unique,
+    but not handed out in global order, and values reserved by a thread but never used are skipped.
+
+    The optional callback `on_reserve` is called with the new value of `reserved` while holding the counter's lock.
+    The optional function `reserve(n)` reserves `n` consecutive values elsewhere, e.g., from a counter shared
+    with other processes, and returns the first one. Otherwise, the values are counted up from `start`.
+
+    >>> counter = BlockCounter(start=1, block_size=10)
+    >>> counter.next(), counter.next(), list(counter.take(3)), counter.reserved
+    (1, 2, [11, 12, 13], 14)
+    """
+
+    def __init__(self, start=0, block_size=64, on_reserve=None, reserve=None):
+        if block_size < 1:
+            raise ValueError("block_size must be positive")
+        self.block_size = block_size
+        self.on_reserve = on_reserve
+        self.reserve = reserve
+        self._next_free = start
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    @property
+    def reserved(self):
+        """
+        The first value that has not been reserved yet by any thread.
+        """
+        return self._next_free
+
+    def take(self, n):
+        """
+        Reserves `n` consecutive values and returns them as a range.
+        """
+        with self._lock:
+            start = self._next_free if self.reserve is None else self.reserve(n)
+            self._next_free = start + n
+            if self.on_reserve is not None:
+                self.on_reserve(self._next_free)
+        return range(start, start + n)
+
+    def next(self):
+        """
+        Returns the next value of the current thread's block, reserving a new block if necessary.
+        """
+        block = getattr(self._local, "block", None)
+        if block is not None:
+            value = next(block, None)
+            if value is not None:
+                return value
+
+        self._local.block = iter(self.take(self.block_size))
+        return next(self._local.block)
@@ -2,6 +2,55 @@ import random
 
 import numpy as np
 
+from .randomness import SystemRandom
+
+# The default source for drawing arrays of floats.
+_system_random = SystemRandom()
+
+
+def _alias_table(probabilities):
+    """
+    Builds an alias table (Walker's alias method, following Vose's construction) for a row of probabilities.
+    Returns the arrays `(threshold, alias)`: value j is sampled by picking a column k uniformly at random,
+    which yields k with probability `threshold[k]` and `alias[k]` otherwise.
+
+    Vose's algorithm fills the deficit of each column with less than the average probability (small)
+    from the current column with more (large); a large column that drops below the average becomes small
+    and is filled from the next large one. The small columns are filled in order, so the large column serving
+    a small one is found from the cumulative deficits and excesses, which allows to build the table without a loop.
+
+    >>> threshold, alias = _alias_table(np.array([0.1, 0.2, 0.3, 0.4]))
+    >>> np.round(threshold, 6).tolist(), alias.tolist()
+    ([0.4, 0.8, 0.6, 1.0], [2, 3, 3, 3])
+    """
+    n = len(probabilities)
+    scaled = probabilities * n
+    is_small = scaled < 1
+    small = np.flatnonzero(is_small)
+    large = np.flatnonzero(~is_small)
+
+    threshold = np.ones(n)
+    alias = np.arange(n)
+    if len(large) == 0 or len(small) == 0:
+        # Due to rounding, all columns may be (almost) equal to the average.
+        return threshold, alias
+
+    deficits = np.cumsum(1 - scaled[small])
+    excesses = np.cumsum(scaled[large] - 1)
+    # Small column i is filled from the first large column whose cumulative excess covers the deficits before i.
+    serving = np.minimum(np.searchsorted(excesses, deficits - (1 - scaled[small])), len(large) - 1)
+    threshold[small] = scaled[small]
+    alias[small] = large[serving]
+
+    # Each large column keeps what remains after serving its small columns and becomes small itself,
+    # which is filled from the next large column. The last large column keeps the rest.
+    num_served = np.searchsorted(serving, np.arange(len(large)), side="right")
+    absorbed = np.where(num_served > 0, deficits[np.maximum(num_served - 1, 0)], 0)
+    threshold[large] = np.clip(1 - (absorbed - excesses), 0, 1)
+    alias[large[:-1]] = large[1:]
+    threshold[large[-1]] = 1
+    return threshold, alias
+
 
 class DiscreteDistribution:
     """
@@ -51,7 +100,8 @@ class DiscreteDistribution:
         # __modify_schema__ should mutate the dict it receives in place,
         # the returned value will be ignored
         field_schema.update(
-            title="DiscreteDistribution", type="object",
+            title="DiscreteDistribution",
+            type="object",
         )
 
     @classmethod
@@ -94,7 +144,7 @@ class DiscreteDistribution:
             return self
         else:
             size = self.probabilities.shape[0]
-            probabilities = np.tile(self.probabilities, (size, size))
+            probabilities = np.tile(self.probabilities, (size, 1))
             return DiscreteDistribution(probabilities)
 
     def to_cumulative(self):
@@ -111,7 +161,12 @@ class DiscreteDistribution:
         and multiplies all other probabilities by (1 - p).
 
         Returns a new distribution and does not modify the current one.
+        If the distribution is independent of the input value, an `RRTossDistribution` is returned,
+        which does not materialize the matrix.
         """
+        if not self.is_matrix:
+            return RRTossDistribution(p, self)
+
         full = self.to_full_distribution()
         # Multiply each entry by (1 - p)
         full.probabilities *= 1 - p
@@ -133,39 +188,73 @@ class DiscreteDistribution:
 
 class CumulativeDiscreteDistribution:
     """
-    A cumulative representation of a discrete probability distribution.
-    This can be used to speed up sampling.
+    A representation of a discrete probability distribution that is optimized for sampling.
+
+    An alias table is built for each row once, so that sampling takes constant time regardless of the number of values.
+    Only the alias tables are kept, not the probabilities themselves.
     """
 
     def __init__(self, discrete_distribution):
         """
         Creates a new cumulative distribution from a DiscreteDistribution.
         """
+        probabilities = discrete_distribution.probabilities
         if discrete_distribution.is_matrix:
-            self.cum_probabilities = np.cumsum(discrete_distribution.probabilities, axis=1)
             self.is_matrix = True
+            tables = [_alias_table(row) for row in probabilities]
+            self.alias_thresholds = np.array([threshold for threshold, _ in tables])
+            self.aliases = np.array([alias for _, alias in tables])
         else:
-            self.cum_probabilities = np.cumsum(discrete_distribution.probabilities)
             self.is_matrix = False
+            self.alias_thresholds, self.aliases = _alias_table(probabilities)
 
     def sample_element(self, input_idx, rng=random.SystemRandom()):
         """
         Samples an output index j based in the given input index `input_idx`
         according to the distribution `P(output = j | input = i)`.
 
-        Optionally takes an random number generator that implements the method `choices` following `random.choices`.
+        Optionally takes an random number generator that implements the method `random` following `random.random`.
         By default, SystemRandom is used.
+        The uniform number drawn selects both the column of the alias table and whether its alias is used.
         """
-        row = self.cum_probabilities
+        thresholds, aliases = self.alias_thresholds, self.aliases
         if self.is_matrix:
-            row = self.cum_probabilities[input_idx]
-        return rng.choices(range(len(row)), cum_weights=row)[0]
+            thresholds, aliases = thresholds[input_idx], aliases[input_idx]
+        n = len(thresholds)
+        u = rng.random() * n
+        column = min(int(u), n - 1)
+        if u - column < thresholds[column]:
+            return column
+        return int(aliases[column])
+
+    def sample_elements(self, input_idxs, rng=None):
+        """
+        Samples an output index for each input index of the array `input_idxs` at once, just like `sample_element`.
+        All uniform numbers are drawn in a single call and resolved with the alias tables.
+
+        Optionally takes a random number generator whose method `random(size)` returns an array of floats,
+        e.g., a numpy `Generator` or a source from `anonymizer.utils.randomness`. By default, SystemRandom is used.
+
+        >>> c = DiscreteDistribution([[0, 1], [1, 0]]).to_cumulative()
+        >>> c.sample_elements(np.array([0, 1, 1])).tolist()
+        [1, 0, 0]
+        """
+        input_idxs = np.asarray(input_idxs, dtype=np.intp)
+        n = self.alias_thresholds.shape[-1]
+        rng = _system_random if rng is None else rng
+        u = rng.random(len(input_idxs)) * n
+        columns = np.minimum(u.astype(np.intp), n - 1)
+        if self.is_matrix:
+            thresholds, aliases = self.alias_thresholds[input_idxs, columns], self.aliases[input_idxs, columns]
+        else:
+            thresholds, aliases = self.alias_thresholds[columns], self.aliases[columns]
+        return np.where(u - columns < thresholds, columns, aliases)
 
     def __len__(self):
         """
         Returns the number of items in the distribution.
         """
-        return len(self.cum_probabilities)
+        return self.alias_thresholds.shape[-1]
 
 
 class UniformDistribution(DiscreteDistribution, CumulativeDiscreteDistribution):
@@ -207,13 +296,102 @@ class UniformDistribution(DiscreteDistribution, CumulativeDiscreteDistribution):
         Samples an output index j based in the given input index `input_idx`
         according to the distribution `P(output = j | input = i)`.
 
-        Optionally takes an random number generator that implements the method `choices` following `random.choices`.
+        Optionally takes an random number generator that implements the method `random` following `random.random`.
         By default, SystemRandom is used.
         """
-        return rng.choices(range(self.n))[0]
+        return min(int(rng.random() * self.n), self.n - 1)
+
+    def sample_elements(self, input_idxs, rng=None):
+        """
+        Samples an output index for each input index of the array `input_idxs` at once.
+        Optionally takes a random number generator like `CumulativeDiscreteDistribution.sample_elements`.
+        """
+        rng = _system_random if rng is None else rng
+        return np.minimum((rng.random(len(input_idxs)) * self.n).astype(np.intp), self.n - 1)
 
     def __len__(self):
         """
         Returns the number of items in the distribution.
         """
         return self.n
+
+
+class RRTossDistribution(DiscreteDistribution, CumulativeDiscreteDistribution):
+    """
+    The distribution of a randomized response toss over a distribution independent of the input value:
+    with a probability of `p`, the input index itself is returned, otherwise an index drawn from `distribution`,
+    i.e., `P(output = j | input = i) = p * [i = j] + (1 - p) * P(output = j)`.
+
+    Only the input-independent distribution is stored, so memory grows linearly with the number of values
+    and an output is sampled in constant time, instead of building and sampling from the full matrix.
+
+    >>> d = DiscreteDistribution.uniform_distribution(3).with_rr_toss(0.5)
+    >>> d.to_full_distribution().probabilities.round(3).tolist()
+    [[0.667, 0.167, 0.167], [0.167, 0.667, 0.167], [0.167, 0.167, 0.667]]
+    """
+
+    def __init__(self, p, distribution):
+        """
+        Creates the distribution of a randomized response toss with a probability of `p` for reporting the input value
+        over the input-independent `distribution`.
+        """
+        if distribution.is_matrix:
+            raise ValueError("The distribution must be independent of the input value")
+        if not 0 <= p <= 1:
+            raise ValueError("The probability must be between 0 and 1")
+        self.p = p
+        self.distribution = distribution
+        self.cumulative = distribution.to_cumulative()
+        # The distribution depends on the input value.
+        self.is_matrix = True
+
+    def normalize(self):
+        """
+        No need for normalization here.
+        """
+        pass
+
+    def to_full_distribution(self):
+        """
+        Returns the full matrix representation for any discrete distribution representation.
+        This allows to have a consistent representation for operations on the matrix.
+        """
+        probabilities = (1 - self.p) * self.distribution.to_full_distribution().probabilities
+        probabilities[np.diag_indices(len(self))] += self.p
+        return DiscreteDistribution(probabilities)
+
+    def to_cumulative(self):
+        """
+        Returns the corresponding cumulative distribution.
+        The cumulative distribution is used for sampling.
+        """
+        return self
+
+    def sample_element(self, input_idx, rng=random.SystemRandom()):
+        """
+        Samples an output index j based in the given input index `input_idx`
+        according to the distribution `P(output = j | input = i)`.
+
+        Optionally takes an random number generator that implements the method `random` following `random.random`.
+        By default, SystemRandom is used.
+        """
+        if rng.random() < self.p:
+            return input_idx
+        return self.cumulative.sample_element(input_idx, rng=rng)
+
+    def sample_elements(self, input_idxs, rng=None):
+        """
+        Samples an output index for each input index of the array `input_idxs` at once.
+        Optionally takes a random number generator like `CumulativeDiscreteDistribution.sample_elements`.
+        """
+        rng = _system_random if rng is None else rng
+        output_idxs = np.array(input_idxs, dtype=np.intp)
+        drawn = rng.random(len(output_idxs)) >= self.p
+        output_idxs[drawn] = self.cumulative.sample_elements(output_idxs[drawn], rng=rng)
+        return output_idxs
+
+    def __len__(self):
+        """
+        Returns the number of items in the distribution.
+        """
+        return len(self.distribution)
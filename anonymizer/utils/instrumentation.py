@@ -0,0 +1,150 @@
+"""
+Lightweight counters and latency histograms for opt-in instrumentation of mechanisms and the `Anonymizer`.
+Recording a latency costs a clock read and an increment of a histogram bucket.
+Updates are not synchronized, so counts are approximate if several threads anonymize at the same time.
+"""
+
+from time import perf_counter_ns
+
+# Latencies up to 2^63 ns fall into one of these power-of-two buckets.
+_NUM_BUCKETS = 65
+
+
+class LatencyHistogram:
+    """
+    A histogram of latencies in nanoseconds with power-of-two buckets:
+    bucket `b` counts latencies of `2^(b-1)` to `2^b - 1` ns (bucket 0 counts latencies of 0 ns).
+    Quantiles are reported as the upper bound of their bucket, i.e., they overestimate by less than a factor of two.
+
+    >>> histogram = LatencyHistogram()
+    >>> for latency in (100, 120, 900, 5000):
+    ...     histogram.record(latency)
+    >>> histogram.count, histogram.total_ns, histogram.quantile(0.5), histogram.quantile(1)
+    (4, 6120, 128, 8192)
+    """
+
+    __slots__ = ("counts", "count", "total_ns")
+
+    def __init__(self):
+        self.counts = [0] * _NUM_BUCKETS
+        self.count = 0
+        self.total_ns = 0
+
+    def record(self, latency_ns):
+        self.counts[latency_ns.bit_length()] += 1
+        self.count += 1
+        self.total_ns += latency_ns
+
+    def merge(self, other):
+        """Adds the latencies recorded by another histogram."""
+        self.counts = [count + other_count for count, other_count in zip(self.counts, other.counts)]
+        self.count += other.count
+        self.total_ns += other.total_ns
+
+    def quantile(self, q):
+        """
+        Returns the upper bound in nanoseconds of the bucket containing the `q`-quantile, or None if nothing was recorded.
+        """
+        if not self.count:
+            return None
+        rank = max(1, q * self.count)
+        seen = 0
+        for bucket, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                return 1 << bucket
+        return 1 << (_NUM_BUCKETS - 1)
+
+    def snapshot(self):
+        """
+        Returns the count, total and mean latency, the p50, p90 and p99 quantiles
+        and the non-empty buckets as pairs of their upper bound and count.
+        """
+        return {
+            "count": self.count,
+            "total_ns": self.total_ns,
+            "mean_ns": self.total_ns / self.count if self.count else None,
+            "p50_ns": self.quantile(0.5),
+            "p90_ns": self.quantile(0.9),
+            "p99_ns": self.quantile(0.99),
+            "buckets": [(1 << bucket, count) for bucket, count in enumerate(self.counts) if count],
+        }
+
+
+def timed(histogram, func, *args):
+    """
+    Calls `func(*args)`, records its latency in the histogram (even if it raises) and returns its result.
+    """
+    start = perf_counter_ns()
+    try:
+        return func(*args)
+    finally:
+        histogram.record(perf_counter_ns() - start)
+
+
+class MechanismStats:
+    """
+    The instrumentation of a mechanism: the number of anonymized values (`calls`),
+    how many of them were found in the state of a stateful mechanism (`hits`) or had to be created (`misses`),
+    the number of values the encoder failed to en- or decode (`encoder_failures`),
+    and histograms of the time spent in `apply` (or `apply_many`), `encode` and `decode`.
+    """
+
+    def __init__(self):
+        self.calls = 0
+        self.hits = 0
+        self.misses = 0
+        self.encoder_failures = 0
+        self.apply = LatencyHistogram()
+        self.encode = LatencyHistogram()
+        self.decode = LatencyHistogram()
+
+    def merge(self, other):
+        """Adds the counts and latencies recorded by another instance, e.g., in a worker process."""
+        self.calls += other.calls
+        self.hits += other.hits
+        self.misses += other.misses
+        self.encoder_failures += other.encoder_failures
+        self.apply.merge(other.apply)
+        self.encode.merge(other.encode)
+        self.decode.merge(other.decode)
+
+    def snapshot(self):
+        return {
+            "calls": self.calls,
+            "hits": self.hits,
+            "misses": self.misses,
+            "encoder_failures": self.encoder_failures,
+            "apply": self.apply.snapshot(),
+            "encode": self.encode.snapshot(),
+            "decode": self.decode.snapshot(),
+        }
+
+
+class TagStats:
+    """
+    The instrumentation of a tag of the `Anonymizer`: the number of Piis anonymized (`calls`),
+    how many of them were returned `unmodified` since no mechanism is defined for the tag,
+    and histograms of the latency of `anonymize_individual` and of anonymizing a partition in `anonymize_batch`.
+    """
+
+    def __init__(self):
+        self.calls = 0
+        self.unmodified = 0
+        self.individual = LatencyHistogram()
+        self.batch = LatencyHistogram()
+
+    def merge(self, other):
+        """Adds the counts and latencies recorded by another instance, e.g., in a worker process."""
+        self.calls += other.calls
+        self.unmodified += other.unmodified
+        self.individual.merge(other.individual)
+        self.batch.merge(other.batch)
+
+    def snapshot(self):
+        return {
+            "calls": self.calls,
+            "unmodified": self.unmodified,
+            "individual": self.individual.snapshot(),
+            "batch": self.batch.snapshot(),
+        }
@@ -0,0 +1,44 @@
+"""
+Derives randomness from a keyed hash (BLAKE2b) of a value.
+The same key and value always result in the same random numbers, in any process or on any machine,
+while the numbers cannot be predicted without the key.
+"""
+
+import hashlib
+import random
+
+# BLAKE2b accepts keys of at most 64 bytes; longer keys are hashed first.
+_MAX_KEY_SIZE = 64
+
+
+def _key_bytes(key):
+    if isinstance(key, str):
+        key = key.encode()
+    if len(key) > _MAX_KEY_SIZE:
+        key = hashlib.blake2b(key).digest()
+    return key
+
+
+def keyed_seed(key, value):
+    """
+    Derives a 64-bit integer from the keyed hash of `str(value)`.
+
+    >>> keyed_seed('secret', 'Alice') == keyed_seed('secret', 'Alice') != keyed_seed('other secret', 'Alice')
+    True
+    """
+    digest = hashlib.blake2b(str(value).encode(), key=_key_bytes(key), digest_size=8).digest()
+    return int.from_bytes(digest, "little")
+
+
+def keyed_uniform(key, value):
+    """
+    Derives a float from the open interval (0, 1) from the keyed hash of `str(value)`.
+    """
+    return ((keyed_seed(key, value) >> 11) + 0.5) / (1 << 53)
+
+
+def keyed_random(key, value):
+    """
+    Returns a `random.Random` instance seeded from the keyed hash of `str(value)`.
+    """
+    return random.Random(keyed_seed(key, value))
@@ -1,4 +1,4 @@
-from pydantic import BaseModel, Extra
+from pydantic import BaseModel, Extra, SecretStr
 
 
 def to_camel_case(snake_case):
@@ -14,3 +14,6 @@ class CamelBaseModel(BaseModel):
         alias_generator = to_camel_case
         allow_population_by_field_name = True
         extra = Extra.forbid
+        # Secrets (e.g., the deterministic key of a mechanism) are serialized on purpose, so that models can be restored
+        # from their JSON. Otherwise, the placeholder `**********` would be restored as the secret.
+        json_encoders = {SecretStr: SecretStr.get_secret_value}
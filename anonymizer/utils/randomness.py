@@ -0,0 +1,146 @@
+"""
+Sources of randomness for mechanisms.
+
+All sources provide `random(size=None)`, which returns a float uniformly drawn from [0, 1),
+or an array of `size` such floats, so they can be used for single draws as well as for batches.
+"""
+
+import os
+import random
+import weakref
+from enum import Enum
+
+import numpy as np
+
+
+class RandomSource(str, Enum):
+    # The operating system's entropy source, read on every draw.
+    system = "system"
+    # A CSPRNG that reads the operating system's entropy source in large blocks.
+    buffered = "buffered"
+    # numpy's PCG64 generator, which can be seeded for reproducible runs.
+    pcg64 = "pcg64"
+    # numpy's Philox generator, which can be seeded for reproducible runs.
+    philox = "philox"
+
+
+def _to_uniforms(words):
+    # Like `random.random`, use the upper 53 bits of 64 random bits.
+    return (words >> np.uint64(11)) * (1.0 / (1 << 53))
+
+
+class SystemRandom(random.SystemRandom):
+    """
+    `random.SystemRandom`, which can additionally draw arrays of floats and be pickled.
+    """
+
+    def random(self, size=None):
+        if size is None:
+            return super().random()
+        return _to_uniforms(np.frombuffer(os.urandom(8 * size), dtype=np.uint64))
+
+    def __reduce__(self):
+        return SystemRandom, ()
+
+
+# All buffered and seeded sources, which are reset in forked processes (see `_reset_after_fork`).
+_fork_sensitive_sources = weakref.WeakSet()
+
+
+def _reset_after_fork():
+    # Forked processes must neither reuse the buffered floats of their parent nor continue its stream.
+    for source in list(_fork_sensitive_sources):
+        source._reset_after_fork()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+class BufferedSystemRandom:
+    """
+    A cryptographically secure source that reads the operating system's entropy source in blocks of `block_size` floats,
+    so that single draws do not need a system call each. Arrays of floats are read with one system call per draw.
+
+    It can be shared between threads without a lock: threads take floats from a shared iterator,
+    which hands out each float once. Buffered floats are discarded in forked processes,
+    so that no two processes ever draw the same numbers.
+
+    >>> rng = BufferedSystemRandom(block_size=4)
+    >>> values = [rng.random() for _ in range(3)] + rng.random(6).tolist()
+    >>> all(0 <= value < 1 for value in values) and len(set(values)) == 9
+    True
+    """
+
+    def __init__(self, block_size=8192):
+        if block_size < 1:
+            raise ValueError("block_size must be positive")
+        self.block_size = block_size
+        self._floats = iter(())
+        _fork_sensitive_sources.add(self)
+
+    def _reset_after_fork(self):
+        self._floats = iter(())
+
+    def random(self, size=None):
+        if size is not None:
+            return _to_uniforms(np.frombuffer(os.urandom(8 * size), dtype=np.uint64))
+        try:
+            return next(self._floats)
+        except StopIteration:
+            # Threads refilling at the same time replace each other's blocks, so no float is handed out twice.
+            floats = iter(_to_uniforms(np.frombuffer(os.urandom(8 * self.block_size), dtype=np.uint64)).tolist())
+            self._floats = floats
+            return next(floats)
+
+    def __getstate__(self):
+        return {"block_size": self.block_size}
+
+    def __setstate__(self, state):
+        self.__init__(**state)
+
+
+class SeededRandom:
+    """
+    A numpy generator (`PCG64` or `Philox`) seeded from `seed`, or from fresh entropy if no seed is given.
+
+    Forked processes, e.g., the workers of `Anonymizer.anonymize_parallel`,
+    continue with an independent stream derived from the seed and their process id.
+
+    >>> SeededRandom(seed=42).random(3).tolist() == SeededRandom(seed=42).random(3).tolist()
+    True
+    """
+
+    def __init__(self, seed=None, bit_generator=np.random.PCG64):
+        self.bit_generator = bit_generator
+        self._seed_sequence = np.random.SeedSequence(seed)
+        self._generator = np.random.Generator(bit_generator(self._seed_sequence))
+        _fork_sensitive_sources.add(self)
+
+    def _reset_after_fork(self):
+        seed_sequence = np.random.SeedSequence(self._seed_sequence.entropy, spawn_key=(os.getpid(),))
+        self._generator = np.random.Generator(self.bit_generator(seed_sequence))
+
+    def random(self, size=None):
+        return self._generator.random(size)
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        _fork_sensitive_sources.add(self)
+
+
+def create_rng(source, seed=None):
+    """
+    Creates a source of randomness of the given `RandomSource`. Only `pcg64` and `philox` can be seeded.
+    """
+    if seed is not None and source not in (RandomSource.pcg64, RandomSource.philox):
+        raise ValueError(f"The random source {source.value} cannot be seeded")
+    if source == RandomSource.system:
+        return SystemRandom()
+    elif source == RandomSource.buffered:
+        return BufferedSystemRandom()
+    elif source == RandomSource.pcg64:
+        return SeededRandom(seed, np.random.PCG64)
+    elif source == RandomSource.philox:
+        return SeededRandom(seed, np.random.Philox)
+    raise ValueError(f"Unknown random source {source!r}")
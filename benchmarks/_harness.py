@@ -0,0 +1,84 @@
+"""
+A minimal benchmark harness based on the standard library.
+
+Each benchmark times individual calls of a function, from which the throughput and latency percentiles are derived.
+The results of a session are written as JSON, which can be compared between versions using `benchmarks.compare`.
+"""
+
+import datetime
+import json
+import os
+import platform
+import sys
+import time
+
+# Scales the number of rounds of all benchmarks, e.g., `ANONYMIZER_BENCHMARK_SCALE=0.1` for a quick smoke run.
+SCALE = float(os.environ.get("ANONYMIZER_BENCHMARK_SCALE", "1"))
+OUTPUT = os.environ.get("ANONYMIZER_BENCHMARK_OUTPUT", os.path.join(os.path.dirname(__file__), "results.json"))
+
+
+def percentile(sorted_values, p):
+    """
+    Returns the p-th percentile of an already sorted list using the nearest-rank method.
+    """
+    rank = max(1, min(len(sorted_values), round(p / 100 * len(sorted_values) + 0.5)))
+    return sorted_values[rank - 1]
+
+
+class BenchmarkSession:
+    """
+    Collects the results of all benchmarks run in one session.
+    """
+
+    def __init__(self):
+        self.results = []
+
+    def run(self, group, name, func, items=1, rounds=1000, warmup=10):
+        """
+        Calls `func` `rounds` times (after `warmup` untimed calls) and records the result.
+        `items` is the number of values processed per call and is used to compute the throughput.
+        Returns the return value of the last call, which allows the benchmark to check it.
+        """
+        rounds = max(1, int(rounds * SCALE))
+        for _ in range(warmup):
+            func()
+
+        timings = []
+        perf_counter = time.perf_counter
+        for _ in range(rounds):
+            start = perf_counter()
+            result = func()
+            timings.append(perf_counter() - start)
+
+        total = sum(timings)
+        timings.sort()
+        self.results.append(
+            {
+                "group": group,
+                "name": name,
+                "rounds": rounds,
+                "items_per_round": items,
+                "total_seconds": total,
+                "throughput_per_second": rounds * items / total if total > 0 else float("inf"),
+                "mean_us": total / rounds * 1e6,
+                "p50_us": percentile(timings, 50) * 1e6,
+                "p99_us": percentile(timings, 99) * 1e6,
+            }
+        )
+        return result
+
+    def metadata(self):
+        return {
+            "created": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            "python": sys.version,
+            "implementation": platform.python_implementation(),
+            "platform": platform.platform(),
+            "scale": SCALE,
+        }
+
+    def write(self, path=OUTPUT):
+        """
+        Writes the results and some metadata on the environment as JSON.
+        """
+        with open(path, "w") as f:
+            json.dump({"metadata": self.metadata(), "results": self.results}, f, indent=2)
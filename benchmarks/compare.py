@@ -0,0 +1,51 @@
+"""
+Compares two benchmark result files and reports changes in throughput and p99 latency:
+
+    python -m benchmarks.compare old.json new.json --threshold 0.1
+
+Exits with status 1 if the throughput of any benchmark dropped by more than the threshold.
+"""
+
+import argparse
+import json
+import sys
+
+
+def _load(path):
+    with open(path) as f:
+        return {(result["group"], result["name"]): result for result in json.load(f)["results"]}
+
+
+def compare(old, new, threshold):
+    """
+    Returns the report lines and whether any benchmark regressed by more than `threshold`.
+    """
+    lines = [f"{'benchmark':<60} {'throughput':>12} {'p99':>10}"]
+    regressed = False
+    for key in sorted(old.keys() & new.keys()):
+        throughput_change = new[key]["throughput_per_second"] / old[key]["throughput_per_second"] - 1
+        p99_change = new[key]["p99_us"] / old[key]["p99_us"] - 1
+        marker = ""
+        if throughput_change < -threshold:
+            regressed = True
+            marker = "  <-- regression"
+        lines.append(f"{'/'.join(key):<60} {throughput_change:>+11.1%} {p99_change:>+9.1%}{marker}")
+    for key in sorted(old.keys() ^ new.keys()):
+        lines.append(f"{'/'.join(key):<60} {'only in ' + ('old' if key in old else 'new'):>23}")
+    return lines, regressed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="benchmarks.compare", description="Compares two benchmark result files.")
+    parser.add_argument("old")
+    parser.add_argument("new")
+    parser.add_argument("--threshold", type=float, default=0.1, help="relative throughput drop regarded as regression")
+    args = parser.parse_args(argv)
+
+    lines, regressed = compare(_load(args.old), _load(args.new), args.threshold)
+    print("\n".join(lines))
+    return 1 if regressed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,15 @@
+import pytest
+
+from ._harness import BenchmarkSession
+
+_session = BenchmarkSession()
+
+
+@pytest.fixture(scope="session")
+def benchmark():
+    return _session
+
+
+def pytest_sessionfinish(session, exitstatus):
+    if _session.results:
+        _session.write()
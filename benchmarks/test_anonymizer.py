@@ -0,0 +1,50 @@
+import pytest
+
+from anonymizer.anonymization.anonymizer import Anonymizer
+from anonymizer.anonymization.config import AnonymizerConfig
+from anonymizer.anonymization.pii import Pii
+from anonymizer.encoders import EncoderType
+from anonymizer.mechanisms.generalization import Generalization
+from anonymizer.mechanisms.laplace_noise import LaplaceNoise
+from anonymizer.mechanisms.pseudonymization import Pseudonymization
+from anonymizer.mechanisms.suppression import Suppression
+
+NUM_PIIS = 1000
+
+
+@pytest.fixture()
+def anonymizer():
+    config = AnonymizerConfig(
+        default_mechanism=Suppression(),
+        mechanisms_by_tag={
+            "name": Pseudonymization(format_string="Person {}", stateful=True),
+            "location": Generalization(replacement="<LOCATION>"),
+            "date": LaplaceNoise(epsilon=0.01, encoder=EncoderType.datetime),
+        },
+    )
+    return Anonymizer(config)
+
+
+@pytest.fixture()
+def piis():
+    tags = ["name", "location", "date", "phone"]
+    texts = {"name": "Person {}", "location": "City {}", "date": "2012-01-{:02d}", "phone": "0123 {}"}
+    return [Pii(tags[i % 4], texts[tags[i % 4]].format(i % 28 + 1), str(i)) for i in range(NUM_PIIS)]
+
+
+def test_anonymize(benchmark, anonymizer, piis):
+    result = benchmark.run("anonymizer", "anonymize", lambda: list(anonymizer.anonymize(piis)), items=NUM_PIIS, rounds=50)
+    assert len(result) == NUM_PIIS
+
+
+def test_anonymize_individual(benchmark, anonymizer, piis):
+    pii = piis[0]
+    assert benchmark.run("anonymizer", "anonymize_individual", lambda: anonymizer.anonymize_individual(pii), rounds=5000)
+
+
+def test_anonymize_batch(benchmark, anonymizer, piis):
+    tags, texts, ids = [pii.tag for pii in piis], [pii.text for pii in piis], [pii.id for pii in piis]
+    result = benchmark.run(
+        "anonymizer", "anonymize_batch", lambda: anonymizer.anonymize_batch(tags, texts, ids), items=NUM_PIIS, rounds=50
+    )
+    assert len(result) == NUM_PIIS
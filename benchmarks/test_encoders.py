@@ -0,0 +1,28 @@
+import pytest
+
+from anonymizer.encoders.datetime import DateTimeEncoder
+from anonymizer.encoders.delimited_number import DelimitedNumberEncoder
+
+ENCODERS = {
+    "datetime": (DateTimeEncoder, "2012-01-18 12:21:08"),
+    "datetime_time": (DateTimeEncoder, "10:30AM"),
+    "delimited_number": (DelimitedNumberEncoder, "+49 123 456"),
+    "delimited_number_float": (DelimitedNumberEncoder, "1.234,56 €"),
+}
+
+
+@pytest.mark.parametrize("name", ENCODERS)
+def test_encode(benchmark, name):
+    encoder_type, value = ENCODERS[name]
+    encoder = encoder_type()
+    encoded, _ = benchmark.run("encoders.encode", name, lambda: encoder.encode(value), rounds=5000)
+    assert isinstance(encoded, float)
+
+
+@pytest.mark.parametrize("name", ENCODERS)
+def test_decode(benchmark, name):
+    encoder_type, value = ENCODERS[name]
+    encoder = encoder_type()
+    encoded, ctx = encoder.encode(value)
+    decoded = benchmark.run("encoders.decode", name, lambda: encoder.decode(encoded, ctx), rounds=5000)
+    assert isinstance(decoded, str)
@@ -0,0 +1,57 @@
+import random
+
+import pytest
+
+from anonymizer.encoders import EncoderType
+from anonymizer.mechanisms.generalization import Generalization
+from anonymizer.mechanisms.laplace_noise import LaplaceNoise
+from anonymizer.mechanisms.pseudonymization import Pseudonymization
+from anonymizer.mechanisms.randomized_response import RandomizedResponse, RandomizedResponseMode
+from anonymizer.mechanisms.suppression import Suppression
+
+BATCH_SIZE = 1000
+VOCABULARY = [f"value {i}" for i in range(100)]
+
+MECHANISMS = {
+    "suppression": (lambda: Suppression(), "Darth Vader"),
+    "suppression_random_length": (lambda: Suppression(custom_length=lambda _: random.randint(1, 9)), "Darth Vader"),
+    "suppression_stateful": (lambda: Suppression(custom_length=lambda _: random.randint(1, 9), stateful=True), "Vader"),
+    "generalization": (lambda: Generalization(replacement="<NAME>"), "Darth Vader"),
+    "generalization_function": (lambda: Generalization(replacement=lambda x: x.split()[0]), "Darth Vader"),
+    "pseudonymization": (lambda: Pseudonymization(format_string="Person {}"), "Darth Vader"),
+    "pseudonymization_stateful": (lambda: Pseudonymization(format_string="Person {}", stateful=True), "Darth Vader"),
+    "laplace_noise": (lambda: LaplaceNoise(epsilon=1), "42.0"),
+    "laplace_noise_datetime": (lambda: LaplaceNoise(epsilon=0.01, encoder=EncoderType.datetime), "2012-01-18 12:21:08"),
+    "laplace_noise_delimited_number": (lambda: LaplaceNoise(epsilon=1, encoder=EncoderType.delimited_number), "1.234,56 €"),
+    "randomized_response_custom": (
+        lambda: RandomizedResponse(values=VOCABULARY, probability_distribution=[1] * len(VOCABULARY)),
+        VOCABULARY[-1],
+    ),
+    "randomized_response_dp": (
+        lambda: RandomizedResponse(values=VOCABULARY, epsilon=1, mode=RandomizedResponseMode.dp),
+        VOCABULARY[-1],
+    ),
+    "randomized_response_coin": (
+        lambda: RandomizedResponse(values=VOCABULARY, coin_p=0.5, mode=RandomizedResponseMode.coin),
+        VOCABULARY[-1],
+    ),
+}
+
+
+@pytest.mark.parametrize("name", MECHANISMS)
+def test_anonymize(benchmark, name):
+    create, input_value = MECHANISMS[name]
+    mechanism = create()
+    result = benchmark.run("mechanisms.anonymize", name, lambda: mechanism.anonymize(input_value), rounds=5000)
+    assert result is not None
+
+
+@pytest.mark.parametrize("name", MECHANISMS)
+def test_anonymize_many(benchmark, name):
+    create, input_value = MECHANISMS[name]
+    mechanism = create()
+    input_values = [input_value] * BATCH_SIZE
+    result = benchmark.run(
+        "mechanisms.anonymize_many", name, lambda: mechanism.anonymize_many(input_values), items=BATCH_SIZE, rounds=50
+    )
+    assert len(result) == BATCH_SIZE
@@ -0,0 +1,30 @@
+import pytest
+
+from anonymizer.utils.dateutil.parser import parse
+
+FORMATS = {
+    "iso_date": "2003-09-25",
+    "iso_datetime": "2003-09-25T10:49:41",
+    "iso_stripped": "20030925T104941",
+    "iso_timezone": "2003-09-25T10:49:41.5-03:00",
+    "date_command": "Thu Sep 25 10:36:28 BRST 2003",
+    "us_date": "09/25/2003",
+    "dotted_date": "25.09.2003",
+    "month_name": "25 September 2003",
+    "abbreviated": "Sep 25 2003",
+    "time_am_pm": "10:36:28 PM",
+    "time": "10:36",
+}
+
+
+@pytest.mark.parametrize("name", FORMATS)
+def test_parse(benchmark, name):
+    timestr = FORMATS[name]
+    benchmark.run("parser.parse", name, lambda: parse(timestr), rounds=2000)
+
+
+@pytest.mark.parametrize("name", FORMATS)
+def test_parse_with_format(benchmark, name):
+    timestr = FORMATS[name]
+    _, fmt = benchmark.run("parser.parse_return_format", name, lambda: parse(timestr, return_format=True), rounds=2000)
+    assert fmt is not None
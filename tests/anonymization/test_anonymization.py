@@ -1,10 +1,16 @@
+import asyncio
+import os
+
 import pytest
 
 from anonymizer.anonymization.anonymizer import Anonymizer
 from anonymizer.anonymization.config import AnonymizerConfig
-from anonymizer.anonymization.pii import Pii, AnonymizedPii
+from anonymizer.anonymization.pii import Pii, AnonymizedPii, PiiRecord, AnonymizedPiiRecord
+from anonymizer.mechanisms.generalization import Generalization
+from anonymizer.mechanisms.laplace_noise import LaplaceNoise
 from anonymizer.mechanisms.pseudonymization import PseudonymizationParameters, Pseudonymization
 from anonymizer.mechanisms.suppression import SuppressionParameters, Suppression
+from anonymizer.state import BoundedCache, SqliteBackend
 
 
 @pytest.fixture()
@@ -61,3 +67,326 @@ def test_without_default(piis):
     assert anonymizer.anonymize(piis[0]) == anonymized_piis[0]
 
     assert list(anonymizer.anonymize(piis)) == anonymized_piis
+
+
+def test_batch(piis):
+    config = AnonymizerConfig(
+        default_mechanism=Suppression(),
+        mechanisms_by_tag={
+            "foo": Suppression(suppression_char="Y", custom_length=3),
+            "bar": Pseudonymization(format_string="Bar {}", stateful=True),
+        },
+    )
+    anonymizer = Anonymizer(config)
+
+    anonymized_piis = [
+        AnonymizedPii.from_pii(piis[0], "XXXXX"),
+        AnonymizedPii.from_pii(piis[1], "YYY"),
+        AnonymizedPii.from_pii(piis[2], "Bar 1"),
+        AnonymizedPii.from_pii(piis[3], "Bar 1"),
+    ]
+
+    tags, texts, ids = zip(*[(pii.tag, pii.text, pii.id) for pii in piis])
+    assert anonymizer.anonymize_batch(tags, texts, ids) == anonymized_piis
+    assert anonymizer.anonymize_batch([], []) == []
+
+    with pytest.raises(ValueError):
+        anonymizer.anonymize_batch(["foo"], ["a", "b"])
+
+
+def test_batch_without_default(piis):
+    anonymizer = Anonymizer(AnonymizerConfig(mechanisms_by_tag={"foo": Suppression()}))
+    anonymized = anonymizer.anonymize_batch(["test", "foo"], ["Alpha", "Beta"])
+    assert anonymized == [AnonymizedPii("test", "Alpha"), AnonymizedPii("foo", "XXXX", modified=True)]
+
+
+def test_parallel():
+    config = AnonymizerConfig(
+        default_mechanism=Suppression(),
+        mechanisms_by_tag={
+            "name": Pseudonymization(format_string="Person {}", stateful=True),
+            "other": Pseudonymization(format_string="Other {}"),
+        },
+    )
+    anonymizer = Anonymizer(config)
+
+    names = [f"Name {i % 50}" for i in range(200)]
+    piis = [Pii("name", name, i) for i, name in enumerate(names)] + [Pii("other", "x"), Pii("other", "x"), Pii("foo", "Beta")]
+    anonymized = anonymizer.anonymize_parallel(piis, workers=3)
+
+    assert [pii.id for pii in anonymized] == [pii.id for pii in piis]
+    pseudonyms = {}
+    for name, anonymized_pii in zip(names, anonymized):
+        assert pseudonyms.setdefault(name, anonymized_pii.text) == anonymized_pii.text
+    assert len(set(pseudonyms.values())) == 50
+    assert anonymized[-3].text != anonymized[-2].text
+    assert anonymized[-1] == AnonymizedPii("foo", "XXXX", modified=True)
+
+    # The workers' states are merged back.
+    assert anonymizer.anonymize(Pii("name", "Name 7")).text == pseudonyms["Name 7"]
+    assert anonymizer.anonymize(Pii("name", "Name 50")).text not in pseudonyms.values()
+    # Counter values are only reserved for distinct names without a pseudonym.
+    assert sorted(pseudonyms.values()) == sorted(f"Person {i}" for i in range(1, 51))
+    anonymizer.anonymize_parallel(piis, workers=3)
+    assert anonymizer.anonymize(Pii("name", "Name 51")).text == "Person 52"
+
+    assert anonymizer.anonymize_parallel(piis[:3], workers=1) == anonymized[:3]
+    with pytest.raises(ValueError):
+        anonymizer.anonymize_parallel(piis, workers=-1)
+
+
+def test_state(tmp_path):
+    def create_anonymizer():
+        return Anonymizer(
+            AnonymizerConfig(
+                default_mechanism=Generalization(replacement=lambda text: text.upper(), stateful=True),
+                mechanisms_by_tag={
+                    "name": Pseudonymization(format_string="Person {}", stateful=True, thread_safe=True),
+                    "alias": Pseudonymization(format_string="Alias {}", stateful=True, compact_state=True),
+                    "length": Suppression(custom_length=lambda n: n + 1, stateful=True),
+                },
+            )
+        )
+
+    piis = [Pii(tag, f"{tag} {i % 40}") for tag in ("name", "alias", "length", "foo") for i in range(100)]
+    anonymizer = create_anonymizer()
+    anonymized = anonymizer.anonymize_batch([pii.tag for pii in piis], [pii.text for pii in piis])
+    anonymizer.save_state(str(tmp_path / "state"))
+
+    restarted = create_anonymizer()
+    restarted.load_state(str(tmp_path / "state"))
+    assert restarted.anonymize_batch([pii.tag for pii in piis], [pii.text for pii in piis]) == anonymized
+    assert restarted.anonymize(Pii("name", "new")).text == "Person 41"
+    assert restarted.anonymize(Pii("alias", "new")).text == "Alias 41"
+
+    # Snapshots of restored anonymizers contain both the loaded and the new state.
+    restarted.save_state(str(tmp_path / "state 2"))
+    restarted = create_anonymizer()
+    restarted.load_state(str(tmp_path / "state 2"))
+    texts = [pii.text for pii in restarted.anonymize(piis[:2] + [Pii("name", "new"), Pii("name", "newer")])]
+    assert texts[:3] == ["Person 1", "Person 2", "Person 41"]
+    # Thread-safe pseudonymizations resume after the last reserved block of counter values.
+    assert texts[3] not in [pii.text for pii in anonymized] + texts[:3]
+
+    # Saving back to the loaded snapshot does not modify it while it is memory-mapped.
+    expected = [pii.text for pii in restarted.anonymize(piis)]
+    restarted.save_state(str(tmp_path / "state 2"))
+    assert [pii.text for pii in restarted.anonymize(piis)] == expected
+    restarted.load_state(str(tmp_path / "state 2"))
+    assert [pii.text for pii in restarted.anonymize(piis)] == expected
+    assert sorted(os.listdir(tmp_path)) == ["state", "state 2"]
+
+
+def test_state_backend_after_load(tmp_path):
+    def create_anonymizer(**kwargs):
+        return Anonymizer(
+            AnonymizerConfig(mechanisms_by_tag={"name": Pseudonymization(format_string="Person {}", stateful=True, **kwargs)})
+        )
+
+    anonymizer = create_anonymizer()
+    list(anonymizer.anonymize([Pii("name", f"name {i}") for i in range(10)]))
+    anonymizer.save_state(str(tmp_path / "state"))
+
+    # New anonymizations are kept in the configured backend, on top of the snapshot.
+    bounded = create_anonymizer(max_state_entries=5)
+    bounded.load_state(str(tmp_path / "state"))
+    list(bounded.anonymize([Pii("name", f"new {i}") for i in range(20)]))
+    mechanism = bounded.mechanisms_by_tag["name"]
+    assert isinstance(mechanism.anonymizations.layer, BoundedCache) and len(mechanism.anonymizations.layer) == 5
+    assert bounded.anonymize(Pii("name", "name 3")).text == "Person 4"
+
+    backend = SqliteBackend(str(tmp_path / "state.db"))
+    persisted = create_anonymizer(state_backend=backend)
+    persisted.load_state(str(tmp_path / "state"))
+    assert persisted.anonymize(Pii("name", "new")).text == "Person 11"
+    backend.flush()
+    assert backend["new"] == "Person 11" and "name 3" not in backend
+
+    with pytest.raises(ValueError):
+        Anonymizer(AnonymizerConfig(default_mechanism=Suppression())).load_state(str(tmp_path / "state"))
+
+
+def test_stream(piis):
+    config = AnonymizerConfig(
+        mechanisms_by_tag={
+            "foo": Suppression(suppression_char="Y", custom_length=3),
+            "bar": Pseudonymization(format_string="Bar {}", stateful=True),
+        }
+    )
+    anonymizer = Anonymizer(config)
+
+    async def source():
+        yield piis[0]
+        yield piis[1:3]
+        yield []
+        yield piis[3]
+
+    async def collect(batch_size):
+        return [pii async for pii in anonymizer.anonymize_stream(source(), batch_size=batch_size)]
+
+    anonymized_piis = [
+        AnonymizedPii.from_pii(piis[0]),
+        AnonymizedPii.from_pii(piis[1], "YYY"),
+        AnonymizedPii.from_pii(piis[2], "Bar 1"),
+        AnonymizedPii.from_pii(piis[3], "Bar 1"),
+    ]
+    assert asyncio.run(collect(1)) == anonymized_piis
+    assert asyncio.run(collect(3)) == anonymized_piis
+    assert asyncio.run(collect(100)) == anonymized_piis
+
+    with pytest.raises(ValueError):
+        asyncio.run(collect(0))
+
+
+def test_records(piis):
+    config = AnonymizerConfig(mechanisms_by_tag={"bar": Pseudonymization(format_string="Bar {}", stateful=True)})
+    anonymizer = Anonymizer(config)
+
+    records = anonymizer.anonymize_batch(["foo", "bar", "bar"], ["Beta", "Gamma", "Gamma"], [1, 2, 3], as_records=True)
+    assert records == [
+        AnonymizedPiiRecord("foo", "Beta", 1, False),
+        AnonymizedPiiRecord("bar", "Bar 1", 2, True),
+        AnonymizedPiiRecord("bar", "Bar 1", 3, True),
+    ]
+    assert [record.to_pii() for record in records] == [
+        AnonymizedPii.from_pii(piis[1]),
+        AnonymizedPii.from_pii(piis[2], "Bar 1"),
+        AnonymizedPii.from_pii(piis[3], "Bar 1"),
+    ]
+
+    pii_records = [PiiRecord("bar", "Delta"), PiiRecord("foo", "Beta")]
+    assert anonymizer.anonymize_parallel(pii_records, workers=2, as_records=True) == [
+        AnonymizedPiiRecord("bar", "Bar 2", None, True),
+        AnonymizedPiiRecord("foo", "Beta", None, False),
+    ]
+
+    async def source():
+        yield pii_records[0]
+        yield pii_records
+
+    async def collect():
+        return [record async for record in anonymizer.anonymize_stream(source(), as_records=True)]
+
+    assert [record.text for record in asyncio.run(collect())] == ["Bar 2", "Bar 2", "Beta"]
+
+    # Numeric replacements are converted to strings just like in `AnonymizedPii`s.
+    config = AnonymizerConfig(mechanisms_by_tag={"number": LaplaceNoise(epsilon=1, deterministic_key="secret")})
+    anonymizer = Anonymizer(config)
+    records = anonymizer.anonymize_batch(["number"], ["1.5"], as_records=True)
+    assert isinstance(records[0].text, str)
+    assert [record.to_pii() for record in records] == anonymizer.anonymize_batch(["number"], ["1.5"])
+
+
+def test_document():
+    config = AnonymizerConfig(
+        mechanisms_by_tag={
+            "name": Pseudonymization(format_string="Person {}", stateful=True),
+            "city": Suppression(custom_length=1),
+        }
+    )
+    anonymizer = Anonymizer(config)
+
+    text = "Alice moved to Berlin. Bob visited Alice in Berlin on Monday."
+    spans = [(0, 5, "name"), (15, 21, "city"), (23, 26, "name"), (35, 40, "name"), (44, 50, "city"), (54, 60, "date")]
+    anonymized, shifted_spans = anonymizer.anonymize_document(text, spans)
+
+    assert anonymized == "Person 1 moved to X. Person 2 visited Person 1 in X on Monday."
+    assert [anonymized[start:end] for start, end, _ in shifted_spans] == [
+        "Person 1",
+        "X",
+        "Person 2",
+        "Person 1",
+        "X",
+        "Monday",
+    ]
+    assert [tag for _, _, tag in shifted_spans] == [tag for _, _, tag in spans]
+
+    # Spans are returned in input order.
+    _, reversed_spans = anonymizer.anonymize_document(text, spans[::-1])
+    assert reversed_spans == shifted_spans[::-1]
+
+    assert anonymizer.anonymize_document(text, []) == (text, [])
+    assert anonymizer.anonymize_document("", [(0, 0, "city")]) == ("X", [(0, 1, "city")])
+
+    for invalid_spans in ([(0, 5, "name"), (3, 8, "name")], [(5, 3, "name")], [(0, 100, "name")]):
+        with pytest.raises(ValueError):
+            anonymizer.anonymize_document(text, invalid_spans)
+
+
+def test_batch_deduplication():
+    calls = []
+
+    class CountingSuppression(Suppression):
+        def apply_many(self, input_values):
+            calls.append(list(input_values))
+            return super().apply_many(input_values)
+
+    pure = CountingSuppression()
+    randomized = CountingSuppression(custom_length=lambda length: length + 1)
+    anonymizer = Anonymizer(AnonymizerConfig(mechanisms_by_tag={"pure": pure, "random": randomized}))
+
+    texts = ["Alpha", "Beta", "Alpha", "Alpha"]
+    anonymized = anonymizer.anonymize_batch(["pure"] * 4 + ["random"] * 4, texts * 2)
+    assert [pii.text for pii in anonymized] == ["XXXXX", "XXXX", "XXXXX", "XXXXX", "XXXXXX", "XXXXX", "XXXXXX", "XXXXXX"]
+    # Pure mechanisms are invoked once per distinct text, others once per occurrence.
+    assert calls == [["Alpha", "Beta"], texts]
+
+    assert pure.deterministic
+    assert not randomized.deterministic
+    assert CountingSuppression(custom_length=lambda length: length, stateful=True).deterministic
+
+
+def test_consistency_by_id(tmp_path):
+    def create_anonymizer(consistency_key):
+        return Anonymizer(
+            AnonymizerConfig(
+                mechanisms_by_tag={"name": Pseudonymization(format_string="Person {}", stateful=True)},
+                consistency_key=consistency_key,
+            )
+        )
+
+    piis = [Pii("name", "Dr. Smith", "1"), Pii("name", "Smith", "1"), Pii("name", "Smith"), Pii("name", "Dr. Smith", "2")]
+    anonymizer = create_anonymizer("id")
+    assert [pii.text for pii in anonymizer.anonymize_batch(*zip(*[(p.tag, p.text, p.id) for p in piis]))] == [
+        "Person 1",
+        "Person 1",
+        "Person 3",
+        "Person 2",
+    ]
+    assert anonymizer.anonymize(Pii("name", "Mr. Smith", "2")).text == "Person 2"
+    assert anonymizer.anonymize(Pii("name", "Smith")).text == "Person 3"
+
+    # Workers shard by id, so all texts of an entity are anonymized by the same worker.
+    anonymized = anonymizer.anonymize_parallel([Pii("name", f"Name {i}", str(i % 10)) for i in range(100)], workers=3)
+    assert all(anonymized[i].text == anonymized[i % 10].text for i in range(100))
+    assert anonymizer.anonymize(Pii("name", "Someone", "7")).text == anonymized[7].text
+
+    anonymizer.save_state(str(tmp_path / "state"))
+    restarted = create_anonymizer("id")
+    restarted.load_state(str(tmp_path / "state"))
+    assert restarted.anonymize(Pii("name", "Smith", "1")).text == "Person 1"
+    assert restarted.anonymize(Pii("name", "Smith")).text == "Person 3"
+
+    anonymizer = create_anonymizer("text")
+    assert [pii.text for pii in anonymizer.anonymize(piis)] == ["Person 1", "Person 2", "Person 2", "Person 1"]
+
+
+def test_stats(piis):
+    config = AnonymizerConfig(
+        mechanisms_by_tag={"test": Suppression(), "bar": Pseudonymization(format_string="Bar {}", stateful=True)},
+    )
+    assert Anonymizer(config).stats() is None
+
+    anonymizer = Anonymizer(config, instrumented=True)
+    list(anonymizer.anonymize(piis))
+    anonymizer.anonymize_batch(["bar", "foo"], ["Gamma", "Beta"])
+    anonymizer.anonymize_parallel([Pii("bar", f"Name {i % 5}") for i in range(20)], workers=2)
+
+    stats = anonymizer.stats()
+    assert stats["tags"]["test"]["calls"] == 1 and stats["tags"]["test"]["individual"]["count"] == 1
+    assert stats["tags"]["foo"]["calls"] == stats["tags"]["foo"]["unmodified"] == 2
+    assert stats["tags"]["bar"]["calls"] == 23 and stats["tags"]["bar"]["batch"]["count"] == 3
+    bar = stats["mechanisms"]["bar"]
+    # Batches are deduplicated before they are passed to deterministic mechanisms.
+    assert (bar["calls"], bar["hits"], bar["misses"]) == (8, 2, 6)
+    assert stats["default_mechanism"] is None
@@ -46,3 +46,21 @@ def test_detect_mismatched_options():
     with pytest.raises(PydanticValidationError):
         a = AnonymizerConfig(**config_dict)
         print(type(a.mechanisms_by_tag["tag1"]))
+
+
+def test_json_of_default_mechanisms():
+    config_dict = {
+        "defaultMechanism": {"mechanism": "generalization", "config": {"replacement": "<other>"}},
+        "mechanismsByTag": {
+            "tag1": {"mechanism": "suppression", "config": {"customLength": 42, "stateful": True}},
+            "tag2": {"mechanism": "pseudonymization", "config": {"formatString": "Person {}", "stateful": True}},
+            "tag3": {"mechanism": "laplaceNoise", "config": {"epsilon": 1}},
+            "tag4": {"mechanism": "randomizedResponse", "config": {"values": ["a", "b"], "mode": "dp", "epsilon": 1}},
+        },
+    }
+    config = AnonymizerConfig(**config_dict)
+    config.mechanisms_by_tag["tag2"].config.anonymize("Alice")
+
+    # The state of the mechanisms is not part of their configuration.
+    assert "anonymizations" not in config.json()
+    assert AnonymizerConfig.parse_raw(config.json(by_alias=True)) == config
@@ -0,0 +1,56 @@
+import pickle
+import re
+
+from anonymizer.anonymization.config import AnonymizerConfig
+from anonymizer.anonymization.plan import DispatchPlan
+from anonymizer.encoders import EncoderType
+from anonymizer.mechanisms.laplace_noise import LaplaceNoise
+from anonymizer.mechanisms.pseudonymization import PseudonymizationParameters, Pseudonymization
+from anonymizer.mechanisms.suppression import Suppression
+
+
+def test_compile():
+    config = AnonymizerConfig(
+        default_mechanism=Suppression(),
+        mechanisms_by_tag={
+            "foo": Suppression(suppression_char="Y", custom_length=3),
+            "bar": PseudonymizationParameters(config=Pseudonymization(format_string="Bar {}", stateful=True)),
+        },
+    )
+    plan = config.compile()
+    pseudonymization = config.mechanisms_by_tag["bar"].config
+
+    assert plan.mechanism_for("bar") is pseudonymization
+    assert plan.mechanism_for("unknown") is plan.default_mechanism
+    assert plan("foo", "Alpha") == "YYY"
+    assert plan("unknown", "Alpha") == "XXXXX"
+    assert plan.resolve("unknown")("Beta") == "XXXX"
+
+    # The stateful lookup is shared with the mechanism itself.
+    assert plan("bar", "Gamma") == "Bar 1"
+    assert plan("bar", "Delta") == "Bar 2"
+    assert pseudonymization.anonymize("Gamma") == "Bar 1"
+    assert plan("bar", "Gamma") == "Bar 1"
+
+
+def test_without_default():
+    plan = AnonymizerConfig(mechanisms_by_tag={"foo": Suppression()}).compile()
+    assert plan.default_mechanism is None
+    assert plan.mechanism_for("unknown") is None
+    assert plan("unknown", "Alpha") is None
+
+
+def test_encoder():
+    mechanism = LaplaceNoise(epsilon=1, encoder=EncoderType.datetime)
+    plan = DispatchPlan({"date": mechanism})
+    assert re.fullmatch("\\d{4}-\\d{2}-\\d{2}", plan("date", "2012-01-18"))
+
+
+def test_pickle():
+    plan = DispatchPlan({"foo": Suppression(stateful=True)}, Pseudonymization(format_string="Bar {}"))
+    plan("foo", "Alpha")
+
+    unpickled = pickle.loads(pickle.dumps(plan))
+    assert unpickled("foo", "Beta") == "XXXX"
+    assert unpickled("unknown", "Alpha") == "Bar 1"
+    assert unpickled.mechanism_for("foo").anonymizations == {"Alpha": "XXXXX", "Beta": "XXXX"}
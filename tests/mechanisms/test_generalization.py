@@ -15,3 +15,19 @@ def test_simple():
 def test_invalid_arguments():
     with pytest.raises(ValidationError):
         Generalization()
+
+
+def test_many():
+    mechanism = Generalization(replacement="<NAME>")
+    assert mechanism.anonymize_many(["Darth Vader", "Luke"]) == ["<NAME>", "<NAME>"]
+
+    mechanism = Generalization(replacement=lambda x: x.split()[0] + " person")
+    assert mechanism.anonymize_many(["a woman", "the man"]) == ["a person", "the person"]
+
+
+def test_pure():
+    assert Generalization(replacement="<NAME>").pure
+    assert not Generalization(replacement=lambda x: x).pure
+
+    anonymize = Generalization(replacement="<NAME>").compile()
+    assert anonymize("Darth Vader") is anonymize("Luke") == "<NAME>"
@@ -1,7 +1,9 @@
 import numpy as np
 from numpy.random import Generator, PCG64
 import pytest
+from pydantic import ValidationError
 
+from anonymizer.anonymization.config import AnonymizerConfig
 from anonymizer.encoders import EncoderType
 from anonymizer.mechanisms.laplace_noise import LaplaceNoise
 from anonymizer.utils.dateutil.parser import ParserError
@@ -55,3 +57,49 @@ def test_delimited_number():
     assert mechanism.anonymize("12.14 €") == "-33.51 €"
 
     np.random = rng
+
+
+def test_many():
+    mechanism = LaplaceNoise(epsilon=10000000000)
+    anonymized = mechanism.anonymize_many(["1.5", 2, "-3"])
+    assert np.allclose(anonymized, [1.5, 2, -3], atol=0.1)
+    with pytest.raises(ValueError):
+        mechanism.anonymize_many(["1.5", "Foobar"])
+
+    mechanism = LaplaceNoise(epsilon=10000000000, stateful=True, encoder=EncoderType.delimited_number)
+    assert mechanism.anonymize_many(["12.14 €", "1,000", "12.14 €"]) == ["12.14 €", "1,000", "12.14 €"]
+
+
+def test_deterministic_key():
+    inputs = ["1.5", "2", "-3", "1.5"]
+    outputs = LaplaceNoise(epsilon=1.0, deterministic_key="secret").anonymize_many(inputs)
+    assert outputs[0] == outputs[3]
+    assert outputs != inputs
+
+    # Independent instances with the same key agree, without sharing any state.
+    mechanism = LaplaceNoise(epsilon=1.0, deterministic_key="secret")
+    assert mechanism.deterministic
+    assert [mechanism.anonymize(input_value) for input_value in inputs] == outputs
+    assert LaplaceNoise(epsilon=1.0, deterministic_key="other secret").anonymize_many(inputs) != outputs
+
+    # The key survives a round trip through JSON, also as part of a configuration.
+    restored = LaplaceNoise.parse_raw(mechanism.json())
+    assert restored.anonymize_many(inputs) == outputs
+    config = AnonymizerConfig(mechanisms_by_tag={"number": mechanism})
+    assert AnonymizerConfig.parse_raw(config.json()).mechanisms_by_tag["number"].anonymize_many(inputs) == outputs
+    # The placeholder shown instead of the key is not accepted as a key.
+    with pytest.raises(ValidationError):
+        LaplaceNoise(epsilon=1.0, deterministic_key=str(mechanism.deterministic_key))
+
+
+def test_random_source():
+    inputs = [0.0] * 20000
+    outputs = LaplaceNoise(epsilon=2.0, random_source="buffered").anonymize_many(inputs)
+    # The mean absolute deviation of the laplace distribution is its scale.
+    assert 0.45 < np.mean(np.abs(outputs)) < 0.55
+
+    def create_mechanism():
+        return LaplaceNoise(epsilon=1.0, random_source="philox", random_seed=3)
+
+    assert create_mechanism().anonymize_many(inputs[:10]) == create_mechanism().anonymize_many(inputs[:10])
+    assert LaplaceNoise(epsilon=1.0).rng is None
@@ -1,3 +1,5 @@
+from concurrent.futures import ThreadPoolExecutor
+
 import pytest
 from pydantic import ValidationError
 
@@ -24,3 +26,46 @@ def test_initial_value(input_value):
 def test_invalid_arguments(input_value):
     with pytest.raises(ValidationError):
         Pseudonymization()
+
+
+def test_many(input_value):
+    mechanism = Pseudonymization(format_string="Test ({})")
+    assert mechanism.anonymize_many([input_value, input_value]) == ["Test (1)", "Test (2)"]
+    assert mechanism.anonymize(input_value) == "Test (3)"
+    assert mechanism.anonymize_many([]) == []
+
+
+def test_thread_safe():
+    mechanism = Pseudonymization(format_string="Test ({})", stateful=True, thread_safe=True, counter_block_size=4)
+    inputs = [f"input {i % 100}" for i in range(2000)]
+    with ThreadPoolExecutor(8) as executor:
+        outputs = list(executor.map(mechanism.anonymize, inputs))
+        outputs += sum(executor.map(mechanism.anonymize_many, [inputs[i : i + 7] for i in range(0, 2000, 7)]), [])
+
+    pseudonyms = {}
+    for input_value, output in zip(inputs * 2, outputs):
+        assert pseudonyms.setdefault(input_value, output) == output
+    assert len(set(pseudonyms.values())) == 100
+    assert mechanism.counter == mechanism.block_counter.reserved
+
+    # Without state, every pseudonym is unique.
+    mechanism = Pseudonymization(format_string="Test ({})", thread_safe=True)
+    with ThreadPoolExecutor(8) as executor:
+        outputs = list(executor.map(mechanism.anonymize, inputs))
+    assert len(set(outputs)) == len(inputs)
+
+
+def test_deterministic_key():
+    with pytest.raises(ValidationError):
+        Pseudonymization(format_string="Test ({})", deterministic_key="secret")
+
+
+def test_json_thread_safe():
+    mechanism = Pseudonymization(format_string="Person {}", stateful=True, thread_safe=True, counter_block_size=8)
+    assert mechanism.anonymize("Alice") == "Person 1"
+    assert "blockCounter" not in Pseudonymization.schema()["properties"]
+
+    # The reserved counter values are kept, but the block counter itself is not serialized.
+    restored = Pseudonymization.parse_raw(mechanism.json(by_alias=True))
+    assert restored.counter == 9 and restored.thread_safe
+    assert restored.anonymize("Bob") == "Person 9"
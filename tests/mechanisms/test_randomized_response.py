@@ -2,7 +2,9 @@ import pytest
 from pydantic import ValidationError
 
 from anonymizer.mechanisms.randomized_response import RandomizedResponse, RandomizedResponseMode
+from anonymizer.mechanisms.suppression import Suppression
 from anonymizer.utils.discrete_distribution import DiscreteDistribution
+from anonymizer.utils.randomness import RandomSource
 
 
 def test_simple():
@@ -47,6 +49,20 @@ def test_dp():
     assert mechanism.anonymize("No") == "No"
 
 
+def test_large_vocabulary():
+    values = [f"code {i}" for i in range(100000)]
+    mechanism = RandomizedResponse(values=values, epsilon=2, mode=RandomizedResponseMode.dp, random_source="pcg64")
+    outputs = mechanism.anonymize_many(values[:20000])
+    # The true value is reported with a probability of about e^2 / (100000 - 1 + e^2).
+    assert sum(output == value for output, value in zip(outputs, values)) < 10
+    assert len(set(outputs)) > 15000
+
+    mechanism = RandomizedResponse(values=values, coin_p=0.5, mode=RandomizedResponseMode.coin, random_source="pcg64")
+    outputs = mechanism.anonymize_many(values[:20000])
+    assert 0.45 < sum(output == value for output, value in zip(outputs, values)) / 20000 < 0.55
+    assert mechanism.anonymize(values[0]) in values
+
+
 def test_validation():
     with pytest.raises(ValidationError):
         RandomizedResponse(values=["Yes"], probability_distribution=[[0], [1, 0]])
@@ -56,3 +72,81 @@ def test_validation():
 
     with pytest.raises(ValidationError):
         RandomizedResponse(values=["Yes"], probability_distribution=[[0], [1, 0]], mode=RandomizedResponseMode.coin)
+
+    with pytest.raises(ValidationError):
+        RandomizedResponse(values=["Yes", "No"], coin_p=2, mode=RandomizedResponseMode.coin)
+
+
+def test_many():
+    mechanism = RandomizedResponse(values=["Yes", "No"], probability_distribution=[[0, 1], [1, 0]])
+    assert mechanism.anonymize_many(["Yes", "No", "Yes"]) == ["No", "Yes", "No"]
+    with pytest.raises(ValueError):
+        mechanism.anonymize_many(["Yes", "Foobar"])
+
+    mechanism = RandomizedResponse(values=["Yes", "No"], probability_distribution=[1, 0], default_value="<UNKNOWN>")
+    assert mechanism.anonymize_many(["No", "Foobar"]) == ["Yes", "<UNKNOWN>"]
+
+    mechanism = RandomizedResponse(values=["Yes", "No", "Maybe"], epsilon=0.5, mode=RandomizedResponseMode.dp)
+    outputs = mechanism.anonymize_many(["Yes", "No"] * 5000)
+    assert set(outputs) == {"Yes", "No", "Maybe"}
+    assert 0.35 < outputs[::2].count("Yes") / 5000 < 0.5
+
+
+def test_deterministic_key():
+    values = [str(i) for i in range(100)]
+    mechanism = RandomizedResponse(values=values, epsilon=1, mode=RandomizedResponseMode.dp, deterministic_key="secret")
+    assert mechanism.deterministic
+    outputs = mechanism.anonymize_many(values)
+    assert outputs == [mechanism.anonymize(value) for value in values]
+
+    other = RandomizedResponse(values=values, epsilon=1, mode=RandomizedResponseMode.dp, deterministic_key="other secret")
+    assert other.anonymize_many(values) != outputs
+
+
+def test_normalized_matching():
+    values = ["Yes", "No", "Not  sure"]
+    mechanism = RandomizedResponse(values=values, probability_distribution=[[1, 0, 0], [0, 1, 0], [0, 0, 1]])
+    assert mechanism.value_indices(["No", "no", "Not sure", "Maybe"]).tolist() == [1, -1, -1, -1]
+    with pytest.raises(ValueError):
+        mechanism.anonymize("yes")
+
+    mechanism = RandomizedResponse(
+        values=values,
+        probability_distribution=[[1, 0, 0], [0, 1, 0], [0, 0, 1]],
+        ignore_case=True,
+        normalize_whitespace=True,
+        default_value="yes",
+    )
+    assert mechanism.value_indices(["No", "no", " NOT sure\t", "Maybe"]).tolist() == [1, 1, 2, -1]
+    assert mechanism.anonymize(" YES") == "Yes"
+    assert mechanism.anonymize_many(["no ", "not sure", "Maybe"]) == ["No", "Not  sure", "yes"]
+    # The default value is stored separately from the value it matches.
+    assert mechanism._state_reference("yes") == 3 and mechanism._state_reference("Yes") == 0
+
+    with pytest.raises(ValidationError):
+        RandomizedResponse(values=["Yes", "yes"], probability_distribution=[1, 0], ignore_case=True)
+    with pytest.raises(ValidationError):
+        RandomizedResponse(values=["a b", "a  b"], probability_distribution=[1, 0], normalize_whitespace=True)
+
+
+def test_random_source():
+    values = [str(i) for i in range(100)]
+
+    def create_mechanism(**kwargs):
+        return RandomizedResponse(values=values, epsilon=1, mode=RandomizedResponseMode.dp, **kwargs)
+
+    first = create_mechanism(random_source="pcg64", random_seed=7)
+    second = create_mechanism(random_source="pcg64", random_seed=7)
+    assert first.anonymize_many(values) == second.anonymize_many(values)
+    assert [first.anonymize(value) for value in values] == [second.anonymize(value) for value in values]
+
+    for source in RandomSource:
+        assert set(create_mechanism(random_source=source).anonymize_many(values)) <= set(values)
+
+    with pytest.raises(ValidationError):
+        create_mechanism(random_seed=7)
+    with pytest.raises(ValidationError):
+        create_mechanism(random_source="buffered", random_seed=7)
+    with pytest.raises(ValidationError):
+        Suppression(random_source="pcg64")
+    assert "randomSource" in RandomizedResponse.schema()["properties"]
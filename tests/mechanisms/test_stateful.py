@@ -1,6 +1,9 @@
+from random import randint
+
 import pytest
 
 from anonymizer.mechanisms.suppression import Suppression
+from anonymizer.state import BoundedCache, SqliteBackend
 
 
 @pytest.fixture()
@@ -28,3 +31,99 @@ def test_stateful(input_value):
     stateful_mechanism = Suppression(custom_length=test_rng(), stateful=True)
     # Stateful suppression should return same output.
     assert stateful_mechanism.anonymize(input_value) == stateful_mechanism.anonymize(input_value)
+
+
+def test_stateful_many(input_value):
+    stateful_mechanism = Suppression(custom_length=test_rng(), stateful=True)
+    first, second, third = stateful_mechanism.anonymize_many([input_value, "foo", input_value])
+    assert first == third
+    assert stateful_mechanism.anonymize(input_value) == first
+    assert stateful_mechanism.anonymize_many(["foo"]) == [second]
+
+
+def test_bounded_state(input_value):
+    mechanism = Suppression(custom_length=test_rng(), stateful=True, max_state_entries=2)
+    first = mechanism.anonymize(input_value)
+    assert mechanism.anonymize_many(["foo", input_value])[1] == first
+    assert list(mechanism.anonymizations) == [input_value, "foo"]
+    mechanism.anonymize_many(["bar", "baz"])
+    assert list(mechanism.anonymizations) == ["bar", "baz"]
+
+    # Values evicted in the same batch are still anonymized consistently.
+    anonymized = mechanism.anonymize_many(["a", "b", "c", "a", "b", "c"])
+    assert anonymized[:3] == anonymized[3:]
+
+
+def test_bounded_state_config():
+    mechanism = Suppression(stateful=True, max_state_bytes=1000, state_eviction="clock", state_ttl=60)
+    assert mechanism.anonymizations.max_bytes == 1000
+    assert mechanism.anonymizations.eviction == "clock"
+    assert mechanism.anonymizations.ttl == 60
+    assert Suppression(stateful=True).anonymizations == {}
+
+    schema = Suppression.schema()
+    assert {"maxStateEntries", "maxStateBytes", "stateEviction", "stateTtl"} <= set(schema["properties"])
+
+
+def test_ids():
+    mechanism = Suppression(custom_length=lambda _: randint(1, 100), stateful=True)
+    outputs = mechanism.anonymize_many(["a", "b", "a", "c"], ids=["1", "1", None, "2"])
+    assert outputs[0] == outputs[1] and outputs[2] == mechanism.anonymize("a")
+    assert mechanism.anonymize_many(["x", "a"], ids=["2", None]) == [outputs[3], outputs[2]]
+    assert len(mechanism.anonymizations_by_id) == 2
+
+
+def test_ids_configured_state(tmp_path):
+    mechanism = Suppression(custom_length=lambda _: randint(1, 100), stateful=True, max_state_entries=2)
+    mechanism.anonymize_many([f"name {i}" for i in range(100)], ids=[str(i) for i in range(100)])
+    assert isinstance(mechanism.anonymizations_by_id, BoundedCache) and len(mechanism.anonymizations_by_id) == 2
+
+    # The anonymizations by id are persisted next to those by text.
+    path = str(tmp_path / "state.db")
+    mechanism = Suppression(custom_length=lambda _: randint(1, 100), stateful=True, state_backend=SqliteBackend(path))
+    outputs = mechanism.anonymize_many(["a", "b"], ids=["1", None])
+    mechanism.anonymizations.close()
+    mechanism.anonymizations_by_id.close()
+    restarted = Suppression(custom_length=lambda _: randint(1, 100), stateful=True, state_backend=SqliteBackend(path))
+    assert restarted.anonymize_many(["c", "b"], ids=["1", None]) == outputs
+    assert "1" not in restarted.anonymizations
+
+
+def test_instrumentation():
+    from anonymizer.encoders import EncoderType
+    from anonymizer.mechanisms.laplace_noise import LaplaceNoise
+
+    mechanism = Suppression(custom_length=lambda _: randint(1, 100), stateful=True, instrumented=True)
+    anonymize = mechanism.compile()
+    assert anonymize("a") == anonymize("a") == mechanism.anonymize("a")
+    mechanism.anonymize_many(["a", "b", "b", "c"])
+    stats = mechanism.stats()
+    assert (stats["calls"], stats["hits"], stats["misses"]) == (7, 4, 3)
+    assert stats["apply"]["count"] == 2 and stats["apply"]["p50_ns"] >= 1
+
+    mechanism = LaplaceNoise(epsilon=1, encoder=EncoderType.datetime)
+    assert mechanism.stats() is None
+    mechanism.instrument()
+    mechanism.compile()("2012-01-18")
+    mechanism.anonymize_many(["2012-01-18", "2012-01-19"])
+    with pytest.raises(ValueError):
+        mechanism.anonymize("not a date")
+    stats = mechanism.stats()
+    assert (stats["calls"], stats["hits"], stats["misses"], stats["encoder_failures"]) == (3, 0, 0, 1)
+    assert stats["encode"]["count"] == 4 and stats["decode"]["count"] == 3
+
+
+def test_shards_keep_state_in_memory(tmp_path):
+    backend = SqliteBackend(str(tmp_path / "state.db"), write_batch_size=1)
+    mechanism = Suppression(custom_length=lambda _: randint(1, 100), stateful=True, state_backend=backend)
+    first = mechanism.anonymize("a")
+
+    # A worker process anonymizes several shards on top of the state it started with, without writing to the database.
+    outputs = []
+    for shard in (["a", "b"], ["b", "c"]):
+        mechanism._start_shard(None)
+        outputs += mechanism.anonymize_many(shard)
+        assert [key for key, _ in mechanism._shard_state()[0]] == [shard[1]]
+        mechanism._finish_shard()
+    assert outputs[0] == first and outputs[1] == outputs[2]
+    assert list(backend) == ["a"]
@@ -29,3 +29,33 @@ def test_custom_len(input_value):
 def test_combined(input_value):
     mechanism = Suppression(suppression_char=".", custom_length=3)
     assert mechanism.anonymize(input_value) == "..."
+
+
+def test_many(input_value):
+    mechanism = Suppression(custom_length=lambda n: n // 2)
+    assert mechanism.anonymize_many([input_value, "foo"]) == ["XXX", "X"]
+
+    mechanism = Suppression(suppression_char=".")
+    assert mechanism.anonymize_many([input_value, "foo", "bar", ""]) == ["......", "...", "...", ""]
+
+
+def test_deterministic_key(input_value):
+    def create_mechanism(key):
+        return Suppression(custom_length=lambda _, rng: rng.randint(0, 100), deterministic_key=key)
+
+    outputs = [create_mechanism("secret").anonymize(str(i)) for i in range(20)]
+    assert outputs == create_mechanism("secret").anonymize_many([str(i) for i in range(20)])
+    assert outputs != create_mechanism("other secret").anonymize_many([str(i) for i in range(20)])
+
+
+def test_compile(input_value):
+    suppress = Suppression(suppression_char=".").compile()
+    assert [suppress(value) for value in (input_value, "foo", "bar", "")] == ["......", "...", "...", ""]
+    assert suppress("foo") is suppress("bar")
+    assert suppress("x" * 2000) == "." * 2000
+
+    suppress = Suppression(custom_length=3).compile()
+    assert suppress(input_value) is suppress("") == "XXX"
+
+    suppress = Suppression(custom_length=lambda n: n // 2).compile()
+    assert suppress(input_value) == "XXX"
@@ -0,0 +1,90 @@
+import pytest
+
+from anonymizer.state.bounded import BoundedCache, EvictionPolicy
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_lru():
+    cache = BoundedCache(max_entries=3)
+    for i in range(3):
+        cache[i] = str(i)
+    assert cache[0] == "0"
+
+    cache[3] = "3"
+    assert sorted(cache) == [0, 2, 3]
+    assert 1 not in cache
+    with pytest.raises(KeyError):
+        cache[1]
+
+    # Membership checks do not count as access.
+    assert 2 in cache
+    cache[4] = "4"
+    assert sorted(cache) == [0, 3, 4]
+    assert len(cache) == 3
+
+
+def test_clock():
+    cache = BoundedCache(max_entries=3, eviction=EvictionPolicy.clock)
+    for i in range(3):
+        cache[i] = str(i)
+    assert cache[0] == "0"
+    assert cache[1] == "1"
+
+    # Referenced entries get a second chance.
+    cache[3] = "3"
+    assert sorted(cache) == [0, 1, 3]
+    cache[4] = "4"
+    assert sorted(cache) == [0, 1, 4]
+    cache[5] = "5"
+    assert sorted(cache) == [1, 4, 5]
+
+
+def test_max_bytes():
+    cache = BoundedCache(max_bytes=2000)
+    for i in range(100):
+        cache[f"key {i}"] = f"value {i}"
+        assert cache.size_bytes <= 2000
+    assert 0 < len(cache) < 100
+    assert "key 99" in cache
+
+    del cache["key 99"]
+    assert "key 99" not in cache
+    assert cache.size_bytes == sum(cache._entries[key][3] for key in cache)
+
+    # Overwriting keeps the size consistent.
+    cache["key 98"] = "other value"
+    assert cache["key 98"] == "other value"
+    assert cache.size_bytes == sum(cache._entries[key][3] for key in cache)
+
+
+def test_ttl():
+    clock = FakeClock()
+    cache = BoundedCache(ttl=10, clock=clock)
+    cache["a"] = 1
+    clock.now = 5
+    cache["b"] = 2
+    assert cache["a"] == 1
+
+    clock.now = 12
+    assert "a" not in cache
+    assert cache["b"] == 2
+    assert list(cache) == ["b"]
+
+    # Expired entries are dropped on insertion.
+    clock.now = 20
+    cache["c"] = 3
+    assert len(cache) == 1
+    assert dict(cache) == {"c": 3}
+
+
+def test_invalid_arguments():
+    for kwargs in (dict(max_entries=0), dict(max_bytes=-1), dict(ttl=0), dict(eviction="random")):
+        with pytest.raises(ValueError):
+            BoundedCache(**kwargs)
@@ -0,0 +1,68 @@
+import random
+
+import pytest
+from pydantic import ValidationError
+
+from anonymizer.mechanisms.pseudonymization import Pseudonymization
+from anonymizer.mechanisms.randomized_response import RandomizedResponse
+from anonymizer.state import CompactBackend
+
+
+@pytest.mark.parametrize("key_bits", [64, 128])
+def test_mapping(key_bits):
+    backend = CompactBackend(key_bits=key_bits, capacity=4)
+    reference = {}
+    rng = random.Random(0)
+    for i in range(2000):
+        key = rng.choice([str(rng.randrange(500)), rng.randrange(500), rng.random()])
+        if rng.random() < 0.2 and key in reference:
+            del backend[key]
+            del reference[key]
+        else:
+            backend[key] = reference[key] = f"value {i}"
+    assert len(backend) == len(reference)
+    assert backend.get_many(list(reference) + ["missing"]) == reference
+    assert all(backend[key] == value for key, value in reference.items())
+    assert backend.capacity >= len(reference) / backend.max_load
+
+    with pytest.raises(KeyError):
+        del backend["missing"]
+    with pytest.raises(TypeError):
+        list(backend)
+
+
+def test_get_or_create_many():
+    backend = CompactBackend(codec=(int, str))
+    calls = []
+
+    def create_many(keys):
+        calls.append(keys)
+        return [str(len(key)) for key in keys]
+
+    assert backend.get_or_create_many(["a", "bb", "a"], create_many) == {"a": "1", "bb": "2"}
+    assert backend.get_or_create_many(["bb", "ccc"], create_many) == {"bb": "2", "ccc": "3"}
+    assert calls == [["a", "bb"], ["ccc"]]
+    # Only the references produced by the codec are stored.
+    assert sorted(backend._refs[backend._keys[:, 0] != 0]) == [1, 2, 3]
+    assert len(backend) == 3
+
+
+def test_mechanisms():
+    mechanism = Pseudonymization(format_string="<{}>", stateful=True, compact_state=True)
+    inputs = [str(i % 3000) for i in range(10000)]
+    outputs = mechanism.anonymize_many(inputs)
+    assert outputs == [mechanism.anonymize(input_value) for input_value in inputs]
+    assert outputs[:3] == ["<1>", "<2>", "<3>"]
+    assert len(mechanism.anonymizations) == 3000
+    # Each entry occupies 24 bytes in a table that is at least a third full.
+    assert mechanism.anonymizations.nbytes <= 3000 * 3 * 24
+    assert mechanism.anonymizations._values == []
+
+    mechanism = RandomizedResponse(
+        values=["Yes", "No"], probability_distribution=[0, 1], default_value="?", stateful=True, compact_state=True
+    )
+    assert mechanism.anonymize_many(["Yes", "Foo", "Yes"]) == ["No", "?", "No"]
+    assert mechanism.anonymize("Foo") == "?"
+
+    with pytest.raises(ValidationError):
+        Pseudonymization(format_string="<{}>", stateful=True, compact_state=True, max_state_entries=10)
@@ -0,0 +1,35 @@
+import pytest
+
+from anonymizer.state import DenseIdBackend
+
+
+@pytest.mark.parametrize("codec", [None, (int, str)])
+def test_mapping(codec):
+    backend = DenseIdBackend(codec=codec)
+    backend.set_many([(str(i), str(i * 2)) for i in range(3000)])
+    backend.set_many([("abc", "1"), ("007", "2"), ("10000000", "3"), (5, "4")])
+    backend["7"] = "8"
+
+    assert backend.get_many(["0", "7", "2999", "3000", "abc", "007", "10000000", 5, "5"]) == {
+        "0": "0",
+        "7": "8",
+        "2999": "5998",
+        "abc": "1",
+        "007": "2",
+        "10000000": "3",
+        5: "4",
+        "5": "10",
+    }
+    assert len(backend) == 3004
+    assert sorted(backend, key=str) == sorted([str(i) for i in range(3000)] + ["abc", "007", "10000000", 5], key=str)
+
+    # Dense ids are stored in arrays, sparse ones in a dict.
+    assert len(backend._sparse) == 4
+    assert backend.nbytes < 3000 * 16
+
+    del backend["7"]
+    del backend["10000000"]
+    assert "7" not in backend and "10000000" not in backend and "8" in backend
+    assert len(backend) == 3002
+    with pytest.raises(KeyError):
+        del backend["7"]
@@ -0,0 +1,58 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from anonymizer.state import BoundedCache, InMemoryBackend, LockedBackend
+
+
+@pytest.mark.parametrize("base", [InMemoryBackend, lambda: BoundedCache(max_entries=1000)])
+def test_get_or_create(base):
+    backend = LockedBackend(base(), stripes=4)
+    calls = []
+
+    def create(key):
+        calls.append(key)
+        # Make races likely.
+        time.sleep(0.001)
+        return f"{key} {threading.get_ident()}"
+
+    keys = [i % 20 for i in range(400)]
+    with ThreadPoolExecutor(8) as executor:
+        values = list(executor.map(lambda key: backend.get_or_create(key, create), keys))
+
+    assert sorted(calls) == list(range(20))
+    assert all(value == backend[key] for key, value in zip(keys, values))
+
+
+def test_get_or_create_many():
+    backend = LockedBackend(InMemoryBackend())
+    calls = []
+
+    def create_many(keys):
+        calls.extend(keys)
+        time.sleep(0.001)
+        return [f"{key} {threading.get_ident()}" for key in keys]
+
+    batches = [[(i + j) % 50 for j in range(10)] for i in range(100)]
+    with ThreadPoolExecutor(8) as executor:
+        results = list(executor.map(lambda batch: backend.get_or_create_many(batch, create_many), batches))
+
+    assert sorted(calls) == list(range(50))
+    for result in results:
+        assert all(value == backend[key] for key, value in result.items())
+
+
+def test_mapping():
+    backend = LockedBackend(InMemoryBackend(a=1))
+    backend["b"] = 2
+    backend.set_many([("c", 3)])
+    assert backend.get_many(["a", "c", "d"]) == {"a": 1, "c": 3}
+    del backend["a"]
+    assert "a" not in backend
+    assert sorted(backend) == ["b", "c"]
+    assert len(backend) == 2
+
+    with pytest.raises(ValueError):
+        LockedBackend(InMemoryBackend(), stripes=0)
@@ -0,0 +1,22 @@
+import pytest
+
+from anonymizer.state import InMemoryBackend, OverlayBackend
+
+
+def test_overlay():
+    base = InMemoryBackend(a="1", b="2")
+    overlay = OverlayBackend(base)
+    overlay["b"] = "3"
+    overlay.set_many([("c", "4")])
+
+    assert overlay.get_many(["a", "b", "c", "d"]) == {"a": "1", "b": "3", "c": "4"}
+    assert "a" in overlay and "d" not in overlay
+    assert sorted(overlay) == ["a", "b", "c"]
+    assert len(overlay) == 3
+    assert overlay.layer == {"b": "3", "c": "4"}
+    assert base == {"a": "1", "b": "2"}
+
+    del overlay["b"]
+    assert overlay["b"] == "2"
+    with pytest.raises(KeyError):
+        del overlay["a"]
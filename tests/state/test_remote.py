@@ -0,0 +1,121 @@
+import asyncio
+import json
+import multiprocessing
+import os
+import tempfile
+import threading
+
+import pytest
+
+from anonymizer.mechanisms.pseudonymization import Pseudonymization
+from anonymizer.state import RemoteBackend
+from anonymizer.state.server import StateServer
+
+
+@pytest.fixture()
+def path():
+    # Unix socket paths are limited to about 100 characters, so pytest's `tmp_path` may be too long.
+    path = os.path.join(tempfile.mkdtemp(), "state.sock")
+    server = StateServer(path)
+    started = threading.Event()
+    tasks = []
+
+    async def serve():
+        tasks.append(asyncio.current_task())
+        await server.start()
+        started.set()
+        try:
+            await server.serve_forever()
+        except asyncio.CancelledError:
+            pass
+
+    thread = threading.Thread(target=lambda: asyncio.run(serve()), daemon=True)
+    thread.start()
+    started.wait()
+    yield path
+    tasks[0].get_loop().call_soon_threadsafe(tasks[0].cancel)
+    thread.join()
+
+
+def test_backend(path):
+    backend = RemoteBackend(path, batch_size=2)
+    other = RemoteBackend(path)
+    backend.set_many([("a", "1"), ("b", "2"), (1.5, 2.5)])
+    assert other.get_many(["a", "b", "c", 1.5]) == {"a": "1", "b": "2", 1.5: 2.5}
+    assert len(other) == 3 and sorted(map(str, other)) == ["1.5", "a", "b"]
+
+    # The first proposed value of a key is kept.
+    assert backend.get_or_create_many(["c", "a", "d"], lambda keys: [f"{key}!" for key in keys]) == {
+        "a": "1",
+        "c": "c!",
+        "d": "d!",
+    }
+    assert other.get_or_create("c", lambda _: "other") == "c!"
+    assert other.get_or_create_many(["e", "e"], lambda keys: ["other"] * len(keys)) == {"e": "other"}
+
+    del other["e"]
+    assert "e" not in other
+    with pytest.raises(KeyError):
+        del other["e"]
+
+    assert backend.reserve(10, 1) == 1 and other.reserve(5, 100) == 11 and backend.reserve(1, 1) == 16
+    assert RemoteBackend(path, namespace="other").get_many(["a"]) == {}
+
+    # Siblings keep a separate mapping on the same server.
+    sibling = other.create_sibling("by_id")
+    sibling["a"] = "sibling"
+    assert backend.create_sibling("by_id")["a"] == "sibling" and backend["a"] == "1"
+
+
+def _anonymize(path, names, queue):
+    mechanism = Pseudonymization(format_string="Person {}", stateful=True, state_backend=RemoteBackend(path))
+    queue.put(dict(zip(names, mechanism.anonymize_many(names))))
+
+
+def test_processes(path):
+    context = multiprocessing.get_context("fork")
+    queue = context.Queue()
+    names = [f"Name {i}" for i in range(1000)]
+    processes = [context.Process(target=_anonymize, args=(path, names[i * 200 : i * 200 + 600], queue)) for i in range(3)]
+    for process in processes:
+        process.start()
+    results = [queue.get() for _ in processes]
+    for process in processes:
+        process.join()
+
+    pseudonyms = {}
+    for result in results:
+        for name, pseudonym in result.items():
+            assert pseudonyms.setdefault(name, pseudonym) == pseudonym
+    assert len(pseudonyms) == len(set(pseudonyms.values())) == 1000
+
+    # Thread-safe mechanisms of the same process share the server as well.
+    mechanism = Pseudonymization(format_string="Person {}", stateful=True, thread_safe=True, state_backend=RemoteBackend(path))
+    assert mechanism.anonymize("Name 0") == pseudonyms["Name 0"]
+    assert mechanism.anonymize("New") not in pseudonyms.values()
+
+
+def test_pipelining(path):
+    # The responses of many pipelined requests exceed the socket buffers, so the server waits for them to be read.
+    backend = RemoteBackend(path, cache_entries=1, batch_size=100)
+    keys = [f"key {i}" for i in range(20000)]
+    found = backend.get_or_create_many(keys, lambda missing: [key * 100 for key in missing])
+    assert found == {key: key * 100 for key in keys}
+
+
+def test_oversized_line():
+    path = os.path.join(tempfile.mkdtemp(), "state.sock")
+
+    async def request():
+        server = StateServer(path, max_line_size=100)
+        await server.start()
+        reader, writer = await asyncio.open_unix_connection(path)
+        writer.write(b'{"op": "len", "ns": "' + b"x" * 200 + b'"}\n{"op": "len", "ns": "x"}\n')
+        await writer.drain()
+        lines = [await reader.readline(), await reader.readline()]
+        writer.close()
+        server.close()
+        return lines
+
+    response, end = asyncio.run(request())
+    assert "longer than 100 bytes" in json.loads(response)["error"] and end == b""
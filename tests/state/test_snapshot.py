@@ -0,0 +1,68 @@
+import numpy as np
+import pytest
+
+from anonymizer.state import CompactBackend, InMemoryBackend, OverlayBackend, SnapshotBackend, read_snapshot, write_snapshot
+from anonymizer.state._hashing import hash_keys
+
+
+def test_roundtrip(tmp_path):
+    strings = InMemoryBackend({f"key {i}": f"value {i}" for i in range(1000)})
+    strings[1.5] = "float"
+    compact = CompactBackend(key_bits=64, codec=(int, str))
+    compact.set_many([(f"key {i}", str(i)) for i in range(100)])
+    empty = InMemoryBackend()
+
+    entries = []
+    for backend, codec in ((strings, None), (compact, (int, str)), (empty, None)):
+        hashes, values = backend.export_hashed()
+        entries.append(
+            {"type": "Test", "scalars": {"size": len(values)}, "stores": {"main": (hashes, values)}, "codec": codec}
+        )
+    path = str(tmp_path / "snapshot")
+    write_snapshot(path, entries)
+
+    (_, scalars, stores), (_, _, compact_stores), (_, _, empty_stores) = read_snapshot(path)
+    loaded_strings, loaded_compact, loaded_empty = stores["main"], compact_stores["main"], empty_stores["main"]
+    assert scalars == {"size": 1001}
+    assert isinstance(loaded_strings.hashes, np.memmap)
+    assert loaded_strings.get_many(["key 1", 1.5, "missing"]) == {"key 1": "value 1", 1.5: "float"}
+    assert loaded_strings["key 999"] == "value 999" and "missing" not in loaded_strings
+    assert len(loaded_strings) == 1001 and len(loaded_empty) == 0
+    assert loaded_empty.get_many(["key 1"]) == {}
+
+    with pytest.raises(ValueError):
+        loaded_compact["key 1"]
+    loaded_compact.codec = (int, str)
+    assert loaded_compact.key_bits == 64
+    assert loaded_compact.get_many(["key 1", "key 100"]) == {"key 1": "1"}
+
+    with pytest.raises(TypeError):
+        loaded_strings["key 1"] = "other"
+
+
+def test_ambiguous_first_words():
+    hashes = np.array([[5, 1], [5, 2], [5, 3], [6, 1]], dtype=np.uint64)
+    backend = SnapshotBackend(hashes, refs=np.arange(4), codec=(int, int))
+    # Look up hashes directly, since colliding first words cannot be produced by real keys in a test.
+    assert [backend._find(row.tolist()) for row in hashes] == [0, 1, 2, 3]
+    assert backend._find([5, 4]) is None
+
+
+def test_export_overlay():
+    base = InMemoryBackend(a="1", b="2")
+    overlay = OverlayBackend(base)
+    overlay["b"] = "3"
+    hashes, values = overlay.export_hashed()
+    assert dict(zip(map(tuple, hashes.tolist()), values)) == {
+        tuple(row): value for row, value in zip(hash_keys(["a", "b"], 128).tolist(), ["1", "3"])
+    }
+    assert hashes.tolist() == sorted(hashes.tolist())
+
+
+def test_invalid(tmp_path):
+    path = tmp_path / "snapshot"
+    path.write_bytes(b"foo")
+    with pytest.raises(ValueError):
+        read_snapshot(str(path))
+    with pytest.raises(TypeError):
+        write_snapshot(str(path), [{"type": "Test", "scalars": {}, "stores": {"main": (hash_keys(["a"], 128), [1])}}])
@@ -0,0 +1,120 @@
+import os
+
+import pytest
+from pydantic import ValidationError
+
+from anonymizer.anonymization.anonymizer import Anonymizer
+from anonymizer.anonymization.config import AnonymizerConfig
+from anonymizer.anonymization.pii import Pii
+from anonymizer.mechanisms.pseudonymization import Pseudonymization
+from anonymizer.state import SqliteBackend
+
+
+@pytest.fixture()
+def path(tmp_path):
+    return str(tmp_path / "state.db")
+
+
+def test_write_behind(path):
+    backend = SqliteBackend(path, write_batch_size=3, cache_entries=2)
+    backend["a"] = "1"
+    backend.set_many([("b", "2"), (3.5, 4.5)])
+    assert backend["a"] == "1"
+
+    # Buffered writes have been flushed in one batch.
+    other = SqliteBackend(path)
+    assert other.get_many(["a", "b", 3.5, "c"]) == {"a": "1", "b": "2", 3.5: 4.5}
+
+    backend["c"] = "3"
+    assert "c" not in other
+    backend.flush()
+    assert other["c"] == "3"
+
+    assert len(backend) == 4
+    assert sorted(backend, key=str) == [3.5, "a", "b", "c"]
+
+    del backend["a"]
+    assert "a" not in backend
+    with pytest.raises(KeyError):
+        del backend["a"]
+    with pytest.raises(KeyError):
+        backend["unknown"]
+    backend.close()
+
+
+def test_front_cache(path):
+    with SqliteBackend(path, cache_entries=10) as backend:
+        backend.set_many((str(i), i) for i in range(100))
+        backend.flush()
+        assert backend.get_many([str(i) for i in range(0, 100, 7)]) == {str(i): i for i in range(0, 100, 7)}
+        assert len(backend._cache) == 10
+
+
+def test_mechanism(path):
+    mechanism = Pseudonymization(format_string="Person {}", stateful=True, state_backend=SqliteBackend(path))
+    assert mechanism.anonymize_many(["Alice", "Bob", "Alice"]) == ["Person 1", "Person 2", "Person 1"]
+    mechanism.anonymizations.close()
+
+    # A restarted mechanism reuses the persisted anonymizations and counter.
+    restarted = Pseudonymization(format_string="Person {}", stateful=True, state_backend=SqliteBackend(path))
+    assert restarted.anonymize_many(["Alice", "Carol"]) == ["Person 1", "Person 3"]
+    assert restarted.anonymize("Bob") == "Person 2"
+    restarted.anonymizations.close()
+
+    # Single values are pseudonymized with values of reserved blocks, which are skipped after a restart.
+    restarted = Pseudonymization(format_string="Person {}", stateful=True, state_backend=SqliteBackend(path))
+    assert restarted.anonymize("Dave") == "Person 4"
+    assert restarted.anonymize("Eve") == "Person 5"
+    restarted.anonymizations.close()
+    restarted = Pseudonymization(format_string="Person {}", stateful=True, state_backend=SqliteBackend(path))
+    assert restarted.anonymize("Frank") == "Person 68"
+
+    with pytest.raises(ValidationError):
+        Pseudonymization(format_string="Person {}", state_backend={})
+    with pytest.raises(ValidationError):
+        Pseudonymization(format_string="Person {}", max_state_entries=10, state_backend=SqliteBackend(path))
+
+
+def test_fork(path):
+    backend = SqliteBackend(path, write_batch_size=1)
+    backend["a"] = "1"
+
+    pid = os.fork()
+    if pid == 0:
+        # The child process opens its own connection.
+        backend._cache.clear()
+        os._exit(0 if backend["a"] == "1" and backend._pid == os.getpid() else 1)
+    _, status = os.waitpid(pid, 0)
+    assert status == 0
+
+
+def test_reserve(path):
+    backend = SqliteBackend(path)
+    assert backend.reserve(3, 10) == 10
+    assert backend.reserve(2, 1) == 13
+    # Counters are kept per table.
+    assert SqliteBackend(path, table="other").reserve(1, 1) == 1
+    backend.close()
+    assert SqliteBackend(path).reserve(1, 1) == 15
+
+
+def test_fork_in_memory():
+    backend = SqliteBackend(":memory:", write_batch_size=1)
+    backend["a"] = "1"
+    assert backend["a"] == "1"
+
+    # Forked processes cannot access the database of the parent process.
+    anonymizer = Anonymizer(
+        AnonymizerConfig(
+            mechanisms_by_tag={"name": Pseudonymization(format_string="Person {}", stateful=True, state_backend=backend)}
+        )
+    )
+    with pytest.raises(ValueError, match="database file"):
+        anonymizer.anonymize_parallel([Pii("name", f"Name {i}") for i in range(100)], workers=2)
+
+
+def test_invalid_arguments(path):
+    with pytest.raises(ValueError):
+        SqliteBackend(path, table="drop table")
+    with pytest.raises(ValueError):
+        SqliteBackend(path, write_batch_size=0)
@@ -0,0 +1,91 @@
+import json
+import subprocess
+import sys
+
+import pytest
+
+from anonymizer.cli import main
+
+
+@pytest.fixture()
+def config_path(tmp_path):
+    path = tmp_path / "config.json"
+    config = {
+        "defaultMechanism": {"mechanism": "suppression", "config": {}},
+        "mechanismsByTag": {
+            "name": {"mechanism": "pseudonymization", "config": {"formatString": "Person {}", "stateful": True}}
+        },
+    }
+    path.write_text(json.dumps(config))
+    return str(path)
+
+
+@pytest.fixture()
+def input_path(tmp_path):
+    path = tmp_path / "piis.jsonl"
+    records = [
+        {"tag": "name", "text": "Alice", "id": "1"},
+        {"tag": "name", "text": "Bob"},
+        {"tag": "other", "text": "Gamma"},
+        {"tag": "name", "text": "Alice"},
+    ]
+    path.write_text("\n".join(json.dumps(record) for record in records) + "\n\n")
+    return str(path)
+
+
+expected_output = [
+    {"tag": "name", "text": "Person 1", "id": "1", "modified": True},
+    {"tag": "name", "text": "Person 2", "id": None, "modified": True},
+    {"tag": "other", "text": "XXXXX", "id": None, "modified": True},
+    {"tag": "name", "text": "Person 1", "id": None, "modified": True},
+]
+
+
+@pytest.mark.parametrize("batch_size", [1, 3, 100])
+def test_files(tmp_path, config_path, input_path, batch_size):
+    output_path = tmp_path / "anonymized.jsonl"
+    assert main([config_path, "-i", input_path, "-o", str(output_path), "-b", str(batch_size)]) == 0
+    assert [json.loads(line) for line in output_path.read_text().splitlines()] == expected_output
+
+
+@pytest.mark.parametrize("batch_size", [1, 100])
+def test_workers(tmp_path, config_path, input_path, batch_size):
+    output_path = tmp_path / "anonymized.jsonl"
+    assert main([config_path, "-i", input_path, "-o", str(output_path), "-w", "2", "-b", str(batch_size)]) == 0
+    output = [json.loads(line) for line in output_path.read_text().splitlines()]
+    assert output[0]["text"] == output[3]["text"] != output[1]["text"]
+    assert output[2] == expected_output[2]
+    # All batches are anonymized by the same workers, which only reserve counter values for new names.
+    assert {output[0]["text"], output[1]["text"]} == {"Person 1", "Person 2"}
+
+
+def test_stdin(config_path, input_path):
+    with open(input_path) as input_file:
+        result = subprocess.run(
+            [sys.executable, "-m", "anonymizer", config_path], stdin=input_file, stdout=subprocess.PIPE, check=True
+        )
+    assert [json.loads(line) for line in result.stdout.decode().splitlines()] == expected_output
+
+
+def test_invalid_input(tmp_path, config_path, capsys):
+    input_path = tmp_path / "piis.jsonl"
+    input_path.write_text('{"tag": "name", "text": "Alice"}\n{"tag": "name"}\n')
+    assert main([config_path, "-i", str(input_path), "-o", str(tmp_path / "anonymized.jsonl")]) == 1
+    assert "line 2" in capsys.readouterr().err
+
+    with pytest.raises(SystemExit):
+        main([config_path, "--workers", "0"])
+
+
+def test_numeric_output(tmp_path):
+    config_path = tmp_path / "config.json"
+    config_path.write_text(
+        json.dumps({"mechanismsByTag": {"number": {"mechanism": "laplaceNoise", "config": {"epsilon": 1}}}})
+    )
+    input_path = tmp_path / "piis.jsonl"
+    input_path.write_text(json.dumps({"tag": "number", "text": "1.5"}) + "\n")
+    output_path = tmp_path / "anonymized.jsonl"
+    for workers in ("1", "2"):
+        assert main([str(config_path), "-i", str(input_path), "-o", str(output_path), "-w", workers]) == 0
+        (output,) = [json.loads(line) for line in output_path.read_text().splitlines()]
+        assert isinstance(output["text"], str) and float(output["text"]) != 1.5
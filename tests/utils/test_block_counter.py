@@ -0,0 +1,30 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from anonymizer.utils.block_counter import BlockCounter
+
+
+def test_threads():
+    reserved = []
+    counter = BlockCounter(start=5, block_size=8, on_reserve=reserved.append)
+
+    with ThreadPoolExecutor(8) as executor:
+        values = list(executor.map(lambda _: counter.next(), range(1000)))
+
+    assert len(set(values)) == 1000
+    assert min(values) >= 5
+    assert max(values) < counter.reserved
+    assert reserved == sorted(reserved)
+    assert reserved[-1] == counter.reserved
+
+
+def test_take():
+    counter = BlockCounter(start=1, block_size=4)
+    assert counter.next() == 1
+    assert counter.take(3) == range(5, 8)
+    assert [counter.next() for _ in range(4)] == [2, 3, 4, 8]
+    assert counter.reserved == 12
+
+    with pytest.raises(ValueError):
+        BlockCounter(block_size=0)
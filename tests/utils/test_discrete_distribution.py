@@ -4,7 +4,7 @@ import numpy as np
 import pytest
 from pydantic import BaseModel, ValidationError
 
-from anonymizer.utils.discrete_distribution import DiscreteDistribution
+from anonymizer.utils.discrete_distribution import DiscreteDistribution, RRTossDistribution
 
 
 def test_uniform():
@@ -58,6 +58,7 @@ def test_matrix():
         weights[i][(i + 1) % 10] = 1
     d = DiscreteDistribution(weights)
     c = d.to_cumulative()
+    assert len(c) == 10
     for i in range(20):
         assert c.sample_element(i % 10, rng=random) == ((i + 1) % 10)
 
@@ -93,3 +94,62 @@ def test_validation():
 
     with pytest.raises(ValidationError):
         Test(foobar=1)
+
+
+def test_alias_sampling():
+    random.seed(0)
+    weights = [[1, 2, 3, 4, 0], [0, 0, 5, 0, 5], [1, 1, 1, 1, 1], [0, 0, 0, 0, 1], [9, 0, 0, 0, 1]]
+    c = DiscreteDistribution(weights).to_cumulative()
+    for i, row in enumerate(weights):
+        counts = np.bincount([c.sample_element(i, rng=random) for _ in range(20000)], minlength=5)
+        expected = np.array(row) / sum(row)
+        assert np.all(counts[expected == 0] == 0)
+        assert np.allclose(counts / 20000, expected, atol=0.02)
+
+    # The alias table represents the distribution exactly.
+    probabilities = np.random.default_rng(0).random(100) ** 4
+    c = DiscreteDistribution(probabilities).to_cumulative()
+    represented = np.bincount(np.arange(100), weights=c.alias_thresholds, minlength=100)
+    represented += np.bincount(c.aliases, weights=1 - c.alias_thresholds, minlength=100)
+    assert np.allclose(represented / 100, probabilities / probabilities.sum())
+
+
+def test_sample_elements():
+    rng = np.random.default_rng(0)
+    weights = [[1, 2, 3, 4, 0], [0, 0, 5, 0, 5], [0, 0, 0, 0, 1]]
+    c = DiscreteDistribution(weights).to_cumulative()
+    for i, row in enumerate(weights):
+        samples = c.sample_elements(np.full(20000, i), rng=rng)
+        assert np.allclose(np.bincount(samples, minlength=5) / 20000, np.array(row) / sum(row), atol=0.02)
+    assert c.sample_elements(np.array([], dtype=int)).tolist() == []
+
+    c = DiscreteDistribution([0, 0, 1]).to_cumulative()
+    assert c.sample_elements(np.arange(10)).tolist() == [2] * 10
+
+    u = DiscreteDistribution.uniform_distribution(4)
+    samples = u.sample_elements(np.zeros(20000, dtype=int), rng=rng)
+    assert np.allclose(np.bincount(samples, minlength=4) / 20000, 0.25, atol=0.02)
+    assert set(u.sample_elements(np.zeros(100, dtype=int)).tolist()) <= {0, 1, 2, 3}
+
+
+def test_rr_toss():
+    rng = np.random.default_rng(0)
+    weights = [1, 2, 3, 4]
+    d = DiscreteDistribution(weights).with_rr_toss(0.3)
+    assert isinstance(d, RRTossDistribution) and len(d) == 4
+    expected = 0.7 * np.tile(np.array(weights) / 10, (4, 1)) + 0.3 * np.eye(4)
+    assert np.allclose(d.to_full_distribution().probabilities, expected)
+    # Tossing again works on the full matrix.
+    assert np.allclose(d.with_rr_toss(0.5).probabilities, 0.5 * expected + 0.5 * np.eye(4))
+
+    c = d.to_cumulative()
+    for i in range(4):
+        samples = c.sample_elements(np.full(20000, i), rng=rng)
+        assert np.allclose(np.bincount(samples, minlength=4) / 20000, expected[i], atol=0.02)
+        samples = [c.sample_element(i, rng=rng) for _ in range(20000)]
+        assert np.allclose(np.bincount(samples, minlength=4) / 20000, expected[i], atol=0.02)
+
+    with pytest.raises(ValueError):
+        RRTossDistribution(0.5, DiscreteDistribution([[1, 0], [0, 1]]))
+    with pytest.raises(ValueError):
+        DiscreteDistribution(weights).with_rr_toss(1.5)
@@ -0,0 +1,59 @@
+import multiprocessing
+import pickle
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
+from anonymizer.utils.randomness import BufferedSystemRandom, RandomSource, SeededRandom, create_rng
+
+# The source inherited by forked processes in `test_fork`.
+_inherited_rng = None
+
+
+def _draw(_):
+    return _inherited_rng.random(4).tolist()
+
+
+@pytest.mark.parametrize("source", list(RandomSource))
+def test_sources(source):
+    rng = create_rng(source)
+    values = [rng.random() for _ in range(1000)] + rng.random(1000).tolist()
+    assert all(0 <= value < 1 for value in values)
+    assert 0.45 < np.mean(values) < 0.55
+    assert pickle.loads(pickle.dumps(rng)).random(3).shape == (3,)
+
+
+def test_buffered():
+    rng = BufferedSystemRandom(block_size=10)
+    values = rng.random(7).tolist() + rng.random(7).tolist() + [rng.random()]
+    assert len(set(values)) == 15
+    assert rng.random(0).tolist() == []
+    with pytest.raises(ValueError):
+        BufferedSystemRandom(block_size=0)
+
+
+def test_buffered_threads():
+    rng = BufferedSystemRandom(block_size=100)
+    with ThreadPoolExecutor(4) as executor:
+        values = list(executor.map(lambda _: [rng.random() for _ in range(1000)], range(4)))
+    assert len(set(sum(values, []))) == 4000
+
+
+def test_seeded():
+    assert create_rng(RandomSource.philox, 1).random(5).tolist() == create_rng(RandomSource.philox, 1).random(5).tolist()
+    assert SeededRandom(1).random(5).tolist() != SeededRandom(2).random(5).tolist()
+    with pytest.raises(ValueError):
+        create_rng(RandomSource.buffered, 1)
+
+
+@pytest.mark.skipif("fork" not in multiprocessing.get_all_start_methods(), reason="requires fork")
+@pytest.mark.parametrize("rng", [BufferedSystemRandom(), SeededRandom(42)])
+def test_fork(rng):
+    global _inherited_rng
+    _inherited_rng = rng
+    rng.random()
+    with multiprocessing.get_context("fork").Pool(2) as pool:
+        children = pool.map(_draw, [0, 1], chunksize=1)
+    parent = _draw(None)
+    assert children[0] != parent and children[1] != parent